@@ -1,143 +1,280 @@
-from entity import Entity
-import mapgen
-import numpy as np
-import tcod
-import classes
-
-STATE_WANDERING = 0
-STATE_SEARCHING = 1
-STATE_ATTACKING = 2
-
-class Base_Component:
-    entity: Entity
-
-class Monster_Basic(Base_Component):
-
-    def __init__(self):
-        self.state = STATE_WANDERING
-        self.target = (-1,-1)
-
-    def take_turn(self, player):
-        # returns message to display and int for goodness of message (if applicable)
-        #   0 = neutral message, 1 = good message, 2 = bad message
-        # takes player to get position, probably change this later
-        # assume it sees player if player sees it
-
-        # update state
-        if self.owner.is_visible():
-            self.state = STATE_ATTACKING
-        else:
-            if self.state == STATE_ATTACKING or self.state == STATE_SEARCHING:
-                self.state = STATE_SEARCHING
-            else:
-                self.state = STATE_WANDERING
-
-        # take action
-        if self.state == STATE_WANDERING:
-            # pick a random direction, if tile is clear, move there
-            direction = np.random.randint(0,8)*45
-            current_pos = self.owner.get_pos()
-            new_x, new_y = rotate(1,0,direction)
-            new_x += current_pos[0]
-            new_y += current_pos[1]
-            wall_map = self.owner.floor.get_map().get_map()
-            entity_map = self.owner.floor.get_entity_map()
-
-            # move if available
-            if wall_map[new_x][new_y] != mapgen.MAP_WALL and entity_map[new_x][new_y] == 0:
-                self.owner.floor.set_entity_pos(self.owner, new_x, new_y)
-
-        elif self.state == STATE_ATTACKING:
-            # currently, if player is visible, there should be a viable square to move toward them
-            # move toward player
-            # get relative position
-            self.target = player.get_pos()
-            current_pos = self.owner.get_pos()
-            dx = self.target[0] - current_pos[0]
-            dy = self.target[1] - current_pos[1]
-
-            # if player is adjacent ie distance < 1.5, attack
-            if np.sqrt(dx**2 + dy**2) < 1.5:
-                to_hit = np.random.randint(0,100)
-                if to_hit <= 100 - player.class_type.get_evasion():
-                    damage, newhp = player.class_type.change_hp(-1*self.owner.class_type.power)
-                    return "{name} strikes for {dam} damage!".format(name = self.owner.get_name(), dam = damage), 2
-                else:
-                    return "{name} swings and misses".format(name = self.owner.get_name()), 1
-
-            # otherwise move
-            else:
-                # get step direction
-                dx_step = np.sign(dx)
-                dy_step = np.sign(dy)
-
-                # check to see if tile is open, if so move
-                wall_map = self.owner.floor.get_map().get_map()
-                entity_map = self.owner.floor.get_entity_map()
-
-                # step directions for tiles to left and right of ideal tile
-                dx_left, dy_left = rotate(dx_step, dy_step, 45)
-                dx_right, dy_right = rotate(dx_step, dy_step, -45)
-
-                # check tiles for good move
-                if wall_map[current_pos[0] + dx_step][current_pos[1] + dy_step] != mapgen.MAP_WALL and entity_map[current_pos[0] + dx_step][current_pos[1] + dy_step] == 0:
-                    self.owner.floor.set_entity_pos(self.owner, current_pos[0] + dx_step, current_pos[1] + dy_step)
-                # check left
-                elif wall_map[current_pos[0] + dx_left][current_pos[1] + dy_left] != mapgen.MAP_WALL and entity_map[current_pos[0] + dx_left][current_pos[1] + dy_left] == 0:
-                        self.owner.floor.set_entity_pos(self.owner, current_pos[0] + dx_left, current_pos[1] + dy_left)
-                    # check right
-                elif wall_map[current_pos[0] + dx_right][current_pos[1] + dy_right] != mapgen.MAP_WALL and entity_map[current_pos[0] + dx_right][current_pos[1] + dy_right] == 0:
-                        self.owner.floor.set_entity_pos(self.owner, current_pos[0] + dx_right, current_pos[1] + dy_right)
-                # else do nothing
-
-        elif self.state == STATE_SEARCHING:
-            # keep moving toward last target, reverting to wandering once target reached
-            # get relative position
-            current_pos = self.owner.get_pos()
-            dx = self.target[0] - current_pos[0]
-            dy = self.target[1] - current_pos[1]
-
-            # if reached last target, go back to wandering
-            if np.sqrt(dx**2 + dy**2) < 1.5:
-                self.state = STATE_WANDERING
-
-            # otherwise move
-            else:
-                # get step direction
-                dx_step = np.sign(dx)
-                dy_step = np.sign(dy)
-                # check to see if tile is open, if so move
-                wall_map = self.owner.floor.get_map().get_map()
-                entity_map = self.owner.floor.get_entity_map()
-
-                # step directions for tiles to left and right of ideal tile
-                dx_left, dy_left = rotate(dx_step, dy_step, 45)
-                dx_right, dy_right = rotate(dx_step, dy_step, -45)
-
-                # check tiles for good move
-                # TODO: still move if entity on square is non_blocking
-                if wall_map[current_pos[0] + dx_step][current_pos[1] + dy_step] != mapgen.MAP_WALL and entity_map[current_pos[0] + dx_step][current_pos[1] + dy_step] == 0:
-                    self.owner.floor.set_entity_pos(self.owner, current_pos[0] + dx_step, current_pos[1] + dy_step)
-                # check left
-                elif wall_map[current_pos[0] + dx_left][current_pos[1] + dy_left] != mapgen.MAP_WALL and entity_map[current_pos[0] + dx_left][current_pos[1] + dy_left] == 0:
-                    self.owner.floor.set_entity_pos(self.owner, current_pos[0] + dx_left, current_pos[1] + dy_left)
-                # check right
-                elif wall_map[current_pos[0] + dx_right][current_pos[1] + dy_right] != mapgen.MAP_WALL and entity_map[current_pos[0] + dx_right][current_pos[1] + dy_right] == 0:
-                    self.owner.floor.set_entity_pos(self.owner, current_pos[0] + dx_right, current_pos[1] + dy_right)
-                # else do nothing
-        return None
-
-def find_path(entity, floor, target):
-    # TODO: actual pathfinding
-    pass
-
-def rotate(x, y, degrees=45):
-    # rotates vector (x,y) by degrees, rounds vector values to 1
-    # needs refining if to be used in general cases, rint is unreliable
-
-    theta = np.deg2rad(degrees)
-    cos_theta = np.cos(theta)
-    sin_theta = np.sin(theta)
-    new_x = np.rint(x*cos_theta - y*sin_theta).astype(int)
-    new_y = np.rint(x*sin_theta + y*cos_theta).astype(int)
-    return new_x, new_y
+from entity import Entity
+import mapgen
+import fov
+import regions
+import heapq
+import numpy as np
+try:
+    import tcod.path
+except ImportError:
+    # only needed for the "tcod" path backend. without it monsters keep taking greedy steps, see path_backend
+    tcod = None
+import classes
+
+STATE_WANDERING = 0
+STATE_SEARCHING = 1
+STATE_ATTACKING = 2
+
+MONSTER_VIEW_ARC = 120 # degrees a monster sees, centred on where it faces
+
+# path step costs, times the cost of the tile stepped onto. see make_path_costs
+PATH_CARDINAL = 2
+PATH_DIAGONAL = 3
+PATH_ENTITY_COST = 10 # extra cost of a tile with an entity on it, so paths go around other monsters
+
+class Base_Component:
+    entity: Entity
+
+class Monster_Basic(Base_Component):
+
+    def __init__(self):
+        self.state = STATE_WANDERING
+        self.target = (-1,-1)
+        self.sight_range = 8
+        # degrees, same convention as rotate. turns toward where the monster moves or looks
+        self.facing = 0
+        self.view_arc = MONSTER_VIEW_ARC
+        # set by perceive before the monster's turn, None when it wasn't run
+        self.sees_player = None
+
+    def get_sight_range(self):
+        return self.sight_range
+
+    def set_sees_player(self, value):
+        self.sees_player = value
+
+    def get_facing(self):
+        return self.facing
+
+    def get_view_arc(self):
+        return self.view_arc
+
+    def follow_path(self):
+        # takes one step along find_path toward self.target, returns True if it moved
+        # without a path backend it doesn't move, and the caller takes a greedy step instead
+        if path_backend is None:
+            return False
+        path = find_path(self.owner, self.owner.floor, self.target)
+        if len(path) == 0:
+            return False
+        x, y = path[0]
+        if self.owner.floor.get_entity_map()[x][y] != 0:
+            return False
+        self.owner.floor.set_entity_pos(self.owner, x, y)
+        return True
+
+    def face(self, dx, dy):
+        # turns toward offset (dx, dy)
+        if dx != 0 or dy != 0:
+            self.facing = float(np.degrees(np.arctan2(dy, dx)) % 360)
+
+    def take_turn(self, player):
+        # returns message to display and int for goodness of message (if applicable)
+        #   0 = neutral message, 1 = good message, 2 = bad message
+        # takes player to get position, probably change this later
+        # uses what perceive found, otherwise assume it sees player if player sees it
+        sees_player = self.sees_player if self.sees_player is not None else self.owner.is_visible()
+        self.sees_player = None
+
+        # update state
+        if sees_player:
+            self.state = STATE_ATTACKING
+        else:
+            if self.state == STATE_ATTACKING or self.state == STATE_SEARCHING:
+                self.state = STATE_SEARCHING
+            else:
+                self.state = STATE_WANDERING
+
+        # take action
+        if self.state == STATE_WANDERING:
+            # pick a random direction, if tile is clear, move there
+            direction = np.random.randint(0,8)*45
+            self.facing = direction
+            current_pos = self.owner.get_pos()
+            new_x, new_y = rotate(1,0,direction)
+            new_x += current_pos[0]
+            new_y += current_pos[1]
+            wall_map = self.owner.floor.get_map().get_map()
+            entity_map = self.owner.floor.get_entity_map()
+
+            # move if available
+            if wall_map[new_x][new_y] != mapgen.MAP_WALL and entity_map[new_x][new_y] == 0:
+                self.owner.floor.set_entity_pos(self.owner, new_x, new_y)
+
+        elif self.state == STATE_ATTACKING:
+            # currently, if player is visible, there should be a viable square to move toward them
+            # move toward player
+            # get relative position
+            self.target = player.get_pos()
+            current_pos = self.owner.get_pos()
+            dx = self.target[0] - current_pos[0]
+            dy = self.target[1] - current_pos[1]
+            self.face(dx, dy)
+
+            # if player is adjacent ie distance < 1.5, attack
+            if np.sqrt(dx**2 + dy**2) < 1.5:
+                to_hit = np.random.randint(0,100)
+                if to_hit <= 100 - player.class_type.get_evasion():
+                    damage, newhp = player.class_type.change_hp(-1*self.owner.class_type.power)
+                    return "{name} strikes for {dam} damage!".format(name = self.owner.get_name(), dam = damage), 2
+                else:
+                    return "{name} swings and misses".format(name = self.owner.get_name()), 1
+
+            # otherwise move, along a path if there is one
+            elif self.follow_path():
+                pass
+            else:
+                # get step direction
+                dx_step = np.sign(dx)
+                dy_step = np.sign(dy)
+
+                # check to see if tile is open, if so move
+                wall_map = self.owner.floor.get_map().get_map()
+                entity_map = self.owner.floor.get_entity_map()
+
+                # step directions for tiles to left and right of ideal tile
+                dx_left, dy_left = rotate(dx_step, dy_step, 45)
+                dx_right, dy_right = rotate(dx_step, dy_step, -45)
+
+                # check tiles for good move
+                if wall_map[current_pos[0] + dx_step][current_pos[1] + dy_step] != mapgen.MAP_WALL and entity_map[current_pos[0] + dx_step][current_pos[1] + dy_step] == 0:
+                    self.owner.floor.set_entity_pos(self.owner, current_pos[0] + dx_step, current_pos[1] + dy_step)
+                # check left
+                elif wall_map[current_pos[0] + dx_left][current_pos[1] + dy_left] != mapgen.MAP_WALL and entity_map[current_pos[0] + dx_left][current_pos[1] + dy_left] == 0:
+                        self.owner.floor.set_entity_pos(self.owner, current_pos[0] + dx_left, current_pos[1] + dy_left)
+                    # check right
+                elif wall_map[current_pos[0] + dx_right][current_pos[1] + dy_right] != mapgen.MAP_WALL and entity_map[current_pos[0] + dx_right][current_pos[1] + dy_right] == 0:
+                        self.owner.floor.set_entity_pos(self.owner, current_pos[0] + dx_right, current_pos[1] + dy_right)
+                # else do nothing
+
+        elif self.state == STATE_SEARCHING:
+            # keep moving toward last target, reverting to wandering once target reached
+            # get relative position
+            current_pos = self.owner.get_pos()
+            dx = self.target[0] - current_pos[0]
+            dy = self.target[1] - current_pos[1]
+            self.face(dx, dy)
+
+            # if reached last target, go back to wandering
+            if np.sqrt(dx**2 + dy**2) < 1.5:
+                self.state = STATE_WANDERING
+
+            # otherwise move, along a path if there is one
+            elif self.follow_path():
+                pass
+            else:
+                # get step direction
+                dx_step = np.sign(dx)
+                dy_step = np.sign(dy)
+                # check to see if tile is open, if so move
+                wall_map = self.owner.floor.get_map().get_map()
+                entity_map = self.owner.floor.get_entity_map()
+
+                # step directions for tiles to left and right of ideal tile
+                dx_left, dy_left = rotate(dx_step, dy_step, 45)
+                dx_right, dy_right = rotate(dx_step, dy_step, -45)
+
+                # check tiles for good move
+                # TODO: still move if entity on square is non_blocking
+                if wall_map[current_pos[0] + dx_step][current_pos[1] + dy_step] != mapgen.MAP_WALL and entity_map[current_pos[0] + dx_step][current_pos[1] + dy_step] == 0:
+                    self.owner.floor.set_entity_pos(self.owner, current_pos[0] + dx_step, current_pos[1] + dy_step)
+                # check left
+                elif wall_map[current_pos[0] + dx_left][current_pos[1] + dy_left] != mapgen.MAP_WALL and entity_map[current_pos[0] + dx_left][current_pos[1] + dy_left] == 0:
+                    self.owner.floor.set_entity_pos(self.owner, current_pos[0] + dx_left, current_pos[1] + dy_left)
+                # check right
+                elif wall_map[current_pos[0] + dx_right][current_pos[1] + dy_right] != mapgen.MAP_WALL and entity_map[current_pos[0] + dx_right][current_pos[1] + dy_right] == 0:
+                    self.owner.floor.set_entity_pos(self.owner, current_pos[0] + dx_right, current_pos[1] + dy_right)
+                # else do nothing
+        return None
+
+def perceive(player, floor):
+    # works out which living monsters on floor can see player, with one batched fov pass for all of them
+    # monsters only see within their view cone, so ones facing away cost next to nothing
+    monsters = [ent for ent in floor.get_entities() if ent.is_alive() and isinstance(ent.ai, Monster_Basic)]
+    if len(monsters) == 0:
+        return
+    seen, _ = fov.calc_fov_many([ent.get_pos() for ent in monsters], [ent.ai.get_sight_range() for ent in monsters],
+                                floor, target=player.get_pos(), facings=[ent.ai.get_facing() for ent in monsters],
+                                arcs=[ent.ai.get_view_arc() for ent in monsters])
+    for ent, sees in zip(monsters, seen):
+        ent.ai.set_sees_player(bool(sees))
+
+# how monsters path toward their target, see set_path_backend. None keeps the greedy step, a python A* every
+# monster every turn is too slow to be the default
+path_backend = "tcod" if tcod is not None else None
+
+def set_path_backend(backend):
+    # switches monster movement between "tcod" (tcod.path), "python" (find_path_astar) and None (greedy steps)
+    # returns the backend in use, which stays the same if tcod isn't installed
+    global path_backend
+    if backend is None or backend == "python" or (backend == "tcod" and tcod is not None):
+        path_backend = backend
+    return path_backend
+
+def make_path_costs(floor):
+    # cost of stepping onto each tile of floor, 0 for walls
+    walkable = floor.get_map().get_map() != mapgen.MAP_WALL
+    return walkable.astype(np.int16)*(1 + floor.get_entity_map().astype(np.int16)*PATH_ENTITY_COST)
+
+def find_path(entity, floor, target, backend=None):
+    # cheapest path from entity to target, as a list of (x, y) steps after entity's position, ending at target
+    # diagonal steps are allowed. returns [] if target can't be reached
+    # backend - "tcod" or "python", None for path_backend, or "python" without one
+    start = entity.get_pos()
+    target = (int(target[0]), int(target[1]))
+    if start == target or not floor.get_map().same_region(start, target):
+        return []
+    costs = make_path_costs(floor)
+    if (backend or path_backend or "python") == "tcod":
+        graph = tcod.path.SimpleGraph(cost=costs, cardinal=PATH_CARDINAL, diagonal=PATH_DIAGONAL)
+        pathfinder = tcod.path.Pathfinder(graph)
+        pathfinder.add_root(start)
+        return [tuple(step) for step in pathfinder.path_to(target)[1:].tolist()]
+    return find_path_astar(costs, start, target)
+
+def find_path_astar(costs, start, goal):
+    # A* over costs, see make_path_costs, with the same step costs as tcod.path.SimpleGraph in find_path
+    # returns the steps after start up to goal, [] if goal can't be reached
+    rows = costs.tolist()
+    width, height = costs.shape
+    best = {start: 0}
+    came_from = {}
+    frontier = [(0, 0, start)]
+    while frontier:
+        _, cost, tile = heapq.heappop(frontier)
+        if tile == goal:
+            break
+        if cost > best[tile]:
+            continue
+        x, y = tile
+        for dx, dy in regions.NEIGHBORS:
+            nx = x + dx
+            ny = y + dy
+            if 0 <= nx < width and 0 <= ny < height and rows[nx][ny]:
+                new_cost = cost + rows[nx][ny]*(PATH_DIAGONAL if dx and dy else PATH_CARDINAL)
+                if new_cost < best.get((nx, ny), new_cost + 1):
+                    best[(nx, ny)] = new_cost
+                    came_from[(nx, ny)] = tile
+                    # octile distance at the lowest tile cost, never more than the real cost
+                    far = max(abs(goal[0] - nx), abs(goal[1] - ny))
+                    near = min(abs(goal[0] - nx), abs(goal[1] - ny))
+                    heapq.heappush(frontier, (new_cost + PATH_CARDINAL*(far - near) + PATH_DIAGONAL*near, new_cost, (nx, ny)))
+    if goal not in came_from:
+        return []
+    path = []
+    tile = goal
+    while tile != start:
+        path.append(tile)
+        tile = came_from[tile]
+    return path[::-1]
+
+def rotate(x, y, degrees=45):
+    # rotates vector (x,y) by degrees, rounds vector values to 1
+    # needs refining if to be used in general cases, rint is unreliable
+
+    theta = np.deg2rad(degrees)
+    cos_theta = np.cos(theta)
+    sin_theta = np.sin(theta)
+    new_x = np.rint(x*cos_theta - y*sin_theta).astype(int)
+    new_y = np.rint(x*sin_theta + y*cos_theta).astype(int)
+    return new_x, new_y
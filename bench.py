@@ -0,0 +1,1151 @@
+# benchmarks for map generation and friends
+# run with: python bench.py [name ...], runs everything if no names are given
+import os
+import sys
+import time
+from collections import deque
+import numpy as np
+import mapgen
+import chunkmap
+import floor
+import fov
+import regions
+import tiles
+
+def time_call(func, *args, repeat=3):
+    # returns best wall time in seconds over repeat calls and the result of the last call
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+def random_terrain(size, seed=0):
+    # square map of scattered walls and floor, roughly 45% walls
+    rng = np.random.RandomState(seed)
+    return np.where(rng.rand(size, size) < .45, mapgen.MAP_WALL, mapgen.MAP_FLOOR)
+
+##### LEGACY IMPLEMENTATIONS #####
+# per tile versions kept around as the baseline for comparisons
+
+def legacy_make_transparency_map(map):
+    trans_map = np.zeros(map.shape)
+    for x in range(0,map.shape[0]):
+        for y in range(0,map.shape[1]):
+            if map[x][y] == mapgen.MAP_WALL:
+                trans_map[x][y] = 1
+            else:
+                trans_map[x][y] = 0
+    return trans_map
+
+def legacy_make_wall_tile_map(map):
+    mult_mask = np.zeros((3,3))
+    mult_mask[0][1] = 2
+    mult_mask[1][0] = 1
+    mult_mask[1][2] = 8
+    mult_mask[2][1] = 4
+
+    wall_map = np.copy(map)
+    for x in range(0,map.shape[0]):
+        for y in range(0,map.shape[1]):
+            if map[x][y] == 0:
+                wall_map[x][y] = 1
+            else:
+                wall_map[x][y] = 0
+
+    masked_map = 15*np.ones(map.shape)
+    for x in range(0,wall_map.shape[0]-2):
+        for y in range(0,wall_map.shape[1]-2):
+            array_slice = wall_map[x:x+3,y:y+3]
+            masked_map[x+1][y+1] = np.sum(np.multiply(array_slice,mult_mask), dtype=np.int32)
+
+    return masked_map.astype(int)
+
+def legacy_connect_nodes(map, node1x, node1y, node2x, node2y, rng):
+    x_dif = node2x - node1x
+    y_dif = node2y - node1y
+    break_point = rng.randint(0,np.absolute(x_dif))
+    for i1 in range(0,np.absolute(x_dif)):
+        if i1 < break_point:
+            temp_y = node1y
+        else:
+            temp_y = node2y
+        map[node1x + i1*np.sign(x_dif)][temp_y] = mapgen.MAP_HALL
+    for i1 in range(0,np.absolute(y_dif)):
+        map[node1x + break_point*np.sign(x_dif)][node1y + i1*np.sign(y_dif)] = mapgen.MAP_HALL
+    return map
+
+def legacy_add_rooms(n, map, nodes_list, rng):
+    rooms_list = []
+    for iter in range(n):
+        width = rng.randint(3, 10)
+        height = rng.randint(3, 10)
+        loc_x = nodes_list[0][iter]
+        loc_y = nodes_list[1][iter]
+        x_offset = rng.randint(0,width-1)
+        y_offset = rng.randint(0,height-1)
+        for x in range(0,width):
+            for y in range(0,height):
+                if (x+loc_x-x_offset) < map.shape[0] and (x+loc_x-x_offset) >= 0 and (y+loc_y-y_offset) < map.shape[1] and (y+loc_y-y_offset) >= 0:
+                    map[x+loc_x - x_offset][y+loc_y - y_offset] = mapgen.MAP_FLOOR
+        rooms_list.append((loc_x - x_offset, loc_y - y_offset, width, height))
+    return map, rooms_list
+
+def legacy_smooth_caves(walls, passes):
+    # cellular automata smoothing, counting each tile's neighbors one at a time
+    walls = walls.copy()
+    for i in range(passes):
+        new_walls = walls.copy()
+        for x in range(1, walls.shape[0] - 1):
+            for y in range(1, walls.shape[1] - 1):
+                count = 0
+                for dx in (-1, 0, 1):
+                    for dy in (-1, 0, 1):
+                        if (dx or dy) and walls[x + dx][y + dy]:
+                            count += 1
+                new_walls[x][y] = count >= 5 or (walls[x][y] and count >= 4)
+        walls = new_walls
+    return walls
+
+def legacy_make_blob_tile_map(map):
+    # 8 neighbor wall tiles, one tile and one neighbor at a time
+    masks = list(mapgen.BLOB_MASKS)
+    blob_map = np.zeros(map.shape, dtype=np.uint8)
+    for x in range(map.shape[0]):
+        for y in range(map.shape[1]):
+            code = 0
+            for bit, dx, dy in mapgen.BLOB_NEIGHBORS:
+                nx = x + dx
+                ny = y + dy
+                if nx < 0 or ny < 0 or nx >= map.shape[0] or ny >= map.shape[1] or map[nx][ny] == mapgen.MAP_WALL:
+                    code |= bit
+            for corner, side1, side2 in ((mapgen.BLOB_NE, mapgen.BLOB_N, mapgen.BLOB_E), (mapgen.BLOB_SE, mapgen.BLOB_S, mapgen.BLOB_E),
+                                         (mapgen.BLOB_SW, mapgen.BLOB_S, mapgen.BLOB_W), (mapgen.BLOB_NW, mapgen.BLOB_N, mapgen.BLOB_W)):
+                if not (code & side1 and code & side2):
+                    code &= ~corner
+            blob_map[x][y] = masks.index(code)
+    return blob_map
+
+def legacy_place_rooms(mapx, mapy, num_rooms, rng, min_size=3, max_size=10, margin=1):
+    # one candidate at a time, checked by scanning the occupied mask under it
+    occupied = np.zeros((mapx, mapy), dtype=bool)
+    rooms_list = []
+    attempts = 0
+    while len(rooms_list) < num_rooms and attempts < 20*num_rooms:
+        attempts += 1
+        width = rng.randint(min_size, max_size + 1)
+        height = rng.randint(min_size, max_size + 1)
+        x = rng.randint(1, mapx - width)
+        y = rng.randint(1, mapy - height)
+        if occupied[max(x - margin, 0):x + width + margin, max(y - margin, 0):y + height + margin].any():
+            continue
+        occupied[x:x + width, y:y + height] = True
+        rooms_list.append((x, y, width, height))
+    return rooms_list
+
+def legacy_carve(mapx, mapy, num_nodes, num_rooms, seed):
+    # node, hall and room stages of mapgen.make_map, carving one tile at a time
+    np_rng, py_rng = mapgen.make_rngs(seed)
+    map = np.zeros((mapx,mapy), dtype=int)
+    node_list_x = np_rng.randint(10,mapx-10,(1,num_nodes))
+    node_list_y = np_rng.randint(10,mapy-10,(1,num_nodes))
+    node_list = (node_list_x.flatten(),node_list_y.flatten())
+    for i0 in range(num_nodes):
+        map = legacy_connect_nodes(map,node_list[0][i0], node_list[1][i0], node_list[0][(i0+1)%num_nodes], node_list[1][(i0+1)%num_nodes], py_rng)
+    for i in range(0,num_nodes):
+        map[node_list[0][i]][node_list[1][i]] = mapgen.MAP_HALL
+    map, rooms_list = legacy_add_rooms(num_rooms, map, node_list, py_rng)
+    return map, rooms_list
+
+def legacy_make_map(mapx, mapy, num_nodes, num_rooms, seed):
+    # mapgen.make_map with the per tile carving, everything after carving is the same
+    map, rooms_list = legacy_carve(mapx, mapy, num_nodes, num_rooms, seed)
+    map_with_stairs = np.copy(map)
+    trans_map = mapgen.make_transparency_map(map)
+    masked_map = mapgen.make_wall_tile_map(map_with_stairs)
+    return map_with_stairs, rooms_list, trans_map, masked_map
+
+def legacy_get_line(endx, endy):
+    # engine.get_line, the float slope line blit_targetting used to walk from (0, 0)
+    point_list = [(0,0)]
+    if endx != 0:
+        slope = endy/endx
+        if np.abs(slope) < 1:
+            for i in range(0, int(np.abs(endx))+1):
+                point_list.append((i*np.sign(endx), np.round(i*slope)*np.sign(endx)))
+        else:
+            slope = endx/endy
+            for i in range(0, int(np.abs(endy))+1):
+                point_list.append((np.round(i*slope)*np.sign(endy), i*np.sign(endy)))
+    else:
+        for i in range(0, int(np.abs(endy))+1):
+            point_list.append((0, i*np.sign(endy)))
+    return point_list
+
+def legacy_count_blockers(origin, target, wall_map, entity_map, line=None):
+    # blit_targetting's per point wall and entity checks along legacy_get_line, or line, offsets from origin
+    num_blockers = 0
+    if line is None:
+        line = legacy_get_line(target[0] - origin[0], target[1] - origin[1])
+    for point in line:
+        x, y = int(origin[0] + point[0]), int(origin[1] + point[1])
+        if (x, y) != tuple(origin) and (x, y) != tuple(target):
+            if wall_map[x][y] == mapgen.MAP_WALL or entity_map[x][y] == 1:
+                num_blockers += 1
+    return num_blockers
+
+def legacy_label_components(walkable):
+    # plain breadth first flood fill of 8-connected walkable tiles, -1 for the rest
+    labels = np.full(walkable.shape, -1, dtype=np.int32)
+    count = 0
+    for x, y in zip(*np.nonzero(walkable)):
+        if labels[x, y] >= 0:
+            continue
+        labels[x, y] = count
+        queue = deque([(x, y)])
+        while queue:
+            tx, ty = queue.popleft()
+            for dx, dy in regions.NEIGHBORS:
+                nx = tx + dx
+                ny = ty + dy
+                if 0 <= nx < walkable.shape[0] and 0 <= ny < walkable.shape[1] and walkable[nx, ny] and labels[nx, ny] < 0:
+                    labels[nx, ny] = count
+                    queue.append((nx, ny))
+        count += 1
+    return labels
+
+def same_labelling(a, b, background):
+    # whether label arrays a and b split the tiles into the same groups, whatever the numbers
+    if not np.array_equal(a == background, b == background):
+        return False
+    a = a[a != background]
+    b = b[b != background]
+    pairs = len(np.unique(np.stack((a, b)), axis=1)[0])
+    return pairs == len(np.unique(a)) == len(np.unique(b))
+
+##### BENCHMARKS #####
+
+def bench_terrain_layers(sizes=(80, 512, 2048)):
+    # transparency and wall mask layers, legacy loops vs vectorized
+    print("terrain layers (seconds, best of n)")
+    print("{:>6} {:>12} {:>12} {:>12} {:>12}".format("size", "trans old", "trans new", "walls old", "walls new"))
+    for size in sizes:
+        terrain = random_terrain(size)
+        # the legacy loops get slow fast, only time them once on big maps
+        repeat = 3 if size <= 512 else 1
+
+        trans_old, trans_old_map = time_call(legacy_make_transparency_map, terrain, repeat=repeat)
+        trans_new, trans_new_map = time_call(mapgen.make_transparency_map, terrain)
+        walls_old, walls_old_map = time_call(legacy_make_wall_tile_map, terrain, repeat=repeat)
+        walls_new, walls_new_map = time_call(mapgen.make_wall_tile_map, terrain)
+
+        # the new layers have to match the old ones exactly
+        if not np.array_equal(trans_old_map, trans_new_map) or trans_old_map.dtype != trans_new_map.dtype:
+            raise AssertionError("transparency map mismatch at size {}".format(size))
+        if not np.array_equal(walls_old_map, walls_new_map) or walls_old_map.dtype != walls_new_map.dtype:
+            raise AssertionError("wall tile map mismatch at size {}".format(size))
+        print("{:>6} {:>12.5f} {:>12.5f} {:>12.5f} {:>12.5f}".format(size, trans_old, trans_new, walls_old, walls_new))
+
+def bench_generate_many(num_floors=200, size=80):
+    # batch floor generation throughput by number of worker processes
+    seeds = list(range(num_floors))
+    worker_counts = [1]
+    while worker_counts[-1]*2 <= (os.cpu_count() or 1):
+        worker_counts.append(worker_counts[-1]*2)
+    if worker_counts[-1] != (os.cpu_count() or 1):
+        worker_counts.append(os.cpu_count())
+
+    print("generate_many, {} floors of {}x{}".format(num_floors, size, size))
+    print("{:>8} {:>10} {:>12}".format("workers", "seconds", "floors/sec"))
+    baseline = None
+    for workers in worker_counts:
+        elapsed, result = time_call(mapgen.generate_many, seeds, size, workers, repeat=1)
+
+        # output has to be the same no matter how the work was split up
+        if baseline is None:
+            baseline = result
+        for key in baseline:
+            if key in mapgen.BATCH_LAYERS:
+                same = np.array_equal(baseline[key], result[key])
+            else:
+                same = baseline[key] == result[key]
+            if not same:
+                raise AssertionError("{} differs with {} workers".format(key, workers))
+        print("{:>8} {:>10.3f} {:>12.1f}".format(workers, elapsed, num_floors/elapsed))
+
+def bench_chunked_map(size=8192, chunk_size=256, max_chunks=64, steps=200):
+    # generation and a walk with FOV on a chunked map too big for the regular Map
+    import ai
+    import entity
+    print("chunked map {}x{}, chunks of {}, at most {} mapped".format(size, size, chunk_size, max_chunks))
+    start = time.perf_counter()
+    chunked_map = chunkmap.make_chunked_map(size, size, seed=0, chunk_size=chunk_size, max_chunks=max_chunks)
+    print("generate: {:.2f} s".format(time.perf_counter() - start))
+
+    # walk along the middle row of the first chunk row, computing FOV on a window around the player each step
+    # and a path to the furthest tile of the window the player can reach inside it
+    radius = 8
+    y = chunk_size // 2
+    view_time = 0
+    fov_time = 0
+    path_time = 0
+    paths = 0
+    for step in range(steps):
+        x = 1 + (step*size // steps) % (size - 2)
+        start = time.perf_counter()
+        view = chunked_map.get_view(x, y, radius + 1)
+        view_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        vis_window = fov.calc_fov_window(view.to_local(x, y), radius, floor.Floor(view, 0, []))
+        view.update_revealed_map(vis_window.get_vis(), vis_window.get_bounds(), vis_window.get_offset())
+        view.write_back()
+        fov_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        player = view.to_local(x, y)
+        xs, ys = np.nonzero(view.get_map() != mapgen.MAP_WALL)
+        reachable = [(int(tx), int(ty)) for tx, ty in zip(xs, ys) if view.same_region(player, (tx, ty))]
+        target = max(reachable, key=lambda tile: max(abs(tile[0] - player[0]), abs(tile[1] - player[1])))
+        path = ai.find_path(entity.Entity(player[0], player[1], 0), floor.Floor(view, 0, []), target, backend="python")
+        path_time += time.perf_counter() - start
+        if target != player:
+            if not path or path[-1] != target:
+                raise AssertionError("no path to {} from {} in the view at {}".format(target, player, (x, y)))
+            paths += 1
+
+    print("per step: view {:.3f} ms, fov {:.3f} ms, path {:.3f} ms ({} paths)".format(
+        view_time/steps*1000, fov_time/steps*1000, path_time/steps*1000, paths))
+    print("mapped chunk data: {:.1f} MB (dense int64/float64 layers would be {:.1f} MB)".format(
+        chunked_map.resident_bytes()/2**20, size*size*8*4/2**20))
+    chunked_map.close()
+
+# bytes per tile of the layers a floor used to keep as separate arrays:
+# map, masked_map, revealed_map as int64 and trans_map, entity_map, item_map as float64
+LEGACY_LAYER_DTYPES = {"map": np.int64, "masked_map": np.int64, "revealed_map": np.int64,
+                       "trans_map": np.float64, "entity_map": np.float64, "item_map": np.float64}
+
+def bench_tile_store(num_floors=10, size=80, fov_calls=200, lookups=200000):
+    # floor memory with the compact tile store vs the old per layer arrays, and lookup speed of each
+    floors = [floor.Floor(mapgen.Map(size, size, seed=depth), depth, []) for depth in range(num_floors)]
+
+    # the store on its own, against the same layers as separate arrays. the store also holds light_map, and floors
+    # keep region labels next to it (int32, see regions.Region_Index), which are counted apart
+    num_tiles = num_floors*size*size
+    usage = [the_floor.memory_usage() for the_floor in floors]
+    old_bytes = sum(np.dtype(dtype).itemsize for dtype in LEGACY_LAYER_DTYPES.values())*num_tiles
+    same_bytes = sum(layers[name] for layers in usage for name in LEGACY_LAYER_DTYPES)
+    store_bytes = sum(the_floor.get_map().get_tiles().nbytes() for the_floor in floors)
+    other_bytes = sum(sum(layers.values()) for layers in usage) - store_bytes
+    print("tile layers for {} floors of {}x{}".format(num_floors, size, size))
+    print("  old layers:        {:>9} bytes ({} per tile)".format(old_bytes, old_bytes//num_tiles))
+    print("  same layers, new:  {:>9} bytes ({} per tile)".format(same_bytes, same_bytes//num_tiles))
+    print("  whole tile store:  {:>9} bytes ({} per tile, {})".format(store_bytes, store_bytes//num_tiles,
+                                                                       ", ".join(tiles.TILE_LAYERS)))
+    print("  region labels etc: {:>9} bytes ({} per tile, {})".format(other_bytes, other_bytes//num_tiles,
+                                                                       ", ".join(k for k in usage[0] if k not in tiles.TILE_LAYERS)))
+
+    # same floors again with the layers swapped for copies in the old dtypes
+    legacy_floors = [floor.Floor(mapgen.Map(size, size, seed=depth), depth, []) for depth in range(num_floors)]
+    for the_floor in legacy_floors:
+        the_map = the_floor.get_map()
+        the_map.map = the_map.map.astype(LEGACY_LAYER_DTYPES["map"])
+        the_map.trans_map = the_map.trans_map.astype(LEGACY_LAYER_DTYPES["trans_map"])
+        the_floor.entity_map = the_floor.entity_map.astype(LEGACY_LAYER_DTYPES["entity_map"])
+
+    def run_fov(floors):
+        for i in range(fov_calls):
+            the_floor = floors[i % num_floors]
+            fov.calc_fov(the_floor.get_map().get_entrance(), 8, the_floor)
+
+    rng = np.random.RandomState(0)
+    spots = rng.randint(1, size - 1, (lookups, 2)).tolist()
+    def run_lookups(floors):
+        # the checks monster AI does before stepping onto a tile
+        wall_map = floors[0].get_map().get_map()
+        entity_map = floors[0].get_entity_map()
+        open_tiles = 0
+        for x, y in spots:
+            if wall_map[x][y] != mapgen.MAP_WALL and entity_map[x][y] == 0:
+                open_tiles += 1
+        return open_tiles
+
+    # neither is expected to get faster, both are bound by python overhead rather than the layer dtypes
+    old_fov, result = time_call(run_fov, legacy_floors)
+    new_fov, result = time_call(run_fov, floors)
+    old_lookup, result = time_call(run_lookups, legacy_floors)
+    new_lookup, result = time_call(run_lookups, floors)
+    print("{:>22} {:>10} {:>10}".format("", "old", "new"))
+    print("{:>22} {:>10.4f} {:>10.4f}".format("fov per call (ms)", old_fov/fov_calls*1000, new_fov/fov_calls*1000))
+    print("{:>22} {:>10.4f} {:>10.4f}".format("ai lookup (us)", old_lookup/lookups*1e6, new_lookup/lookups*1e6))
+
+def bench_carving(sizes=((80, 16), (512, 256), (2048, 2048)), num_seeds=5):
+    # make_map with per tile carving vs slices vs batched slices. sizes are (size, number of nodes/rooms) pairs.
+    print("make_map by carving mode (ms per map, best of 3)")
+    print("{:>6} {:>6} {:>10} {:>10} {:>10}".format("size", "nodes", "per tile", "slices", "batch"))
+    for size, num_nodes in sizes:
+        seeds = range(num_seeds)
+
+        # all three have to carve the same map for the same seed
+        for seed in seeds:
+            old_map, old_rooms = legacy_carve(size, size, num_nodes, num_nodes, seed)
+            for batch in (False, True):
+                layers = mapgen.make_map(size, size, num_nodes, num_nodes, seed=seed, batch=batch)
+                stairs = (layers[0] == mapgen.MAP_UP_STAIR) | (layers[0] == mapgen.MAP_DOWN_STAIR)
+                if not np.array_equal(old_map[~stairs], layers[0][~stairs]) or old_rooms != layers[2]:
+                    raise AssertionError("carving mismatch at size {} seed {} batch {}".format(size, seed, batch))
+
+        def run(carve):
+            for seed in seeds:
+                carve(seed)
+        old, result = time_call(run, lambda seed: legacy_make_map(size, size, num_nodes, num_nodes, seed))
+        slices, result = time_call(run, lambda seed: mapgen.make_map(size, size, num_nodes, num_nodes, seed=seed, batch=False))
+        batch, result = time_call(run, lambda seed: mapgen.make_map(size, size, num_nodes, num_nodes, seed=seed, batch=True))
+        print("{:>6} {:>6} {:>10.3f} {:>10.3f} {:>10.3f}".format(size, num_nodes, old/num_seeds*1000, slices/num_seeds*1000, batch/num_seeds*1000))
+
+def bench_regions(sizes=(80, 512, 2048), flips=50, check_sizes=(80, 512), checks=200):
+    # connectivity labelling at generation time, and keeping it current as tiles open and close.
+    # on check_sizes, label_components and the index's components after checks random flips have to match a bfs
+    # labelling, and its regions a make_region_map of the changed map
+    print("region index (ms)")
+    print("{:>6} {:>12} {:>14} {:>14}".format("size", "full label", "flip (incr)", "flip (full)"))
+    rng = np.random.RandomState(0)
+    for size in sizes:
+        num_nodes = max(16, size//5)
+        layers = mapgen.make_map(size, size, num_nodes, num_nodes, seed=0)
+        map = layers[0]
+        rooms_list = layers[2]
+        full, index = time_call(regions.Region_Index, map, rooms_list)
+
+        # open and close random walkable tiles, the same tiles for both ways of updating
+        spots = rng.randint(1, size - 1, (flips, 2))
+        walkable = map != mapgen.MAP_WALL
+        start = time.perf_counter()
+        for x, y in spots:
+            index.set_walkable(x, y, not walkable[x, y])
+            index.set_walkable(x, y, walkable[x, y])
+        incremental = (time.perf_counter() - start)/(2*flips)
+
+        relabel, result = time_call(regions.label_components, walkable, repeat=1)
+        print("{:>6} {:>12.3f} {:>14.4f} {:>14.3f}".format(size, full*1000, incremental*1000, relabel*1000))
+
+        if size not in check_sizes:
+            continue
+        if not same_labelling(result, legacy_label_components(walkable), -1):
+            raise AssertionError("label_components differs from bfs at size {}".format(size))
+        # flips that stay, checked against labelling the changed map from scratch
+        for x, y in rng.randint(1, size - 1, (checks, 2)):
+            walkable[x, y] = not walkable[x, y]
+            index.set_walkable(x, y, walkable[x, y])
+        if not same_labelling(index.get_components(), legacy_label_components(walkable), -1):
+            raise AssertionError("region index components differ from bfs after flips at size {}".format(size))
+        changed = np.where(walkable, mapgen.MAP_FLOOR, mapgen.MAP_WALL)
+        if not same_labelling(index.get_regions(), regions.make_region_map(changed, rooms_list), 0):
+            raise AssertionError("region index regions differ from relabelling after flips at size {}".format(size))
+
+def bench_generators(sizes=(80, 512, 2048), num_seeds=3, legacy_sizes=(80, 256)):
+    # throughput of every registered generator, and cave smoothing vs the per tile version
+    print("generators (floors/sec, best of 3)")
+    names = sorted(mapgen.GENERATORS)
+    print("{:>6} ".format("size") + " ".join("{:>10}".format(name) for name in names))
+    for size in sizes:
+        rates = []
+        for name in names:
+            params = {}
+            if name == "classic":
+                params = {"num_nodes": max(16, size//5), "num_rooms": max(16, size//5)}
+            def run():
+                for seed in range(num_seeds):
+                    layers = mapgen.GENERATORS[name](size, size, seed=seed, **params)
+                    # every generator has to hand back the whole bundle
+                    if len(layers) != 8 or layers[0].shape != (size, size) or len(layers[2]) == 0:
+                        raise AssertionError("{} returned a bad layer bundle at size {}".format(name, size))
+            elapsed, result = time_call(run)
+            rates.append(num_seeds/elapsed)
+        print("{:>6} ".format(size) + " ".join("{:>10.2f}".format(rate) for rate in rates))
+
+    print("cave smoothing, 4 passes (ms)")
+    print("{:>6} {:>10} {:>10}".format("size", "per tile", "numpy"))
+    for size in legacy_sizes:
+        walls = np.random.RandomState(0).rand(size, size) < .45
+        walls[0, :] = walls[-1, :] = walls[:, 0] = walls[:, -1] = True
+        old, old_walls = time_call(legacy_smooth_caves, walls, 4, repeat=1)
+        new, new_walls = time_call(mapgen.smooth_caves, walls, 4)
+        if not np.array_equal(old_walls, new_walls):
+            raise AssertionError("cave smoothing mismatch at size {}".format(size))
+        print("{:>6} {:>10.3f} {:>10.3f}".format(size, old*1000, new*1000))
+
+def bench_autotile(sizes=(80, 512, 2048), legacy_sizes=(80,), flips=200):
+    # 8 neighbor wall tiles: whole map pass, per tile version, and set_tile keeping them current
+    # (set_tile time includes the region index update)
+    print("blob autotile (ms)")
+    print("{:>6} {:>10} {:>10} {:>12} {:>12}".format("size", "4 bit", "47 blob", "per tile", "set_tile"))
+    rng = np.random.RandomState(0)
+    for size in sizes:
+        map = mapgen.Map(size, size, seed=0, num_nodes=max(16, size//5), num_rooms=max(16, size//5))
+        cardinal, result = time_call(mapgen.make_wall_tile_map, map.get_map())
+        blob, blob_map = time_call(mapgen.make_blob_tile_map, map.get_map())
+
+        legacy = float("nan")
+        if size in legacy_sizes:
+            legacy, legacy_map = time_call(legacy_make_blob_tile_map, map.get_map(), repeat=1)
+            if not np.array_equal(legacy_map, blob_map):
+                raise AssertionError("blob tile mismatch at size {}".format(size))
+
+        # flip random tiles with the blob map cached, it has to match a full recompute afterwards
+        map.get_blob_map()
+        spots = rng.randint(0, size, (flips, 2))
+        start = time.perf_counter()
+        for x, y in spots:
+            map.set_tile(x, y, mapgen.MAP_FLOOR if map.get_map()[x, y] == mapgen.MAP_WALL else mapgen.MAP_WALL)
+        flip = (time.perf_counter() - start)/flips
+        if not np.array_equal(map.get_blob_map(), mapgen.make_blob_tile_map(map.get_map())):
+            raise AssertionError("blob map out of date after set_tile at size {}".format(size))
+        print("{:>6} {:>10.3f} {:>10.3f} {:>12.3f} {:>12.4f}".format(size, cardinal*1000, blob*1000, legacy*1000, flip*1000))
+
+def bench_room_placement(sizes=((256, 300, 10), (1024, 2000, 10), (2048, 5000, 10), (2048, 8000, 10), (2048, 1000, 40))):
+    # non overlapping room placement, summed-area table vs scanning the mask for every candidate
+    # sizes are (map size, rooms, biggest room) triples
+    print("room placement (best of 3)")
+    print("{:>6} {:>6} {:>5} {:>8} {:>12} {:>10} {:>12}".format("size", "rooms", "max", "placed", "placed/sec", "rejected", "mask scan/s"))
+    for size, num_rooms, max_size in sizes:
+        stats = {}
+        def run():
+            stats.clear()
+            return mapgen.place_rooms(size, size, num_rooms, np.random.RandomState(0), max_size=max_size, stats=stats)
+        elapsed, rooms_list = time_call(run)
+
+        # no two rooms may touch
+        placed = np.array(rooms_list)
+        cover = np.zeros((size, size), dtype=int)
+        for x, y, width, height in placed:
+            cover[max(x - 1, 0):x + width + 1, max(y - 1, 0):y + height + 1] += 1
+        for x, y, width, height in placed:
+            if cover[x:x + width, y:y + height].max() > 1:
+                raise AssertionError("overlapping rooms at size {}".format(size))
+
+        scan, result = time_call(legacy_place_rooms, size, size, num_rooms, np.random.RandomState(0), 3, max_size, repeat=1)
+        rejected = 1 - stats["placed"]/stats["attempts"]
+        print("{:>6} {:>6} {:>5} {:>8} {:>12.0f} {:>9.1f}% {:>12.0f}".format(size, num_rooms, max_size, len(rooms_list), len(rooms_list)/elapsed, rejected*100, len(result)/scan))
+
+def bench_fov_rays(radii=(4, 8, 12), size=80, num_seeds=2, stride=9):
+    # ray table fov against shadowcasting: both have to agree on every origin of the corpus
+    # (generated floors of each kind plus random terrain), then time per call and table build time
+    print("fov engines, {}x{} floors".format(size, size))
+    floors = []
+    for generator in mapgen.GENERATORS:
+        for seed in range(num_seeds):
+            floors.append(floor.Floor(mapgen.Map(size, size, seed=seed, generator=generator), 0, []))
+    for seed in range(num_seeds):
+        the_map = mapgen.Map(size, size, seed=seed)
+        the_map.map = random_terrain(size, seed)
+        the_map.trans_map = mapgen.make_transparency_map(the_map.map)
+        floors.append(floor.Floor(the_map, 0, []))
+
+    print("{:>6} {:>8} {:>10} {:>12} {:>10} {:>8}".format("radius", "origins", "build (s)", "shadow (ms)", "rays (ms)", "speedup"))
+    for radius in radii:
+        build, table = time_call(fov.get_ray_table, radius, repeat=1)
+        shadow = rays = 0
+        origins = 0
+        for the_floor in floors:
+            for x, y in np.argwhere(the_floor.get_map().get_trans_map() == 0)[::stride]:
+                start = time.perf_counter()
+                expected = fov.calc_fov((x, y), radius, the_floor)
+                middle = time.perf_counter()
+                result = fov.calc_fov((x, y), radius, the_floor, engine="rays")
+                shadow += middle - start
+                rays += time.perf_counter() - middle
+                origins += 1
+                if not np.array_equal(expected, result):
+                    raise AssertionError("ray fov mismatch at radius {} origin {}".format(radius, (x, y)))
+        print("{:>6} {:>8} {:>10.2f} {:>12.3f} {:>10.3f} {:>7.1f}x".format(radius, origins, build, shadow/origins*1000,
+                                                                       rays/origins*1000, shadow/rays))
+
+def bench_fov_cache(size=80, turns=500, radius=8):
+    # a session of moves, waits, wall bumps and door flips through update_fov with and without the cache
+    # every cached result has to match a fresh calc_fov_window
+    print("fov cache over {} turns, radius {}".format(turns, radius))
+    the_floor = floor.create_floor(size, size, seed=0)
+    the_map = the_floor.get_map()
+    rng = np.random.RandomState(0)
+    moves = ((-1,-1), (-1,0), (-1,1), (0,-1), (0,1), (1,-1), (1,0), (1,1))
+    pos = the_map.get_entrance()
+    origins = []
+    flips = []
+    for turn in range(turns):
+        action = rng.rand()
+        if action < .4:
+            # waits, menus and ability selection, nothing moves
+            pass
+        elif action < .95:
+            # steps, bumping into a wall leaves the player where they were
+            dx, dy = moves[rng.randint(0, 8)]
+            if the_map.get_map()[pos[0] + dx, pos[1] + dy] != mapgen.MAP_WALL:
+                pos = (pos[0] + dx, pos[1] + dy)
+        else:
+            # a door next to the player opens or closes
+            dx, dy = moves[rng.randint(0, 8)]
+            flips.append((turn, pos[0] + dx, pos[1] + dy))
+        origins.append(pos)
+
+    def replay(calc):
+        # runs the session through calc, then puts the flipped tiles back
+        # windows are pasted into full maps to keep them, the cache reuses evicted ones
+        the_floor.get_fov_cache().clear()
+        original = the_map.get_map().copy()
+        results = []
+        flip = 0
+        elapsed = 0
+        for turn, origin in enumerate(origins):
+            while flip < len(flips) and flips[flip][0] == turn:
+                x, y = flips[flip][1:]
+                if origin != (x, y):
+                    the_map.set_tile(x, y, mapgen.MAP_DOOR if the_map.get_map()[x, y] == mapgen.MAP_WALL else mapgen.MAP_WALL)
+                flip += 1
+            start = time.perf_counter()
+            vis_window = calc(origin, radius, the_floor)
+            elapsed += time.perf_counter() - start
+            results.append(vis_window.to_map(original.shape))
+        for turn, x, y in flips:
+            the_map.set_tile(x, y, original[x, y])
+        return elapsed, results
+
+    uncached, expected = replay(fov.calc_fov_window)
+    cached, results = replay(fov.calc_fov_cached)
+    for turn in range(turns):
+        if not np.array_equal(expected[turn], results[turn]):
+            raise AssertionError("stale fov from cache on turn {}".format(turn))
+    stats = the_floor.get_fov_cache().get_stats()
+    print("{:>22} {:>10.4f}".format("uncached (ms/turn)", uncached/turns*1000))
+    print("{:>22} {:>10.4f}".format("cached (ms/turn)", cached/turns*1000))
+    print("{:>22} {:>10} / {} ({:.0%})".format("hits / misses", stats["hits"], stats["misses"], stats["hit_rate"]))
+
+def bench_fov_window(sizes=(80, 200, 500), radius=8, origins=200, engine="rays"):
+    # calc_fov's full map vis_map against a reused Fov_Window, on growing maps
+    # both have to agree, the window's cost shouldn't grow with the map
+    print("fov window, radius {}, {} engine".format(radius, engine))
+    print("{:>6} {:>14} {:>14} {:>8}".format("size", "full (ms)", "window (ms)", "speedup"))
+    for size in sizes:
+        the_map = mapgen.Map(size, size, seed=0)
+        the_map.map = random_terrain(size, 0)
+        the_map.trans_map = mapgen.make_transparency_map(the_map.map)
+        the_floor = floor.Floor(the_map, 0, [])
+        points = np.argwhere(the_map.get_trans_map() == 0)
+        points = points[np.random.RandomState(0).randint(0, len(points), origins)]
+
+        def full():
+            for x, y in points:
+                fov.calc_fov((x, y), radius, the_floor, engine=engine)
+
+        def windowed():
+            vis_window = None
+            for x, y in points:
+                vis_window = fov.calc_fov_window((x, y), radius, the_floor, out=vis_window, engine=engine)
+
+        for x, y in points[:20]:
+            if not np.array_equal(fov.calc_fov((x, y), radius, the_floor),
+                                  fov.calc_fov_window((x, y), radius, the_floor, engine=engine).to_map(the_map.get_map().shape)):
+                raise AssertionError("fov window mismatch at size {} origin {}".format(size, (x, y)))
+        full_time = time_call(full)[0]
+        window_time = time_call(windowed)[0]
+        print("{:>6} {:>14.3f} {:>14.3f} {:>7.1f}x".format(size, full_time/origins*1000, window_time/origins*1000,
+                                                           full_time/window_time))
+
+def bench_fov_many(counts=(20, 200, 2000), size=200, radius=8):
+    # monster perception: a calc_fov_window per monster against one calc_fov_many pass, with and without
+    # windows. all three have to agree on which monsters see the player
+    print("monster perception on a {}x{} floor, radius {} (ms per turn)".format(size, size, radius))
+    the_floor = floor.create_floor(size, size, seed=0)
+    walkable = np.argwhere(the_floor.get_map().get_trans_map() == 0)
+    player = tuple(walkable[len(walkable)//2])
+    print("{:>8} {:>12} {:>12} {:>14} {:>8}".format("monsters", "each (ms)", "many (ms)", "windows (ms)", "seeing"))
+    for count in counts:
+        origins = walkable[np.random.RandomState(count).randint(0, len(walkable), count)]
+
+        def each():
+            return np.array([fov.calc_fov_window(tuple(origin), radius, the_floor).is_visible(*player) for origin in origins])
+
+        each_time, expected = time_call(each, repeat=1)
+        many_time, (seen, _) = time_call(fov.calc_fov_many, origins, radius, the_floor, player)
+        windows_time, (_, windows) = time_call(fov.calc_fov_many, origins, radius, the_floor, None, True)
+        if not np.array_equal(expected, seen):
+            raise AssertionError("calc_fov_many disagrees with calc_fov_window for {} monsters".format(count))
+        if not np.array_equal(expected, [window.is_visible(*player) for window in windows]):
+            raise AssertionError("calc_fov_many windows disagree with calc_fov_window for {} monsters".format(count))
+        print("{:>8} {:>12.2f} {:>12.2f} {:>14.2f} {:>8}".format(count, each_time*1000, many_time*1000, windows_time*1000,
+                                                             int(seen.sum())))
+
+def bench_fov_incremental(size=80, observers=12, flips=300, radius=8, seed=0):
+    # doors and destructible walls flipping near a group of observers on dense random terrain. every flip
+    # refreshes all their fovs, from scratch against through the cache's per octant updates. both have to agree
+    print("incremental fov, {} observers, {} flips, radius {}".format(observers, flips, radius))
+    the_map = mapgen.Map(size, size, seed=seed)
+    the_map.map = random_terrain(size, seed)
+    the_map.trans_map = mapgen.make_transparency_map(the_map.map)
+    the_floor = floor.Floor(the_map, 0, [])
+    rng = np.random.RandomState(seed)
+    walkable = np.argwhere(the_map.get_trans_map() == 0)
+    points = [tuple(point) for point in walkable[rng.randint(0, len(walkable), observers)]]
+    # flipped tiles are all within range of some observer, never on one
+    tiles = []
+    while len(tiles) < flips:
+        x, y = np.array(points[rng.randint(0, observers)]) + rng.randint(-radius, radius + 1, 2)
+        if 0 <= x < size and 0 <= y < size and (x, y) not in points:
+            tiles.append((x, y))
+
+    def flip(x, y):
+        the_map.set_tile(x, y, mapgen.MAP_FLOOR if the_map.get_map()[x, y] == mapgen.MAP_WALL else mapgen.MAP_WALL)
+
+    full_time = 0
+    incremental_time = 0
+    for point in points:
+        fov.calc_fov_cached(point, radius, the_floor)
+    for x, y in tiles:
+        flip(x, y)
+        start = time.perf_counter()
+        expected = [fov.calc_fov_window(point, radius, the_floor) for point in points]
+        middle = time.perf_counter()
+        results = [fov.calc_fov_cached(point, radius, the_floor) for point in points]
+        full_time += middle - start
+        incremental_time += time.perf_counter() - middle
+        for point, window, vis_window in zip(points, expected, results):
+            if not np.array_equal(window.get_vis(), vis_window.get_vis()):
+                raise AssertionError("incremental fov mismatch at {} after flipping {}".format(point, (x, y)))
+    stats = the_floor.get_fov_cache().get_stats()
+    print("{:>26} {:>10.3f}".format("full (ms/flip)", full_time/flips*1000))
+    print("{:>26} {:>10.3f}".format("incremental (ms/flip)", incremental_time/flips*1000))
+    print("{:>26} {:>9.1f}x".format("speedup", full_time/incremental_time))
+    print("{:>26} {:>10.2f}".format("octants redone per update", stats["octants"]/max(stats["updates"], 1)))
+
+def bench_light(size=80, num_lights=(16, 64), flips=200, samples=10000):
+    # static lights baked into light_map: bake time, a calc_fov per light per turn, updates after a wall
+    # changes and sampling. the baked map has to match lighting every light from scratch
+    import light
+    print("static lights on {}x{} floors".format(size, size))
+    print("{:>7} {:>10} {:>14} {:>14} {:>12}".format("lights", "bake (ms)", "per turn (ms)", "update (ms)", "sample (us)"))
+    for count in num_lights:
+        the_floor = floor.Floor(mapgen.Map(size, size, seed=0), 0, [])
+        the_map = the_floor.get_map()
+        rng = np.random.RandomState(count)
+        walkable = np.argwhere(the_map.get_trans_map() == 0)
+        lights = [light.Light(x, y) for x, y in walkable[rng.randint(0, len(walkable), count)]]
+
+        def bake():
+            the_floor.light_field = light.Light_Field(the_floor)
+            the_floor.get_map().get_layer("light_map")[:] = 0
+            for each in lights:
+                the_floor.get_light_field().add_light(each)
+
+        def per_turn():
+            # what lighting costs without baking
+            total = np.zeros(the_map.get_map().shape, dtype=np.int32)
+            for each in lights:
+                window = fov.calc_fov_window(each.get_pos(), each.get_radius(), the_floor)
+                x0, y0, x1, y1 = window.get_bounds()
+                values = each.get_falloff()*(window.get_vis() == fov.FOV_VISIBLE)
+                cx0, cy0 = max(x0, 0), max(y0, 0)
+                cx1, cy1 = min(x1, size), min(y1, size)
+                total[cx0:cx1, cy0:cy1] += values[cx0 - x0:cx1 - x0, cy0 - y0:cy1 - y0]
+            return np.minimum(total, light.LIGHT_MAX)
+
+        bake_time = time_call(bake, repeat=1)[0]
+        turn_time = time_call(per_turn)[0]
+        tiles = [tuple(tile) for tile in rng.randint(1, size - 1, (flips, 2))]
+        start = time.perf_counter()
+        for x, y in tiles:
+            the_map.set_tile(x, y, mapgen.MAP_FLOOR if the_map.get_map()[x, y] == mapgen.MAP_WALL else mapgen.MAP_WALL)
+            the_floor.get_light_field().update()
+        update_time = (time.perf_counter() - start)/flips
+        if not np.array_equal(per_turn(), the_floor.get_light_field().get_light_map()):
+            raise AssertionError("baked light_map differs from lighting from scratch with {} lights".format(count))
+        xs, ys = rng.randint(0, size, (2, samples))
+        start = time.perf_counter()
+        for x, y in zip(xs, ys):
+            the_floor.get_light(x, y)
+        sample_time = (time.perf_counter() - start)/samples
+        print("{:>7} {:>10.2f} {:>14.3f} {:>14.3f} {:>12.3f}".format(count, bake_time*1000, turn_time*1000,
+                                                                 update_time*1000, sample_time*1e6))
+
+def bench_line(size=80, pairs=2000, reach=10):
+    # targeting lines: legacy_get_line with per point checks against cached integer lines checked with fancy
+    # indexing. lines have to join both ends one step at a time, and be the same tiles from either end.
+    # blocker counts only differ where the lines take other tiles, the rules are checked to be the same
+    print("line of sight, {} pairs up to {} tiles apart".format(pairs, reach))
+    the_floor = floor.create_floor(size, size, seed=0)
+    wall_map = the_floor.get_map().get_map()
+    entity_map = the_floor.get_entity_map()
+    rng = np.random.RandomState(0)
+    walkable = np.argwhere(wall_map != mapgen.MAP_WALL)
+    origins = walkable[rng.randint(0, len(walkable), pairs)]
+    targets = np.clip(origins + rng.randint(-reach, reach + 1, (pairs, 2)), 1, size - 2)
+
+    for a, b in zip(origins, targets):
+        xs, ys = fov.trace_line(a, b)
+        if (xs[0], ys[0]) != tuple(a) or (xs[-1], ys[-1]) != tuple(b) or np.any(np.maximum(abs(np.diff(xs)), abs(np.diff(ys))) != 1):
+            raise AssertionError("broken line from {} to {}".format(tuple(a), tuple(b)))
+        back_xs, back_ys = fov.trace_line(b, a)
+        if not np.array_equal(xs, back_xs[::-1]) or not np.array_equal(ys, back_ys[::-1]):
+            raise AssertionError("line from {} to {} isn't symmetric".format(tuple(a), tuple(b)))
+
+    def legacy():
+        return [legacy_count_blockers(a, b, wall_map, entity_map) for a, b in zip(origins, targets)]
+
+    def cached():
+        return [int(fov.get_line_blockers(a, b, the_floor).sum()) for a, b in zip(origins, targets)]
+
+    legacy_time, expected = time_call(legacy)
+    cached_time, result = time_call(cached)
+    # the blocker rules have to be the same as the legacy ones, counted along the same tiles
+    for a, b, count in zip(origins, targets, result):
+        xs, ys = fov.trace_line(a, b)
+        if legacy_count_blockers(a, b, wall_map, entity_map, list(zip(xs - a[0], ys - a[1]))) != count:
+            raise AssertionError("blockers from {} to {} aren't counted like the legacy line".format(tuple(a), tuple(b)))
+    # the legacy line rounds halves to even and depends on direction, so some lines take other tiles
+    other_tiles = 0
+    for a, b in zip(origins, targets):
+        xs, ys = fov.trace_line(a, b)
+        old = set((int(a[0] + x), int(a[1] + y)) for x, y in legacy_get_line(b[0] - a[0], b[1] - a[1]))
+        other_tiles += old != set(zip(xs.tolist(), ys.tolist()))
+    differ = sum(old != new for old, new in zip(expected, result))
+    print("{:>24} {:>10.2f}".format("legacy (us/line)", legacy_time/pairs*1e6))
+    print("{:>24} {:>10.2f}".format("cached (us/line)", cached_time/pairs*1e6))
+    print("{:>24} {:>10}".format("lines on other tiles", other_tiles))
+    print("{:>24} {:>10}".format("blocker counts differ", differ))
+    print("{:>24} {:>10}".format("line tables", len(fov.LINE_TABLES)))
+
+def make_fov_suite_maps(size=48):
+    # fixed maps for the fov suite, walled in. changing them means regenerating FOV_GOLDEN
+    maps = {}
+    open_room = np.full((size, size), mapgen.MAP_FLOOR)
+    open_room[[0, -1], :] = mapgen.MAP_WALL
+    open_room[:, [0, -1]] = mapgen.MAP_WALL
+    maps["open"] = open_room
+
+    # scattered single tile pillars
+    rng = np.random.RandomState(1)
+    pillars = open_room.copy()
+    pillars[rng.rand(size, size) < .08] = mapgen.MAP_WALL
+    maps["pillars"] = pillars
+
+    # one tile wide corridors crossing solid rock
+    rng = np.random.RandomState(2)
+    corridors = np.full((size, size), mapgen.MAP_WALL)
+    for i in range(20):
+        at = rng.randint(1, size - 1)
+        start, end = sorted(rng.randint(1, size - 1, 2))
+        if i % 2:
+            corridors[start:end + 1, at] = mapgen.MAP_FLOOR
+        else:
+            corridors[at, start:end + 1] = mapgen.MAP_FLOOR
+    maps["corridors"] = corridors
+
+    # diagonal walls at a few slopes, with gaps
+    rng = np.random.RandomState(3)
+    diagonal = open_room.copy()
+    for i in range(12):
+        x, y = rng.randint(1, size - 1, 2)
+        dx, dy = ((1, 1), (1, -1), (2, 1), (1, 2), (2, -1), (1, -2))[i % 6]
+        steps = rng.randint(4, 10)
+        xs, ys = fov.get_line_offsets(dx*steps, dy*steps)
+        keep = (x + xs > 0) & (x + xs < size - 1) & (y + ys > 0) & (y + ys < size - 1) & (rng.rand(len(xs)) > .1)
+        diagonal[x + xs[keep], y + ys[keep]] = mapgen.MAP_WALL
+    maps["diagonal"] = diagonal
+
+    maps["random"] = random_terrain(size, 4)
+    return maps
+
+# sha256 of the packed visibility of every fov window over each suite map's clear tiles, by (map, radius)
+# from calc_fov_shadowcast. regenerate with bench_fov_suite(golden=None) if the maps or fov rules change on purpose
+FOV_GOLDEN = {
+    ('open', 2): 'e7224e2aa76348473fa22bf078ec439047095cfe261ba3a64b504074dc5759fc',
+    ('open', 4): 'dda457510de2536e4ba3e2d1f022c9d5050314391e0a0167321b60cb2f3d1b5e',
+    ('open', 8): 'dc630f5edc82be882b5af8fd884045f444f9821169a8efe965b35bd09f97ceb3',
+    ('open', 12): '39b4bfe269c79763572d613af5a761a918169bcadf3f9fe733563044a309c26b',
+    ('pillars', 2): '23aebf81251ddad77f2ca70d981d4a932f9efd5d77e66b388a152045d1d4c1b3',
+    ('pillars', 4): 'd9efba75f33f7d6eeeacd47fadb550834393dd4078c5b90f7e95eddccc5812fb',
+    ('pillars', 8): '85db171ea663e606f0fbd76f597fc981e145aeb2e9d206d01e54a4c840703c9b',
+    ('pillars', 12): 'ef7defebcddb6d0fc84d82edae2e0dcdc206d3e02e3b2ad13fac3a175aec3c28',
+    ('corridors', 2): '72dfbb77a29a8f2092bcf67435908234c59189e02f29c73bef9586a359abd84c',
+    ('corridors', 4): 'a179024cc69659a4678400179df9be786c94251e2dc0b270159b8784b424b6cc',
+    ('corridors', 8): 'e2797681111e32ef3573f5bde362e5bd84242cd70a60a66565aada189b8d3487',
+    ('corridors', 12): '3343211e76a8644cc3fa784f2f49341f555dc9ac16170b7e5b613986a4ee0cd4',
+    ('diagonal', 2): '0252b82437410ca11506576ba42638d0350e9bdb0132f70d75ac658c76ac9f62',
+    ('diagonal', 4): '34b049b8b82ea8f59a8dbfcfbf7ba317f1697c85737108fb014da003078ac44e',
+    ('diagonal', 8): '3e91ac9d2dbdd365a6e991db2ea721c7d8652e13f822112686d4c5f5399182af',
+    ('diagonal', 12): '7afa0735e46a3fccd84f657f8183028245bc2eea434d4a93e16884c98d5bd9fb',
+    ('random', 2): 'd38649b915109ff6508887fed7adcc6a2d7ea0217ef78eb3640a3396f4216147',
+    ('random', 4): '8ed36f1607a1278eb936d797b90d1cfe6fd536aa23b54ec9ea01e185202c0a52',
+    ('random', 8): '826cfc1b58093abb1605bf6eedaf7581b8a90503b1c4f63f8f944c51a62539a7',
+    ('random', 12): '84dc42bbb8e83f4f3d0428f78a93dbfdf3ade76d88c74cbed80e7ba6eb41fceb',
+}
+
+def bench_fov_suite(radii=(2, 4, 8, 12), size=48, golden=FOV_GOLDEN):
+    # every fov engine on the suite maps: each has to match the golden output, then per call latency and
+    # tiles per second, counting every tile of the (2*radius+1) square a call covers. engines in
+    # fov.FOV_APPROXIMATE are only timed, and marked with a *
+    # golden None prints a fresh FOV_GOLDEN from shadowcasting instead of checking
+    import hashlib
+    suite_maps = make_fov_suite_maps(size)
+    engines = ["shadowcast"] + [engine for engine in fov.FOV_ENGINES if engine != "shadowcast"]
+    if golden is None:
+        print("FOV_GOLDEN = {")
+        engines = ["shadowcast"]
+    else:
+        print("fov suite, {}x{} maps".format(size, size))
+        print("{:>10} {:>6} {:>12} {:>8} {:>10} {:>10} {:>10} {:>12}".format("map", "radius", "engine", "calls",
+                                                                     "p50 (us)", "p90 (us)", "p99 (us)", "tiles/s"))
+    for name, terrain in suite_maps.items():
+        the_map = mapgen.Map(size, size, seed=0)
+        the_map.map = terrain
+        the_map.trans_map = mapgen.make_transparency_map(terrain)
+        the_floor = floor.Floor(the_map, 0, [])
+        origins = [tuple(origin) for origin in np.argwhere(the_map.get_trans_map() == 0)]
+        for radius in radii:
+            reference = None
+            for engine in engines:
+                fov.calc_fov_window(origins[0], radius, the_floor, engine=engine) # builds any tables first
+                digest = hashlib.sha256()
+                latencies = []
+                windows = []
+                for origin in origins:
+                    start = time.perf_counter()
+                    window = fov.calc_fov_window(origin, radius, the_floor, engine=engine)
+                    latencies.append(time.perf_counter() - start)
+                    visible = window.get_vis() == fov.FOV_VISIBLE
+                    digest.update(np.packbits(visible).tobytes())
+                    windows.append(visible)
+                if golden is None:
+                    print("    ({!r}, {}): {!r},".format(name, radius, digest.hexdigest()))
+                    continue
+                if reference is None:
+                    reference = windows
+                if engine in fov.FOV_APPROXIMATE:
+                    engine += "*"
+                elif digest.hexdigest() != golden.get((name, radius)):
+                    # name the first origin that differs from shadowcasting, if any does
+                    for origin, expected, result in zip(origins, reference, windows):
+                        if not np.array_equal(expected, result):
+                            raise AssertionError("{} fov differs from shadowcast on {} at radius {} origin {}".format(
+                                engine, name, radius, origin))
+                    raise AssertionError("{} fov differs from FOV_GOLDEN on {} at radius {}".format(engine, name, radius))
+                latencies = np.array(latencies)*1e6
+                p50, p90, p99 = np.percentile(latencies, (50, 90, 99))
+                tiles = len(origins)*(radius*2 + 1)**2
+                print("{:>10} {:>6} {:>12} {:>8} {:>10.1f} {:>10.1f} {:>10.1f} {:>12.0f}".format(
+                    name, radius, engine, len(origins), p50, p90, p99, tiles/(latencies.sum()/1e6)))
+    if golden is None:
+        print("}")
+
+def bench_fov_cone(size=80, arcs=(360, 180, 120, 90, 45), origins=500, monsters=2000, radius=8):
+    # view cones: a cone only computes the octants it reaches, so it should cost about its share of a full fov.
+    # every engine's cones have to match its full fov masked to the cone
+    print("view cones on a {}x{} floor, radius {}".format(size, size, radius))
+    the_floor = floor.create_floor(size, size, seed=0)
+    shape = the_floor.get_map().get_map().shape
+    rng = np.random.RandomState(0)
+    walkable = np.argwhere(the_floor.get_map().get_trans_map() == 0)
+    points = [tuple(point) for point in walkable[rng.randint(0, len(walkable), origins)]]
+    facings = rng.randint(0, 8, origins)*45.0
+    crowd = walkable[rng.randint(0, len(walkable), monsters)]
+    crowd_facings = rng.randint(0, 8, monsters)*45.0
+    player = tuple(walkable[len(walkable)//2])
+
+    for point, facing in zip(points[:50], facings):
+        for engine in fov.FOV_ENGINES:
+            full = fov.calc_fov(point, radius, the_floor, engine=engine)
+            for arc in arcs:
+                cone = fov.get_cone_mask(shape, point, facing, arc)
+                if not np.array_equal(fov.calc_fov(point, radius, the_floor, engine=engine, facing=facing, arc=arc), full*cone):
+                    raise AssertionError("{} cone fov mismatch at {} facing {} arc {}".format(engine, point, facing, arc))
+
+    print("{:>5} {:>8} {:>16} {:>12} {:>22}".format("arc", "octants", "shadowcast (us)", "rays (us)",
+                                                   "{} monsters (ms)".format(monsters)))
+    for arc in arcs:
+        times = []
+        for engine in ("shadowcast", "rays"):
+            def run():
+                vis_window = None
+                for point, facing in zip(points, facings):
+                    vis_window = fov.calc_fov_window(point, radius, the_floor, out=vis_window, engine=engine,
+                                                     facing=facing, arc=arc)
+            times.append(time_call(run)[0]/origins*1e6)
+        many_time = time_call(fov.calc_fov_many, crowd, radius, the_floor, player, False, crowd_facings, arc)[0]
+        octants = np.mean([len(fov.get_cone_octants(facing, arc)) for facing in facings])
+        print("{:>5} {:>8.1f} {:>16.1f} {:>12.1f} {:>22.2f}".format(arc, octants, times[0], times[1], many_time*1000))
+
+def bench_backends(size=80, turns=100, chasers=(5, 20), radius=8):
+    # per turn cost of the player's fov and a path for every chasing monster, on each fov engine and path
+    # backend available. paths from every backend have to be walkable, end on the player and cost the same
+    import ai
+    import entity
+    print("backends on a {}x{} floor, radius {} (ms per turn)".format(size, size, radius))
+    if ai.tcod is None:
+        print("tcod isn't installed, only the pure python backends run. monsters take greedy steps without it")
+    the_floor = floor.create_floor(size, size, seed=0)
+    the_map = the_floor.get_map()
+    rng = np.random.RandomState(0)
+    walkable = [tuple(tile) for tile in np.argwhere(the_map.get_map() != mapgen.MAP_WALL)]
+    # a walk for the player, stepping to a random walkable neighbour each turn
+    walk = [walkable[len(walkable)//2]]
+    for turn in range(turns - 1):
+        x, y = walk[-1]
+        steps = [(x + dx, y + dy) for dx, dy in regions.NEIGHBORS if the_map.get_map()[x + dx, y + dy] != mapgen.MAP_WALL]
+        walk.append(steps[rng.randint(0, len(steps))])
+    path_backends = ["python"] + (["tcod"] if ai.tcod is not None else [])
+
+    def path_cost(start, path):
+        costs = ai.make_path_costs(the_floor)
+        total = 0
+        for (x0, y0), (x1, y1) in zip([start] + path[:-1], path):
+            if max(abs(x1 - x0), abs(y1 - y0)) != 1 or costs[x1, y1] == 0:
+                raise AssertionError("broken path from {} through {}".format(start, (x1, y1)))
+            total += costs[x1, y1]*(ai.PATH_DIAGONAL if x1 != x0 and y1 != y0 else ai.PATH_CARDINAL)
+        return total
+
+    print("{:>8} {:>12} {:>10} {:>10} {:>10}".format("chasers", "fov", "path", "fov (ms)", "path (ms)"))
+    for count in chasers:
+        monsters = [entity.Entity(x, y, 0) for x, y in (walkable[i] for i in rng.randint(0, len(walkable), count))]
+        for engine in fov.FOV_ENGINES:
+            fov_time = time_call(lambda: [fov.calc_fov_window(pos, radius, the_floor, engine=engine) for pos in walk])[0]
+            for backend in path_backends:
+                def chase():
+                    return [[ai.find_path(monster, the_floor, pos, backend) for monster in monsters] for pos in walk[::10]]
+                path_time, paths = time_call(chase, repeat=1)
+                costs = [[path_cost(monster.get_pos(), path) if path else 0 for monster, path in zip(monsters, turn)]
+                         for turn in paths]
+                if backend == path_backends[0]:
+                    expected = costs
+                elif costs != expected:
+                    raise AssertionError("{} paths cost differently from python paths".format(backend))
+                print("{:>8} {:>12} {:>10} {:>10.3f} {:>10.3f}".format(count, engine, backend, fov_time/turns*1000,
+                                                                      path_time/len(paths)*1000))
+
+def bench_vis_index(sizes=(40, 80, 120), radius=8, lookups=2000):
+    # the precomputed visibility index: build time (in a fresh directory) and reload time, its size, then
+    # fov and "can a see b" from it against computing them. every lookup has to match the computed fov
+    import tempfile
+    import mapcache
+    import visindex
+    print("{:>6} {:>8} {:>10} {:>10} {:>10} {:>10} {:>10} {:>10} {:>10}".format(
+        "size", "tiles", "build (s)", "load (ms)", "kbytes", "fov (us)", "index (us)", "see (us)", "bit (us)"))
+    with tempfile.TemporaryDirectory() as path:
+        cache = mapcache.Map_Cache(path)
+        for size in sizes:
+            plain = floor.create_floor(size, size, seed=0)
+            indexed = floor.create_floor(size, size, seed=0)
+            start = time.perf_counter()
+            index = indexed.enable_vis_index(cache)
+            index.wait()
+            build = time.perf_counter() - start
+            reloaded = floor.create_floor(size, size, seed=0)
+            start = time.perf_counter()
+            reloaded.enable_vis_index(cache).wait()
+            load = time.perf_counter() - start
+
+            rng = np.random.RandomState(size)
+            walkable = np.argwhere(plain.get_map().get_map() != mapgen.MAP_WALL)
+            origins = [tuple(tile) for tile in walkable[rng.randint(0, len(walkable), lookups)]]
+            targets = [(x + dx, y + dy) for (x, y), (dx, dy) in zip(origins, rng.randint(-radius, radius + 1, (lookups, 2)))]
+            fov_time, expected = time_call(lambda: [fov.calc_fov_window(point, radius, plain) for point in origins])
+            index_time, results = time_call(lambda: [fov.calc_fov_window(point, radius, indexed) for point in origins])
+            for point, a, b in zip(origins, expected, results):
+                if not np.array_equal(a.get_vis(), b.get_vis()):
+                    raise AssertionError("index fov differs at {} on size {}".format(point, size))
+            see_time, seen = time_call(lambda: [plain_window.is_visible(*target) for plain_window, target in zip(expected, targets)])
+            see_time += fov_time
+            bit_time, bits = time_call(lambda: [index.can_see(point, target) for point, target in zip(origins, targets)])
+            if bits != seen:
+                raise AssertionError("index can_see differs on size {}".format(size))
+            print("{:>6} {:>8} {:>10.3f} {:>10.3f} {:>10.1f} {:>10.2f} {:>10.2f} {:>10.2f} {:>10.2f}".format(
+                size, len(walkable), build, load*1000, index.nbytes()/1024, fov_time/lookups*1e6,
+                index_time/lookups*1e6, see_time/lookups*1e6, bit_time/lookups*1e6))
+
+class Null_Screen:
+    # stands in for a curses window, counts addstr calls and characters
+    def __init__(self):
+        self.calls = 0
+        self.chars = 0
+
+    def addstr(self, y, x, text, attr=0):
+        self.calls += 1
+        self.chars += len(text)
+
+def bench_terminal(width=200, height=60, steps=200):
+    # terminal view of a walk across a floor: composing the view, and writing only changed cells
+    import terminal
+    import entity
+    print("terminal view {}x{} (ms per frame)".format(width, height))
+    the_floor = floor.create_floor(80, 80, seed=0)
+    player = entity.Entity(0, 0, entity.PLAYER_SPRITE_INDEX, "You")
+    renderer = terminal.Terminal_Renderer(width, height)
+    attrs = [0]*7
+    screen = Null_Screen()
+
+    # step through the walkable tiles in order, mostly one tile at a time
+    xs, ys = np.nonzero(the_floor.get_map().get_map() != mapgen.MAP_WALL)
+    path = list(zip(xs, ys))[:steps]
+    compose_time = 0
+    draw_time = 0
+    vis_window = None
+    for x, y in path:
+        player.set_pos(x, y)
+        vis_window = fov.calc_fov_window((x, y), 8, the_floor, out=vis_window)
+        the_floor.get_map().update_revealed_map(vis_window.get_vis(), vis_window.get_bounds(), vis_window.get_offset())
+        start = time.perf_counter()
+        renderer.compose(the_floor, vis_window, player)
+        composed = time.perf_counter()
+        renderer.draw(screen, attrs)
+        draw_time += time.perf_counter() - composed
+        compose_time += composed - start
+
+    changed_cells = screen.chars/len(path)
+
+    def full_draw():
+        renderer.invalidate()
+        return renderer.draw(screen, attrs)
+    full, result = time_call(full_draw)
+    print("{:>22} {:>10.4f}".format("compose", compose_time/len(path)*1000))
+    print("{:>22} {:>10.4f}".format("draw changed cells", draw_time/len(path)*1000))
+    print("{:>22} {:>10.4f}".format("draw full view", full*1000))
+    print("{:>22} {:>10.1f} of {}".format("cells per frame", changed_cells, width*height))
+
+BENCHMARKS = {
+    "terrain": bench_terrain_layers,
+    "batch": bench_generate_many,
+    "chunked": bench_chunked_map,
+    "tiles": bench_tile_store,
+    "carving": bench_carving,
+    "regions": bench_regions,
+    "generators": bench_generators,
+    "autotile": bench_autotile,
+    "placement": bench_room_placement,
+    "terminal": bench_terminal,
+    "fov": bench_fov_rays,
+    "fovcache": bench_fov_cache,
+    "fovwindow": bench_fov_window,
+    "fovmany": bench_fov_many,
+    "fovincremental": bench_fov_incremental,
+    "light": bench_light,
+    "line": bench_line,
+    "fovsuite": bench_fov_suite,
+    "fovcone": bench_fov_cone,
+    "backends": bench_backends,
+    "visindex": bench_vis_index,
+}
+
+def main(argv):
+    names = argv if argv else list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print("unknown benchmark {}, choose from: {}".format(name, ", ".join(BENCHMARKS)))
+            return 1
+    for name in names:
+        BENCHMARKS[name]()
+        print()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,348 @@
+import numpy as np
+import random as rand
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+import mapgen
+import regions
+import tiles
+
+CHUNK_SIZE = 256
+
+# layers kept for every chunk, stacked in one uint8 array of shape (len(CHUNK_LAYERS), size, size) per chunk
+CHUNK_LAYERS = ("map", "trans_map", "masked_map", "revealed_map")
+# value used for tiles outside the map when reading windows
+CHUNK_FILL = {"map": mapgen.MAP_WALL, "trans_map": 1, "masked_map": 15, "revealed_map": 0}
+
+class Chunked_Map:
+    # map for floors too big to keep in memory
+    # the map is split into chunk_size square chunks, each stored as its own memory mapped .npy file.
+    # at most max_chunks chunks are mapped at once (least recently used are dropped first), so memory use
+    # is bounded by max_chunks no matter how big the map is.
+    # work is done on windows around a point, see get_view, which behave like a regular mapgen.Map
+    def __init__(self, x, y, path=None, chunk_size=CHUNK_SIZE, max_chunks=64):
+        # x, y - int, map dimensions
+        # path - directory for chunk files. None makes a temp directory that's removed by close()
+        self.x = x
+        self.y = y
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.owns_path = path is None
+        self.path = tempfile.mkdtemp(prefix="chunkmap-") if path is None else path
+        os.makedirs(self.path, exist_ok=True)
+        self.chunks = OrderedDict() # (cx, cy) -> memory mapped chunk array
+        self.entrance = None
+        self.exit = None
+
+    def shape(self):
+        return self.x, self.y
+
+    def num_chunks(self):
+        # number of chunks along x and y
+        return -(-self.x // self.chunk_size), -(-self.y // self.chunk_size)
+
+    def get_chunk_file(self, cx, cy):
+        return os.path.join(self.path, "chunk_{}_{}.npy".format(cx, cy))
+
+    def get_chunk(self, cx, cy):
+        # returns the (layers, chunk_size, chunk_size) array for chunk cx, cy, mapping it in if needed
+        key = (cx, cy)
+        if key in self.chunks:
+            self.chunks.move_to_end(key)
+            return self.chunks[key]
+
+        file_name = self.get_chunk_file(cx, cy)
+        if os.path.exists(file_name):
+            chunk = np.load(file_name, mmap_mode="r+")
+        else:
+            chunk = np.lib.format.open_memmap(file_name, mode="w+", dtype=np.uint8, shape=(len(CHUNK_LAYERS), self.chunk_size, self.chunk_size))
+            for i, layer in enumerate(CHUNK_LAYERS):
+                chunk[i] = CHUNK_FILL[layer]
+        self.chunks[key] = chunk
+
+        # drop least recently used chunks past the budget
+        while len(self.chunks) > self.max_chunks:
+            old_key, old_chunk = self.chunks.popitem(last=False)
+            old_chunk.flush()
+        return chunk
+
+    def page_in(self, x, y, radius):
+        # maps in every chunk within radius tiles of x, y
+        x0, y0, x1, y1 = self.clip_window(x - radius, y - radius, x + radius + 1, y + radius + 1)
+        for cx in range(x0 // self.chunk_size, (x1 - 1) // self.chunk_size + 1):
+            for cy in range(y0 // self.chunk_size, (y1 - 1) // self.chunk_size + 1):
+                self.get_chunk(cx, cy)
+
+    def clip_window(self, x0, y0, x1, y1):
+        return max(x0, 0), max(y0, 0), min(x1, self.x), min(y1, self.y)
+
+    def read(self, layer, x0, y0, x1, y1):
+        # returns a copy of layer over [x0, x1) x [y0, y1). tiles off the map get the layer's fill value
+        index = CHUNK_LAYERS.index(layer)
+        window = np.full((x1 - x0, y1 - y0), CHUNK_FILL[layer], dtype=np.uint8)
+        for cx, cy, chunk_slice, window_slice in self.iter_window(x0, y0, x1, y1):
+            window[window_slice] = self.get_chunk(cx, cy)[index][chunk_slice]
+        return window
+
+    def write(self, layer, x0, y0, values):
+        # writes values into layer with its top left corner at x0, y0. parts off the map are ignored
+        index = CHUNK_LAYERS.index(layer)
+        x1 = x0 + values.shape[0]
+        y1 = y0 + values.shape[1]
+        for cx, cy, chunk_slice, window_slice in self.iter_window(x0, y0, x1, y1):
+            self.get_chunk(cx, cy)[index][chunk_slice] = values[window_slice]
+
+    def iter_window(self, x0, y0, x1, y1):
+        # yields (cx, cy, slice into chunk, slice into window) for every chunk overlapping the window
+        cx0, cy0, cx1, cy1 = self.clip_window(x0, y0, x1, y1)
+        if cx0 >= cx1 or cy0 >= cy1:
+            return
+        size = self.chunk_size
+        for cx in range(cx0 // size, (cx1 - 1) // size + 1):
+            for cy in range(cy0 // size, (cy1 - 1) // size + 1):
+                # overlap of the chunk and the window in map coordinates
+                ox0 = max(cx0, cx*size)
+                ox1 = min(cx1, (cx + 1)*size)
+                oy0 = max(cy0, cy*size)
+                oy1 = min(cy1, (cy + 1)*size)
+                chunk_slice = (slice(ox0 - cx*size, ox1 - cx*size), slice(oy0 - cy*size, oy1 - cy*size))
+                window_slice = (slice(ox0 - x0, ox1 - x0), slice(oy0 - y0, oy1 - y0))
+                yield cx, cy, chunk_slice, window_slice
+
+    def make_masked_window(self, x0, y0, x1, y1):
+        # masked_map of [x0, x1) x [y0, y1) worked out from the terrain, tiles on the map border are 15 like mapgen.Map
+        terrain = self.read("map", x0 - 1, y0 - 1, x1 + 1, y1 + 1)
+        masked_map = mapgen.make_wall_tile_map(terrain)[1:-1,1:-1].astype(np.uint8)
+        xs = np.arange(x0, x1)
+        ys = np.arange(y0, y1)
+        masked_map[(xs == 0) | (xs == self.x - 1), :] = 15
+        masked_map[:, (ys == 0) | (ys == self.y - 1)] = 15
+        return masked_map
+
+    def make_blob_window(self, x0, y0, x1, y1):
+        # blob tiles of [x0, x1) x [y0, y1), see mapgen.make_blob_tile_map. off the map reads as wall
+        return mapgen.make_blob_tile_map(self.read("map", x0 - 1, y0 - 1, x1 + 1, y1 + 1))[1:-1,1:-1]
+
+    def get_view(self, x, y, radius):
+        # returns a Map_View of the (2*radius+1) square window around x, y
+        self.page_in(x, y, radius)
+        return Map_View(self, x - radius, y - radius, x + radius + 1, y + radius + 1)
+
+    def get_entrance(self):
+        return self.entrance
+
+    def get_exit(self):
+        return self.exit
+
+    def flush(self):
+        for chunk in self.chunks.values():
+            chunk.flush()
+
+    def close(self):
+        # unmaps everything, removes the chunk files if the directory was made by this map
+        self.flush()
+        self.chunks = OrderedDict()
+        if self.owns_path:
+            shutil.rmtree(self.path, ignore_errors=True)
+
+    def resident_bytes(self):
+        # bytes of chunk data currently mapped in
+        return sum(chunk.nbytes for chunk in self.chunks.values())
+
+class Map_View:
+    # window of a Chunked_Map with the same accessors as mapgen.Map, in window coordinates
+    # layers are copies in a tile store of the window's size, call write_back() to save changes to the revealed map.
+    # set_tile writes terrain changes straight through to the chunks, other views of the same tiles don't see them.
+    # regions only cover the window, tiles joined by a path that leaves the window aren't in the same region
+    def __init__(self, chunked_map, x0, y0, x1, y1):
+        self.chunked_map = chunked_map
+        self.offset = (x0, y0)
+        self.x = x1 - x0
+        self.y = y1 - y0
+        self.tiles = tiles.Tile_Store(self.x, self.y)
+        for layer in CHUNK_LAYERS:
+            self.tiles.set_layer(layer, chunked_map.read(layer, x0, y0, x1, y1))
+        self.map = self.tiles.get_layer("map")
+        self.trans_map = self.tiles.get_layer("trans_map")
+        self.masked_map = self.tiles.get_layer("masked_map")
+        self.revealed_map = self.tiles.get_bool_layer("revealed_map")
+        self.newly_revealed = (np.zeros(0, dtype=int), np.zeros(0, dtype=int))
+        # bumped whenever set_tile changes trans_map, see mapgen.Map
+        self.trans_version = 0
+        self.trans_changes = []
+        # made on first use, see get_regions and get_blob_map
+        self.regions = None
+        self.blob_map = None
+
+    def get_map(self):
+        return self.map
+
+    def get_trans_map(self):
+        return self.trans_map
+
+    def get_trans_version(self):
+        return self.trans_version
+
+    def get_trans_changes(self, since):
+        # same as mapgen.Map.get_trans_changes
+        first = self.trans_version - len(self.trans_changes)
+        if since < first:
+            return None
+        return self.trans_changes[since - first:]
+
+    def get_masked_map(self):
+        return self.masked_map
+
+    def get_revealed_map(self):
+        return self.revealed_map
+
+    def update_revealed_map(self, vis_map, bounds=None, offset=(0, 0)):
+        # same as mapgen.Map.update_revealed_map, in window coordinates
+        self.newly_revealed = mapgen.update_revealed_window(self.revealed_map, vis_map, bounds, offset)
+        return self.newly_revealed
+
+    def get_newly_revealed(self):
+        return self.newly_revealed
+
+    def get_blob_map(self):
+        # 8 neighbor wall tile index of every tile, tiles past the window edge are read from the chunks
+        if self.blob_map is None:
+            x0, y0 = self.offset
+            self.blob_map = self.chunked_map.make_blob_window(x0, y0, x0 + self.x, y0 + self.y)
+        return self.blob_map
+
+    def get_regions(self):
+        # regions.Region_Index of the window. chunks don't keep rooms, so every region of it is a hall
+        if self.regions is None:
+            self.regions = regions.Region_Index(self.map, [])
+        return self.regions
+
+    def same_region(self, a, b):
+        # True if there is a walkable path between tiles a and b inside the window
+        return self.get_regions().same_region(a, b)
+
+    def set_tile(self, x, y, value):
+        # changes the terrain at x, y in window coordinates, in the view and in the chunks, and updates the
+        # layers that depend on it. x, y must be on the map
+        gx, gy = self.to_global(x, y)
+        was_walkable = self.map[x, y] != mapgen.MAP_WALL
+        self.map[x, y] = value
+        self.chunked_map.write("map", gx, gy, np.full((1, 1), value, dtype=np.uint8))
+        if self.trans_map[x, y] != (value == mapgen.MAP_WALL):
+            self.trans_map[x, y] = value == mapgen.MAP_WALL
+            self.chunked_map.write("trans_map", gx, gy, np.full((1, 1), value == mapgen.MAP_WALL, dtype=np.uint8))
+            self.trans_version += 1
+            self.trans_changes.append((x, y))
+            if len(self.trans_changes) > mapgen.TRANS_CHANGE_LIMIT*2:
+                del self.trans_changes[:-mapgen.TRANS_CHANGE_LIMIT]
+
+        # wall tiles of the tile and its neighbors, in the chunks and the part of them inside the window
+        x0 = max(gx - 1, 0)
+        y0 = max(gy - 1, 0)
+        x1 = min(gx + 2, self.chunked_map.x)
+        y1 = min(gy + 2, self.chunked_map.y)
+        masked_map = self.chunked_map.make_masked_window(x0, y0, x1, y1)
+        self.chunked_map.write("masked_map", x0, y0, masked_map)
+        lx0, ly0 = self.to_local(x0, y0)
+        lx1, ly1 = self.to_local(x1, y1)
+        inner = (slice(max(lx0, 0), min(lx1, self.x)), slice(max(ly0, 0), min(ly1, self.y)))
+        window_inner = (slice(inner[0].start - lx0, inner[0].stop - lx0), slice(inner[1].start - ly0, inner[1].stop - ly0))
+        self.masked_map[inner] = masked_map[window_inner]
+        if self.blob_map is not None:
+            self.blob_map[inner] = self.chunked_map.make_blob_window(x0, y0, x1, y1)[window_inner]
+
+        if self.regions is not None and was_walkable != (value != mapgen.MAP_WALL):
+            self.regions.set_walkable(x, y, value != mapgen.MAP_WALL)
+
+    def get_layer(self, name):
+        return self.tiles.get_layer(name)
+
+    def memory_usage(self):
+        usage = self.tiles.memory_usage()
+        if self.regions is not None:
+            usage.update(self.regions.memory_usage())
+        if self.blob_map is not None:
+            usage["blob_map"] = self.blob_map.nbytes
+        return usage
+
+    def shape(self):
+        return self.x, self.y
+
+    def get_offset(self):
+        return self.offset
+
+    def to_local(self, x, y):
+        # map coordinates to window coordinates
+        return x - self.offset[0], y - self.offset[1]
+
+    def to_global(self, x, y):
+        # window coordinates to map coordinates
+        return x + self.offset[0], y + self.offset[1]
+
+    def write_back(self):
+        self.chunked_map.write("revealed_map", self.offset[0], self.offset[1], self.revealed_map)
+
+def make_chunked_map(x, y, seed=0, path=None, chunk_size=CHUNK_SIZE, max_chunks=64):
+    # generates a Chunked_Map one chunk at a time, only ever holding a few chunks in memory
+    # each chunk gets its own mapgen.make_map layout, and a hall along the middle row and column
+    # of every chunk joins it to its neighbors. entrance is in the first chunk, exit in the last.
+    # chunk_size should be a good deal bigger than 20 to leave room for make_map's layout
+    chunked_map = Chunked_Map(x, y, path, chunk_size, max_chunks)
+    num_cx, num_cy = chunked_map.num_chunks()
+    size = chunk_size
+
+    # terrain, chunk by chunk
+    for cx in range(num_cx):
+        for cy in range(num_cy):
+            width = min(size, x - cx*size)
+            height = min(size, y - cy*size)
+            terrain = np.full((width, height), mapgen.MAP_WALL, dtype=np.uint8)
+            if width > 20 and height > 20:
+                layout = mapgen.make_map(width, height, seed=mapgen.derive_seed(seed, cx, cy))
+                terrain[:] = layout[0]
+                node = (layout[1][0][0], layout[1][1][0])
+
+                # only one set of stairs for the whole map
+                for stair in (layout[3], layout[4]):
+                    terrain[stair] = mapgen.MAP_FLOOR
+                if (cx, cy) == (0, 0):
+                    terrain[layout[3]] = mapgen.MAP_UP_STAIR
+                    chunked_map.entrance = (int(layout[3][0]), int(layout[3][1]))
+                if (cx, cy) == (num_cx - 1, num_cy - 1):
+                    terrain[layout[4]] = mapgen.MAP_DOWN_STAIR
+                    chunked_map.exit = (int(cx*size + layout[4][0]), int(cy*size + layout[4][1]))
+
+                # join the layout to the middle of the chunk, then the middle to the neighbors
+                mid_x = width // 2
+                mid_y = height // 2
+                halls = np.zeros((width, height), dtype=int)
+                mapgen.connect_nodes(halls, node[0], node[1], mid_x, mid_y, rand.Random(mapgen.derive_seed(seed, cx, cy, "halls")))
+                halls[mid_x, :] = mapgen.MAP_HALL
+                halls[:, mid_y] = mapgen.MAP_HALL
+                terrain[(halls == mapgen.MAP_HALL) & (terrain == mapgen.MAP_WALL)] = mapgen.MAP_HALL
+
+            # keep the map border solid
+            if cx == 0:
+                terrain[0, :] = mapgen.MAP_WALL
+            if cy == 0:
+                terrain[:, 0] = mapgen.MAP_WALL
+            if cx == num_cx - 1:
+                terrain[-1, :] = mapgen.MAP_WALL
+            if cy == num_cy - 1:
+                terrain[:, -1] = mapgen.MAP_WALL
+            chunked_map.write("map", cx*size, cy*size, terrain)
+
+    # derived layers need one tile of the neighboring chunks around each chunk
+    for cx in range(num_cx):
+        for cy in range(num_cy):
+            x0 = cx*size
+            y0 = cy*size
+            x1 = min(x0 + size, x)
+            y1 = min(y0 + size, y)
+            terrain = chunked_map.read("map", x0, y0, x1, y1)
+            chunked_map.write("trans_map", x0, y0, mapgen.make_transparency_map(terrain).astype(np.uint8))
+            chunked_map.write("masked_map", x0, y0, chunked_map.make_masked_window(x0, y0, x1, y1))
+
+    chunked_map.flush()
+    return chunked_map
@@ -0,0 +1,85 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# how a floor was obtained when requested, see Dungeon.get_floor
+FLOOR_LOADED = "loaded" # already generated and visited before
+FLOOR_PREFETCHED = "prefetched" # background generation had already finished
+FLOOR_WAITED = "waited" # background generation was still running, had to wait for it
+FLOOR_BLOCKED = "blocked" # never requested ahead of time, generated on the spot
+
+class Dungeon:
+    # holds the floors for a run. floors are only generated when first needed,
+    # and prefetch() lets the next floor generate in a background worker while the player is busy
+    def __init__(self, num_floors, make_floor):
+        # num_floors - int, number of floors in the dungeon
+        # make_floor - function taking a depth and a timings dict and returning a new floor.Floor,
+        #              see floor.create_floor for timings
+        self.num_floors = num_floors
+        self.make_floor = make_floor
+        self.floors = {} # depth -> floor
+        self.pending = {} # depth -> future for floors being generated in the background
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="floor-prefetch")
+        # one entry per get_floor call: (depth, how it was obtained, seconds spent waiting)
+        self.transitions = []
+        # depth -> seconds spent in each stage of generating the floor, plus "total"
+        self.timings = {}
+
+    def get_num_floors(self):
+        return self.num_floors
+
+    def has_floor(self, depth):
+        return 0 <= depth < self.num_floors
+
+    def prefetch(self, depth):
+        # start generating the floor at depth in the background, if needed
+        if not self.has_floor(depth) or depth in self.floors or depth in self.pending:
+            return
+        self.pending[depth] = self.executor.submit(self.generate, depth)
+
+    def generate(self, depth):
+        # make_floor, keeping how long each stage took in timings
+        timings = {}
+        start = time.perf_counter()
+        new_floor = self.make_floor(depth, timings)
+        timings["total"] = time.perf_counter() - start
+        self.timings[depth] = timings
+        return new_floor
+
+    def get_floor(self, depth):
+        # returns the floor at depth, generating it (or waiting for the prefetch) if needed
+        start = time.perf_counter()
+        if depth in self.floors:
+            result = FLOOR_LOADED
+        elif depth in self.pending:
+            future = self.pending.pop(depth)
+            result = FLOOR_PREFETCHED if future.done() else FLOOR_WAITED
+            self.floors[depth] = future.result()
+        else:
+            result = FLOOR_BLOCKED
+            self.floors[depth] = self.generate(depth)
+
+        self.transitions.append((depth, result, time.perf_counter() - start))
+        return self.floors[depth]
+
+    def get_stats(self):
+        # counts of how each requested floor was obtained and total time spent blocked on generation,
+        # plus the number of floors generated so far and the seconds spent in each stage summed over them
+        stats = {FLOOR_LOADED: 0, FLOOR_PREFETCHED: 0, FLOOR_WAITED: 0, FLOOR_BLOCKED: 0}
+        wait_time = 0
+        for depth, result, wait in self.transitions:
+            stats[result] += 1
+            if result != FLOOR_LOADED:
+                wait_time += wait
+        stats["wait_time"] = wait_time
+        stats["generated"] = len(self.timings)
+        stages = {}
+        for timings in list(self.timings.values()):
+            for stage, seconds in timings.items():
+                stages[stage] = stages.get(stage, 0) + seconds
+        stats["stages"] = stages
+        return stats
+
+    def close(self):
+        # drop any queued prefetches, doesn't wait for one that is already running
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.pending = {}
@@ -1,75 +1,155 @@
-import numpy as np
-import mapgen
-import entity
-import item
-
-class Floor():
-    # hold map and entity info for particular floor
-    def __init__(self, map, depth, entities):
-        self.map = map
-        self.entities = entities
-        self.depth = depth
-        self.entity_map = np.zeros(map.shape())
-        self.item_list = []
-        self.item_map = np.zeros(map.shape())
-
-    def get_entity_at_position(self, x, y):
-        for ent in self.entities:
-            pos = ent.get_pos()
-            if pos == (x,y) and ent.class_type.is_alive():
-                return ent
-        return None
-
-    def get_item_at_position(self, x, y):
-        # TODO: handle multiple items on the same tile
-        for item in self.item_list:
-            pos = item.get_pos()
-            if pos == (x,y):
-                return item
-        return None
-
-    def add_item(self, new_item):
-        self.item_list.append(new_item)
-        pos = new_item.get_pos()
-        self.item_map[pos[0]][pos[1]] = 1
-
-    def remove_item(self, item):
-        self.item_list.remove(item)
-        pos = item.get_pos()
-        self.item_map[pos[0]][pos[1]] = 0
-
-    def get_item_list(self):
-        return self.item_list
-
-    def get_item_map(self):
-        return self.item_map
-
-    def get_map(self):
-        return self.map
-
-    def get_entity_map(self):
-        return self.entity_map
-
-    def get_entities(self):
-        return self.entities
-
-    def set_entities(self, new_entities):
-        self.entities = new_entities
-        return self.entities
-
-    def set_entity_pos(self, entity, newx, newy):
-        # clear old space
-        current_pos = entity.get_pos()
-        self.entity_map[current_pos[0]][current_pos[1]] = 0
-
-        # set new position
-        entity.set_pos(newx, newy)
-        self.entity_map[newx][newy] = 1
-        return self.entity_map
-
-    def remove_entity_from_entity_map(self, entity):
-        pos = entity.get_pos()
-        self.entity_map[pos[0]][pos[1]] = 0
-
-    def get_depth(self):
-        return self.depth
+import numpy as np
+import mapgen
+import entity
+import item
+import ai
+import classes
+import fov
+import light
+import visindex
+
+class Floor():
+    # hold map and entity info for particular floor
+    def __init__(self, map, depth, entities):
+        self.map = map
+        self.entities = entities
+        self.depth = depth
+        # entity and item maps are layers of the map's tile store
+        self.entity_map = map.get_layer("entity_map")
+        self.item_map = map.get_layer("item_map")
+        self.item_list = []
+        # recent fov results, see fov.calc_fov_cached
+        self.fov_cache = fov.Fov_Cache()
+        # static lights, baked into the map's light_map layer
+        self.light_field = light.Light_Field(self)
+        # precomputed fov of every walkable tile, see visindex.Vis_Index. None until enable_vis_index
+        self.vis_index = None
+
+    def get_entity_at_position(self, x, y):
+        for ent in self.entities:
+            pos = ent.get_pos()
+            if pos == (x,y) and ent.class_type.is_alive():
+                return ent
+        return None
+
+    def get_item_at_position(self, x, y):
+        # TODO: handle multiple items on the same tile
+        for item in self.item_list:
+            pos = item.get_pos()
+            if pos == (x,y):
+                return item
+        return None
+
+    def add_item(self, new_item):
+        self.item_list.append(new_item)
+        pos = new_item.get_pos()
+        self.item_map[pos[0]][pos[1]] = 1
+
+    def remove_item(self, item):
+        self.item_list.remove(item)
+        pos = item.get_pos()
+        self.item_map[pos[0]][pos[1]] = 0
+
+    def get_item_list(self):
+        return self.item_list
+
+    def get_item_map(self):
+        return self.item_map
+
+    def get_map(self):
+        return self.map
+
+    def get_entity_map(self):
+        return self.entity_map
+
+    def get_entities(self):
+        return self.entities
+
+    def set_entities(self, new_entities):
+        self.entities = new_entities
+        return self.entities
+
+    def set_entity_pos(self, entity, newx, newy):
+        # clear old space
+        current_pos = entity.get_pos()
+        self.entity_map[current_pos[0]][current_pos[1]] = 0
+
+        # set new position
+        entity.set_pos(newx, newy)
+        self.entity_map[newx][newy] = 1
+        return self.entity_map
+
+    def remove_entity_from_entity_map(self, entity):
+        pos = entity.get_pos()
+        self.entity_map[pos[0]][pos[1]] = 0
+
+    def get_depth(self):
+        return self.depth
+
+    def get_fov_cache(self):
+        return self.fov_cache
+
+    def get_light_field(self):
+        return self.light_field
+
+    def get_light(self, x, y):
+        # light level of tile x, y from the floor's static lights
+        return self.light_field.get_light(x, y)
+
+    def get_vis_index(self):
+        return self.vis_index
+
+    def enable_vis_index(self, cache=None):
+        # starts building the floor's visibility index in the background, fov uses it once it's done
+        # cache - mapcache.Map_Cache for the index files, None for the default directory
+        if self.vis_index is None:
+            self.vis_index = visindex.Vis_Index(self, cache=cache)
+            self.vis_index.build()
+        return self.vis_index
+
+    def update_vis_index(self):
+        # catches the visibility index up with finished builds and wall changes, if the floor has one
+        # the frontends call it once a turn. returns whether the index is ready
+        return self.vis_index is not None and self.vis_index.update()
+
+    def memory_usage(self):
+        # bytes used by each per tile layer of the floor
+        return self.map.memory_usage()
+
+def create_floor(mapx, mapy, depth=0, entities=[], seed=None, cache=None, vis_cache=None, timings=None):
+    # create floor with its items and monsters, returns floor
+    # seed - int, makes the map and placement reproducible. None uses the global random state
+    # cache - mapcache.Map_Cache for reusing generated maps
+    # vis_cache - mapcache.Map_Cache for visibility index files, the floor gets a visindex.Vis_Index if given
+    # timings - dict, if given seconds spent in each stage are added to it, see mapgen.Map
+    the_floor = Floor(mapgen.Map(mapx,mapy,seed=seed,cache=cache,timings=timings), depth, entities)
+    timer = mapgen.Stage_Timer(timings)
+    rooms_list = the_floor.get_map().get_rooms() # room = (top left x, top left y, width, height)
+
+    # a light in every room, baked once here
+    light.place_lights(the_floor, rooms_list)
+    timer.lap("lights")
+
+    # TODO: item generation, better monster generation
+    item_spots, monster_spots = mapgen.make_spawns(the_floor.get_map().get_map(), rooms_list, depth, seed=seed)
+
+    for item_x, item_y in item_spots:
+        new_item = item.Item_Rock(item_x, item_y, floor=the_floor)
+        the_floor.add_item(new_item)
+
+    # make monsters
+    # generate blobs with stat totals based on floor depth
+    stat_rng = np.random if seed is None else np.random.RandomState(mapgen.derive_seed(seed, "stats"))
+    entities = []
+    for entity_x, entity_y, stat_points in monster_spots:
+        new_entity = entity.Entity(entity_x, entity_y, entity.MUSCLE_BLOB_SPRITE_INDEX, floor=the_floor, ai = ai.Monster_Basic(), class_type=classes.NPC_Dynamic_Blob(stat_points, rng=stat_rng))
+        the_floor.set_entity_pos(new_entity, entity_x, entity_y)
+        entities.append(new_entity)
+    the_floor.set_entities(entities)
+    timer.lap("spawns")
+
+    if vis_cache is not None:
+        the_floor.enable_vis_index(vis_cache)
+        timer.lap("vis_index")
+
+    return the_floor
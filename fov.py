@@ -1,207 +1,1020 @@
-import numpy as np
-import floor
-import mapgen
-import sys
-
-# FOV constants
-FOV_UNSEEN = 0 # hidden tiles
-FOV_VISIBLE = 1 # visible tiles
-FOV_REVEALED = 2 # tiles that have been seen but not in current FOV
-
-class Slope:
-    # slope class for convenient vector comparison. represents a vector with slope y/x coming from origin
-    def __init__(self, y, x):
-        self.y = y
-        self.x = x
-
-    def greater(self, y, x):
-        return self.y*x > self.x*y
-
-    def greater_or_equal(self, y, x):
-        return self.y*x >= self.x*y
-
-    def less(self, y, x):
-        return self.y*x < self.x*y
-
-    def less_or_equal(self, y, x):
-        return self.y*x <= self.x*y
-
-def get_distance(x, y):
-    # returns distance between x and y coordinate and origin (treated as (0,0))
-    return np.sqrt(x**2 + y**2)
-
-def blocks_light(x, y, octant, origin, trans_map):
-    # accepts x and y coordinates of a tile and determines if it blocks light
-    nx = origin[0]
-    ny = origin[1]
-    # adjust coordinate for correct octant
-    if octant == 0:
-        nx += x
-        ny -= y
-    elif octant == 1:
-        nx += y
-        ny -= x
-    elif octant == 2:
-        nx -= y
-        ny -= x
-    elif octant == 3:
-        nx -= x
-        ny -= y
-    elif octant == 4:
-        nx -= x
-        ny += y
-    elif octant == 5:
-        nx -= y
-        ny += x
-    elif octant == 6:
-        nx += y
-        ny += x
-    elif octant == 7:
-        nx += x
-        ny += y
-
-    # check in bounds, out of bounds treated as opaque
-    if nx < trans_map.shape[0] and ny < trans_map.shape[1]:
-        return trans_map[int(nx)][int(ny)] == 1
-    else:
-        return True
-
-def set_visible(x, y, octant, origin, vis_map):
-    nx = origin[0]
-    ny = origin[1]
-
-    # adjust coordinate for octant
-    if octant == 0:
-        nx += x
-        ny -= y
-    elif octant == 1:
-        nx += y
-        ny -= x
-    elif octant == 2:
-        nx -= y
-        ny -= x
-    elif octant == 3:
-        nx -= x
-        ny -= y
-    elif octant == 4:
-        nx -= x
-        ny += y
-    elif octant == 5:
-        nx -= y
-        ny += x
-    elif octant == 6:
-        nx += y
-        ny += x
-    elif octant == 7:
-        nx += x
-        ny += y
-
-    # make visible if in bounds, ignore out of bounds
-    if nx < vis_map.shape[0] and ny < vis_map.shape[1]:
-        vis_map[int(nx)][int(ny)] = FOV_VISIBLE
-    return vis_map
-
-def compute(octant, origin, range_limit, x_init, top, bottom, floor, vis_map):
-    # computes visiblity for tiles within range_limit in given octant
-    x = x_init
-    trans_map = floor.get_map().get_trans_map()
-
-    # computes outward starting with adjacent tiles to origin
-    while x <= range_limit:
-        # compute y coordinates for top and bottom of sector with top > bottom
-        # start with top
-        topY = 0
-        if top.x == 1: # topY = 1 until top vector collides with something
-            topY = x
-        else: # top.x < 1, calculate topY based on new slope
-            topY = np.floor(((x*2-1) * top.y + top.x)/(top.x*2))
-            if blocks_light(x, topY, octant, origin, trans_map):
-                if top.greater_or_equal(topY*2+1, x*2) and not blocks_light(x, topY+1, octant, origin, trans_map):
-                    # if beveled top left, increase topY. else light is blocked.
-                    topY += 1
-            else: # light is not blocked, light can pass
-                ax = x*2
-                if blocks_light(x+1, topY+1, octant, origin, trans_map):
-                    # if tile above and to the right is a wall, use bottom right
-                    ax += 1
-                if top.greater(topY*2+1, ax):
-                    topY += 1
-
-        # then compute bottom analogously
-        bottomY = 0
-        if bottom.y == 0: # bottom is 0 until it collides with something
-            bottomY = 0
-        else: # bottom > 0, compute bottom from adjusted slope
-            bottomY = np.floor(((x*2-1) * bottom.y + bottom.x)/(bottom.x*2))
-            if bottom.greater_or_equal(bottomY*2+1, x*2) and blocks_light(x, bottomY, octant, origin, trans_map) and not blocks_light(x, bottomY+1, octant, origin, trans_map):
-                bottomY += 1
-
-        # now compute visibility for all tiles in column at given x coordinate
-        wasOpaque = -1 # -1 = not applicable, 0 = was not opaque, 1 = was opaque
-        y = topY
-        while y >= bottomY:
-
-            if range_limit < 0 or get_distance(x, y) <= range_limit:
-                isOpaque = blocks_light(x, y, octant, origin, trans_map)
-
-                # all tiles in column are assumed to be visible
-                isVisible = ((y != topY or top.greater_or_equal(y, x)) and (y != bottomY or bottom.less_or_equal(y, x)))
-
-                # set visibility
-                if isVisible:
-                    vis_map = set_visible(x, y, octant, origin, vis_map)
-
-                # now check to see if we need to continue, update top/bottom vectors, etc
-                if x != range_limit:
-                    if isOpaque:
-                        if wasOpaque == 0: # found clear-to-opaque transition
-                            nx = x*2
-                            ny = y*2+1
-                            if top.greater(ny, nx): # maintain top > bottom
-                                if(y == bottomY): # adjust bottom if we're at bottom of sector
-                                    bottom = Slope(ny,nx)
-                                    break
-                                else: # if we're in the middle of the sector, recurse. we don't adjust bottom if there's a chance for an opaque-to-clear transition below.
-                                    vis_map = compute(octant, origin, range_limit, x+1, top, Slope(ny,nx), floor, vis_map)
-                            else: # if bottom >= top, sector is empty
-                                if (y == bottomY):
-                                    return vis_map
-                        # if no transition, continue as is
-                        wasOpaque = 1
-
-                    else: # not opaque/clear
-                        if wasOpaque > 0: # found clear-to-opaque transition
-                            nx = x*2
-                            ny = y*2+1
-                            if bottom.greater_or_equal(ny, nx): # return if new top will hit bottom
-                                return vis_map
-                            top = Slope(ny,nx) # adjust top if still above bottom
-                        wasOpaque = 0
-                        # if no transition, continue as is
-            y -= 1
-            # end y while
-
-        # wasOpaque = -1 implies we hit range limit or sector is empty, so break
-        # wasOpaque = 1 implies we recursed and didn't find a transition back to clear, so recursion has aready done the work
-        if wasOpaque != 0:
-            break
-
-        x += 1
-        # end x while
-    return vis_map
-
-def calc_fov(origin, range_limit, the_floor):
-    # will need to use transparency map, bevel map, and visibility map
-    # public facing function, calcs fov from origin out to distance rangelimit
-    # adapted from http://www.adammil.net/blog/v125_roguelike_vision_algorithms.html#mycode
-
-    map = the_floor.get_map()
-    vis_map = np.zeros(map.get_map().shape)
-    vis_map[origin[0]][origin[1]] = FOV_VISIBLE
-
-    # compute for each octant (45 degree wedge)
-    # view cones can be made by restricting number of octants
-    for octant in range(0,8):
-        vis_map = compute(octant, origin, range_limit, 1, Slope(1,1), Slope(0,1), the_floor, vis_map)
-
-    return vis_map
+import numpy as np
+import floor
+import mapgen
+import sys
+from collections import OrderedDict
+try:
+    import tcod.map
+except ImportError:
+    # optional, only for the "tcod" engine
+    tcod = None
+
+# FOV constants
+FOV_UNSEEN = 0 # hidden tiles
+FOV_VISIBLE = 1 # visible tiles
+FOV_REVEALED = 2 # tiles that have been seen but not in current FOV
+
+class Slope:
+    # slope class for convenient vector comparison. represents a vector with slope y/x coming from origin
+    def __init__(self, y, x):
+        self.y = y
+        self.x = x
+
+    def greater(self, y, x):
+        return self.y*x > self.x*y
+
+    def greater_or_equal(self, y, x):
+        return self.y*x >= self.x*y
+
+    def less(self, y, x):
+        return self.y*x < self.x*y
+
+    def less_or_equal(self, y, x):
+        return self.y*x <= self.x*y
+
+def get_distance(x, y):
+    # returns distance between x and y coordinate and origin (treated as (0,0))
+    return np.sqrt(x**2 + y**2)
+
+def blocks_light(x, y, octant, origin, trans_map, reads=None):
+    # accepts x and y coordinates of a tile and determines if it blocks light
+    # reads - list, gets the map coordinates of every tile looked at
+    nx = origin[0]
+    ny = origin[1]
+    # adjust coordinate for correct octant
+    if octant == 0:
+        nx += x
+        ny -= y
+    elif octant == 1:
+        nx += y
+        ny -= x
+    elif octant == 2:
+        nx -= y
+        ny -= x
+    elif octant == 3:
+        nx -= x
+        ny -= y
+    elif octant == 4:
+        nx -= x
+        ny += y
+    elif octant == 5:
+        nx -= y
+        ny += x
+    elif octant == 6:
+        nx += y
+        ny += x
+    elif octant == 7:
+        nx += x
+        ny += y
+
+    if reads is not None:
+        reads.append((int(nx), int(ny)))
+
+    # check in bounds, out of bounds treated as opaque
+    if 0 <= nx < trans_map.shape[0] and 0 <= ny < trans_map.shape[1]:
+        return trans_map[int(nx)][int(ny)] == 1
+    else:
+        return True
+
+def set_visible(x, y, octant, origin, vis_map, offset=(0, 0)):
+    # offset - map tile at vis_map[0, 0], for windows smaller than the map
+    nx = origin[0] - offset[0]
+    ny = origin[1] - offset[1]
+
+    # adjust coordinate for octant
+    if octant == 0:
+        nx += x
+        ny -= y
+    elif octant == 1:
+        nx += y
+        ny -= x
+    elif octant == 2:
+        nx -= y
+        ny -= x
+    elif octant == 3:
+        nx -= x
+        ny -= y
+    elif octant == 4:
+        nx -= x
+        ny += y
+    elif octant == 5:
+        nx -= y
+        ny += x
+    elif octant == 6:
+        nx += y
+        ny += x
+    elif octant == 7:
+        nx += x
+        ny += y
+
+    # make visible if in bounds, ignore out of bounds
+    if 0 <= nx < vis_map.shape[0] and 0 <= ny < vis_map.shape[1]:
+        vis_map[int(nx)][int(ny)] = FOV_VISIBLE
+    return vis_map
+
+def compute(octant, origin, range_limit, x_init, top, bottom, floor, vis_map, offset=(0, 0), reads=None):
+    # computes visiblity for tiles within range_limit in given octant
+    # offset - map tile at vis_map[0, 0], see set_visible
+    # reads - list, gets every tile the result depends on, see blocks_light
+    x = x_init
+    trans_map = floor.get_map().get_trans_map()
+
+    # computes outward starting with adjacent tiles to origin
+    while x <= range_limit:
+        # compute y coordinates for top and bottom of sector with top > bottom
+        # start with top
+        topY = 0
+        if top.x == 1: # topY = 1 until top vector collides with something
+            topY = x
+        else: # top.x < 1, calculate topY based on new slope
+            topY = np.floor(((x*2-1) * top.y + top.x)/(top.x*2))
+            if blocks_light(x, topY, octant, origin, trans_map, reads):
+                if top.greater_or_equal(topY*2+1, x*2) and not blocks_light(x, topY+1, octant, origin, trans_map, reads):
+                    # if beveled top left, increase topY. else light is blocked.
+                    topY += 1
+            else: # light is not blocked, light can pass
+                ax = x*2
+                if blocks_light(x+1, topY+1, octant, origin, trans_map, reads):
+                    # if tile above and to the right is a wall, use bottom right
+                    ax += 1
+                if top.greater(topY*2+1, ax):
+                    topY += 1
+
+        # then compute bottom analogously
+        bottomY = 0
+        if bottom.y == 0: # bottom is 0 until it collides with something
+            bottomY = 0
+        else: # bottom > 0, compute bottom from adjusted slope
+            bottomY = np.floor(((x*2-1) * bottom.y + bottom.x)/(bottom.x*2))
+            if bottom.greater_or_equal(bottomY*2+1, x*2) and blocks_light(x, bottomY, octant, origin, trans_map, reads) and not blocks_light(x, bottomY+1, octant, origin, trans_map, reads):
+                bottomY += 1
+
+        # now compute visibility for all tiles in column at given x coordinate
+        wasOpaque = -1 # -1 = not applicable, 0 = was not opaque, 1 = was opaque
+        y = topY
+        while y >= bottomY:
+
+            if range_limit < 0 or get_distance(x, y) <= range_limit:
+                isOpaque = blocks_light(x, y, octant, origin, trans_map, reads)
+
+                # all tiles in column are assumed to be visible
+                isVisible = ((y != topY or top.greater_or_equal(y, x)) and (y != bottomY or bottom.less_or_equal(y, x)))
+
+                # set visibility
+                if isVisible:
+                    vis_map = set_visible(x, y, octant, origin, vis_map, offset)
+
+                # now check to see if we need to continue, update top/bottom vectors, etc
+                if x != range_limit:
+                    if isOpaque:
+                        if wasOpaque == 0: # found clear-to-opaque transition
+                            nx = x*2
+                            ny = y*2+1
+                            if top.greater(ny, nx): # maintain top > bottom
+                                if(y == bottomY): # adjust bottom if we're at bottom of sector
+                                    bottom = Slope(ny,nx)
+                                    break
+                                else: # if we're in the middle of the sector, recurse. we don't adjust bottom if there's a chance for an opaque-to-clear transition below.
+                                    vis_map = compute(octant, origin, range_limit, x+1, top, Slope(ny,nx), floor, vis_map, offset, reads)
+                            else: # if bottom >= top, sector is empty
+                                if (y == bottomY):
+                                    return vis_map
+                        # if no transition, continue as is
+                        wasOpaque = 1
+
+                    else: # not opaque/clear
+                        if wasOpaque > 0: # found clear-to-opaque transition
+                            nx = x*2
+                            ny = y*2+1
+                            if bottom.greater_or_equal(ny, nx): # return if new top will hit bottom
+                                return vis_map
+                            top = Slope(ny,nx) # adjust top if still above bottom
+                        wasOpaque = 0
+                        # if no transition, continue as is
+            y -= 1
+            # end y while
+
+        # wasOpaque = -1 implies we hit range limit or sector is empty, so break
+        # wasOpaque = 1 implies we recursed and didn't find a transition back to clear, so recursion has aready done the work
+        if wasOpaque != 0:
+            break
+
+        x += 1
+        # end x while
+    return vis_map
+
+def calc_fov(origin, range_limit, the_floor, engine=None, facing=None, arc=360):
+    # public facing function, calcs fov from origin out to distance rangelimit
+    # engine - name in FOV_ENGINES, None for the default one, see set_default_engine
+    # facing, arc - degrees, limits the fov to a view cone, see get_cone_octants
+    # returns a map sized vis_map, calc_fov_window gives just the part around origin
+    window = calc_fov_window(origin, range_limit, the_floor, engine=engine, facing=facing, arc=arc)
+    return window.to_map(the_floor.get_map().get_map().shape)
+
+# world angles covered by each octant, in degrees. angles follow ai.rotate: 0 is +x, 90 is +y
+OCTANT_ANGLES = ((315, 360), (270, 315), (225, 270), (180, 225), (135, 180), (90, 135), (45, 90), (0, 45))
+ALL_OCTANTS = (0, 1, 2, 3, 4, 5, 6, 7)
+CONE_MASKS = {} # get_cone_mask results by window shape, origin within it, facing and arc
+CONE_MASK_LIMIT = 256 # most masks CONE_MASKS keeps
+
+def get_angle_distance(a, b):
+    # smallest difference between angles a and b, in degrees
+    return abs((a - b + 180) % 360 - 180)
+
+def get_cone_octants(facing, arc):
+    # octants a view cone of arc degrees centred on facing reaches into. facing None or arc >= 360 is all of them
+    # an octant's tiles don't depend on the other octants, so a cone only has to compute these and mask the rest.
+    # cones leave out their edges, so an octant that only touches one isn't needed
+    if facing is None or arc >= 360:
+        return ALL_OCTANTS
+    octants = []
+    for octant, (low, high) in enumerate(OCTANT_ANGLES):
+        if get_angle_distance(facing, (low + high)/2) < 22.5 + arc/2 - 1e-9:
+            octants.append(octant)
+    return tuple(octants)
+
+def get_cone_mask(shape, origin, facing, arc):
+    # bool array of shape, true for tiles whose centre is less than arc/2 degrees from facing as seen from origin,
+    # an (x, y) index into the array. origin itself is always in the cone
+    key = (shape, origin, facing, arc)
+    mask = CONE_MASKS.get(key)
+    if mask is None:
+        dx = np.arange(shape[0])[:, None] - origin[0]
+        dy = np.arange(shape[1])[None, :] - origin[1]
+        mask = (get_angle_distance(np.degrees(np.arctan2(dy, dx)), facing) < arc/2 - 1e-9) | (arc >= 360)
+        mask[(dx == 0) & (dy == 0)] = True
+        mask.setflags(write=False)
+        if len(CONE_MASKS) < CONE_MASK_LIMIT:
+            CONE_MASKS[key] = mask
+    return mask
+
+class Fov_Window:
+    # the part of a vis_map around an origin, vis[i, j] is map tile (offset[0] + i, offset[1] + j)
+    # a (2*range_limit+1) square for a limited range, so everything in range fits. tiles off the map stay unseen
+    def __init__(self, shape):
+        self.vis = np.zeros(shape)
+        self.offset = (0, 0)
+
+    def reset(self, offset):
+        # clears the window for reuse with offset
+        self.vis.setflags(write=True)
+        self.vis.fill(FOV_UNSEEN)
+        self.offset = offset
+
+    def clip(self, shape):
+        # unsees the tiles that are off a map of shape
+        x0, y0 = self.offset
+        self.vis[:max(-x0, 0)] = FOV_UNSEEN
+        self.vis[max(shape[0] - x0, 0):] = FOV_UNSEEN
+        self.vis[:, :max(-y0, 0)] = FOV_UNSEEN
+        self.vis[:, max(shape[1] - y0, 0):] = FOV_UNSEEN
+
+    def get_vis(self):
+        return self.vis
+
+    def get_offset(self):
+        return self.offset
+
+    def get_bounds(self):
+        # (x0, y0, x1, y1) map tiles covered by the window, may reach off the map
+        return self.offset + (self.offset[0] + self.vis.shape[0], self.offset[1] + self.vis.shape[1])
+
+    def is_visible(self, x, y):
+        x -= self.offset[0]
+        y -= self.offset[1]
+        return 0 <= x < self.vis.shape[0] and 0 <= y < self.vis.shape[1] and self.vis[x, y] == FOV_VISIBLE
+
+    def are_visible(self, xs, ys):
+        # is_visible for arrays of map coordinates
+        xs = np.asarray(xs) - self.offset[0]
+        ys = np.asarray(ys) - self.offset[1]
+        inside = (xs >= 0) & (xs < self.vis.shape[0]) & (ys >= 0) & (ys < self.vis.shape[1])
+        visible = np.zeros(xs.shape, dtype=bool)
+        visible[inside] = self.vis[xs[inside], ys[inside]] == FOV_VISIBLE
+        return visible
+
+    def get_visible(self, x0, y0, x1, y1):
+        # bool array of the visible tiles in map rectangle [x0, x1) x [y0, y1)
+        visible = np.zeros((x1 - x0, y1 - y0), dtype=bool)
+        wx0, wy0, wx1, wy1 = self.get_bounds()
+        cx0 = max(x0, wx0)
+        cy0 = max(y0, wy0)
+        cx1 = min(x1, wx1)
+        cy1 = min(y1, wy1)
+        if cx0 < cx1 and cy0 < cy1:
+            visible[cx0 - x0:cx1 - x0, cy0 - y0:cy1 - y0] = self.vis[cx0 - wx0:cx1 - wx0, cy0 - wy0:cy1 - wy0] == FOV_VISIBLE
+        return visible
+
+    def to_map(self, shape):
+        # the window pasted into a vis_map of shape
+        vis_map = np.zeros(shape)
+        vis_map[self.get_visible(0, 0, shape[0], shape[1])] = FOV_VISIBLE
+        return vis_map
+
+def get_window_shape(origin, range_limit, the_floor):
+    # (shape, offset) of the Fov_Window for origin and range_limit
+    if range_limit < 0:
+        return the_floor.get_map().get_map().shape, (0, 0)
+    reach = int(range_limit)
+    return (reach*2 + 1, reach*2 + 1), (int(origin[0]) - reach, int(origin[1]) - reach)
+
+def get_vis_index(the_floor, range_limit):
+    # the floor's visindex.Vis_Index if it's built for the floor's current walls and range_limit, else None
+    index = the_floor.get_vis_index()
+    if index is None or not index.is_ready(range_limit):
+        return None
+    return index
+
+def calc_fov_window(origin, range_limit, the_floor, out=None, engine=None, facing=None, arc=360):
+    # calc_fov for just the (2*range_limit+1) square around origin, so the cost doesn't depend on map size
+    # out - Fov_Window from an earlier call, reused when it is the right size instead of allocating
+    # facing, arc - view cone, only the octants it reaches are computed and tiles outside it are unseen
+    # returns a Fov_Window, out if it was reused. a negative range_limit (no limit) covers the whole map
+    shape, offset = get_window_shape(origin, range_limit, the_floor)
+    if out is not None and out.get_vis().shape == shape:
+        window = out
+    else:
+        window = Fov_Window(shape)
+    window.reset(offset)
+    octants = get_cone_octants(facing, arc)
+    # the floor's vis index answers for the tiles it has, unless the engine wouldn't light the same tiles
+    engine = engine or default_engine
+    index = get_vis_index(the_floor, range_limit) if engine not in FOV_APPROXIMATE else None
+    if index is None or not index.fill_window(origin, window):
+        FOV_ENGINES[engine](origin, range_limit, the_floor, window, octants)
+    if facing is not None and arc < 360:
+        cone = get_cone_mask(shape, (int(origin[0]) - offset[0], int(origin[1]) - offset[1]), facing, arc)
+        window.get_vis()[:] *= cone
+    window.clip(the_floor.get_map().get_map().shape)
+    return window
+
+def calc_fov_shadowcast(origin, range_limit, the_floor, window, octants=ALL_OCTANTS):
+    # fills a Fov_Window by shadowcasting
+    # will need to use transparency map, bevel map, and visibility map
+    # adapted from http://www.adammil.net/blog/v125_roguelike_vision_algorithms.html#mycode
+    vis_map = window.get_vis()
+    offset = window.get_offset()
+    set_visible(0, 0, 0, origin, vis_map, offset)
+
+    # compute for each octant (45 degree wedge)
+    # view cones are made by restricting the octants, see get_cone_octants
+    for octant in octants:
+        vis_map = compute(octant, origin, range_limit, 1, Slope(1,1), Slope(0,1), the_floor, vis_map, offset)
+
+# octant-local (x, y) to world offset (dx, dy) = x*(a, b) + y*(c, d), in the same order as blocks_light
+OCTANT_TRANSFORMS = ((1, 0, 0, -1), (0, -1, 1, 0), (0, -1, -1, 0), (-1, 0, 0, -1),
+                     (-1, 0, 0, 1), (0, 1, -1, 0), (0, 1, 1, 0), (1, 0, 0, 1))
+
+RAY_TABLES = {} # Ray_Table by range limit, built on first use
+
+def ray_column(x, top, bottom, range_limit, clear, next_clear):
+    # runs one column of compute in octant-local coordinates, where only the ys in clear are transparent
+    # and next_clear is the same for column x+1, which compute peeks at when placing the top of the sector.
+    # slopes are (y, x) tuples. returns the visible ys, the sectors handed on to column x+1 as (top, bottom),
+    # the tiles that have to be opaque for this outcome and the tile peeked at in column x+1, if any
+    opaque = set()
+    peek = None
+    top_y, top_x = top
+    bottom_y, bottom_x = bottom
+
+    if top_x == 1:
+        topY = x
+    else:
+        topY = ((x*2-1) * top_y + top_x) // (top_x*2)
+        if topY not in clear:
+            if top_y*x*2 >= top_x*(topY*2+1) and topY+1 in clear:
+                # beveled top left, only happens while this tile is opaque
+                opaque.add((x, topY))
+                topY += 1
+        else:
+            ax = x*2
+            peek = (x+1, topY+1)
+            if topY+1 not in next_clear:
+                ax += 1
+                if top_y*ax > top_x*(topY*2+1) and not top_y*x*2 > top_x*(topY*2+1):
+                    # the wall to the right is what lets the sector reach one tile higher
+                    opaque.add(peek)
+            if top_y*ax > top_x*(topY*2+1):
+                topY += 1
+
+    if bottom_y == 0:
+        bottomY = 0
+    else:
+        bottomY = ((x*2-1) * bottom_y + bottom_x) // (bottom_x*2)
+        if bottom_y*x*2 >= bottom_x*(bottomY*2+1) and bottomY not in clear and bottomY+1 in clear:
+            bottomY += 1
+
+    visible = []
+    sectors = []
+    wasOpaque = -1
+    y = topY
+    while y >= bottomY:
+        if x*x + y*y <= range_limit*range_limit:
+            top_y, top_x = top
+            bottom_y, bottom_x = bottom
+            if (y != topY or top_y*x >= top_x*y) and (y != bottomY or bottom_y*x <= bottom_x*y):
+                visible.append(y)
+            if x != range_limit:
+                if y not in clear:
+                    if wasOpaque == 0:
+                        nx = x*2
+                        ny = y*2+1
+                        if top_y*nx > top_x*ny:
+                            if y == bottomY:
+                                bottom = (ny, nx)
+                                break
+                            sectors.append((top, (ny, nx)))
+                        elif y == bottomY:
+                            return visible, sectors, opaque, peek
+                    wasOpaque = 1
+                else:
+                    if wasOpaque > 0:
+                        nx = x*2
+                        ny = y*2+1
+                        if bottom_y*nx >= bottom_x*ny:
+                            return visible, sectors, opaque, peek
+                        if ny*top_x > top_y*nx:
+                            # the new top is above the old one, which only holds while the tile above stays opaque
+                            opaque.add((x, y+1))
+                        top = (ny, nx)
+                    wasOpaque = 0
+        y -= 1
+
+    if wasOpaque == 0:
+        sectors.append((top, bottom))
+    return visible, sectors, opaque, peek
+
+def ray_runs(x, low, high):
+    # runs of one or two clear tiles in column x between low and high, and the all opaque column
+    high = min(high, x+1)
+    runs = [()]
+    for y in range(max(low, 0), high+1):
+        runs.append((y,))
+        if y < high:
+            runs.append((y, y+1))
+    return runs
+
+def minimize_terms(terms):
+    # drops every term that includes another one
+    kept = []
+    for term in sorted(set(terms), key=len):
+        if not any(other <= term for other in kept):
+            kept.append(term)
+    return kept
+
+def make_ray_terms(range_limit):
+    # follows every path light can take through octant 0 by running compute column by column with one
+    # run of clear tiles per column, the rest opaque. returns {(x, y): terms}, where the tile is lit when
+    # every literal of any one term holds. literals are (x, y, is_clear)
+    memo = {}
+
+    def follow(x, top, bottom, run):
+        key = (x, top, bottom, run)
+        if key in memo:
+            return memo[key]
+        terms = {}
+        own = frozenset((x, y, True) for y in run)
+
+        # the column only depends on column x+1 through one peeked tile, so run it at most twice
+        outcomes = {False: ray_column(x, top, bottom, range_limit, run, ())}
+        peek = outcomes[False][3]
+        if peek is not None:
+            outcomes[True] = ray_column(x, top, bottom, range_limit, run, (peek[1],))
+        for peek_clear, (visible, sectors, opaque, _) in outcomes.items():
+            literals = own | frozenset((ox, oy, False) for ox, oy in opaque)
+            seen = literals | {(peek[0], peek[1], True)} if peek_clear else literals
+            for y in visible:
+                terms.setdefault((x, y), []).append(seen)
+            outcomes[peek_clear] = (sectors, literals)
+
+        if x < range_limit:
+            top_y, top_x = top
+            bottom_y, bottom_x = bottom
+            high = x+2 if top_x == 1 else ((x*2-1) * top_y + top_x) // (top_x*2) + 3
+            low = (x+1) * bottom_y // bottom_x - 1
+            for next_run in ray_runs(x+1, low, high):
+                sectors, literals = outcomes[peek is not None and peek[1] in next_run]
+                for sector_top, sector_bottom in sectors:
+                    for target, sub_terms in follow(x+1, sector_top, sector_bottom, next_run).items():
+                        terms.setdefault(target, []).extend(literals | term for term in sub_terms)
+
+        for target in terms:
+            terms[target] = minimize_terms(terms[target])
+        memo[key] = terms
+        return terms
+
+    terms = {}
+    for run in ray_runs(1, 0, 2):
+        for target, sub_terms in follow(1, (1, 1), (0, 1), run).items():
+            terms.setdefault(target, []).extend(sub_terms)
+    return {target: minimize_terms(sub_terms) for target, sub_terms in terms.items()}
+
+class Ray_Table:
+    # precomputed light paths for one range limit, flattened for all 8 octants into index arrays over a
+    # (2*pad+1) square window of opacity centred on the origin. a tile is visible if any of its terms has
+    # every tile clear or opaque as required, so a whole fov is a gather, an and-reduce and a scatter
+    def __init__(self, range_limit):
+        self.range_limit = range_limit
+        self.pad = range_limit + 2
+        side = self.pad*2 + 1
+        sentinel = side*side # an extra always clear cell, for terms with no literals
+
+        cells = []
+        wants = []
+        starts = []
+        targets = []
+        self.octant_ranges = [] # (first term, first literal) of each octant, in order
+        octant_terms = make_ray_terms(range_limit)
+        for a, b, c, d in OCTANT_TRANSFORMS:
+            self.octant_ranges.append((len(starts), len(cells)))
+            for (x, y), terms in octant_terms.items():
+                target = (self.pad + x*a + y*c) * side + self.pad + x*b + y*d
+                for term in terms:
+                    starts.append(len(cells))
+                    targets.append(target)
+                    if not term:
+                        cells.append(sentinel)
+                        wants.append(False)
+                    for lx, ly, is_clear in term:
+                        cells.append((self.pad + lx*a + ly*c) * side + self.pad + lx*b + ly*d)
+                        wants.append(not is_clear)
+
+        self.cells = np.array(cells, dtype=np.intp)
+        self.wants = np.array(wants, dtype=bool) # opacity each literal needs
+        self.starts = np.array(starts, dtype=np.intp)
+        self.targets = np.array(targets, dtype=np.intp)
+        self.octant_ranges.append((len(starts), len(cells)))
+        self.term_order = None # see get_seen
+        self.octant_arrays = {ALL_OCTANTS: (self.cells, self.wants, self.starts, self.targets)}
+
+    def get_octant_arrays(self, octants):
+        # (cells, wants, starts, targets) for just the terms of octants
+        if octants not in self.octant_arrays:
+            pieces = []
+            for octant in octants:
+                first_term, first_cell = self.octant_ranges[octant]
+                end_term, end_cell = self.octant_ranges[octant + 1]
+                pieces.append((self.cells[first_cell:end_cell], self.wants[first_cell:end_cell],
+                               self.starts[first_term:end_term] - first_cell, self.targets[first_term:end_term]))
+            cells = np.concatenate([piece[0] for piece in pieces])
+            lengths = np.cumsum([0] + [len(piece[0]) for piece in pieces[:-1]])
+            starts = np.concatenate([piece[2] + length for piece, length in zip(pieces, lengths)])
+            self.octant_arrays[octants] = (cells, np.concatenate([piece[1] for piece in pieces]), starts,
+                                           np.concatenate([piece[3] for piece in pieces]))
+        return self.octant_arrays[octants]
+
+    def get_visible(self, opaque, octants=ALL_OCTANTS):
+        # opaque - bool array, the (2*pad+1) square window around the origin. returns a bool array of the same shape
+        # octants - only light these, see get_cone_octants
+        table_cells, wants, starts, targets = self.get_octant_arrays(octants)
+        cells = np.append(opaque.ravel(), False)
+        holds = cells[table_cells] == wants
+        lit = np.logical_and.reduceat(holds, starts)
+        visible = np.zeros(opaque.size, dtype=bool)
+        visible[targets[lit]] = True
+        return visible.reshape(opaque.shape)
+
+    def get_visible_many(self, opaque, octants=ALL_OCTANTS, chunk=1 << 22):
+        # get_visible for a stack of windows, opaque is (n, side, side). works through chunk literals at a time
+        table_cells, wants, starts, targets = self.get_octant_arrays(octants)
+        flat = opaque.reshape(len(opaque), -1)
+        visible = np.zeros(flat.shape, dtype=bool)
+        step = max(chunk // len(table_cells), 1)
+        for first in range(0, len(flat), step):
+            cells = np.concatenate((flat[first:first + step], np.zeros((len(flat[first:first + step]), 1), dtype=bool)), axis=1)
+            holds = cells[:, table_cells] == wants
+            lit = np.logical_and.reduceat(holds, starts, axis=1)
+            rows, terms = np.nonzero(lit)
+            visible[rows + first, targets[terms]] = True
+        return visible.reshape(opaque.shape)
+
+    def get_seen(self, opaque, targets):
+        # whether each window in the (n, side, side) stack opaque sees its target, a flat window index or -1 for
+        # none. only the terms of each target are checked, so this is much cheaper than get_visible_many
+        if self.term_order is None:
+            # terms grouped by target cell, built on first use
+            self.term_order = np.argsort(self.targets, kind="stable")
+            sorted_targets = self.targets[self.term_order]
+            cells = np.arange(opaque[0].size + 1)
+            self.term_first = np.searchsorted(sorted_targets, cells)
+            self.term_count = np.searchsorted(sorted_targets, cells, side="right") - self.term_first
+            self.term_length = np.diff(np.append(self.starts, len(self.cells)))
+
+        seen = np.zeros(len(opaque), dtype=bool)
+        targets = np.where(targets < 0, opaque[0].size, targets)
+        counts = self.term_count[targets]
+        has_terms = np.nonzero(counts)[0]
+        if len(has_terms) == 0:
+            return seen
+        counts = counts[has_terms]
+        terms = self.term_order[ragged_range(self.term_first[targets[has_terms]], counts)]
+        lengths = self.term_length[terms]
+        literals = ragged_range(self.starts[terms], lengths)
+
+        flat = np.concatenate((opaque.reshape(len(opaque), -1), np.zeros((len(opaque), 1), dtype=bool)), axis=1)
+        windows = np.repeat(np.repeat(has_terms, counts), lengths)
+        holds = flat[windows, self.cells[literals]] == self.wants[literals]
+        lit = np.logical_and.reduceat(holds, np.cumsum(lengths) - lengths)
+        seen[has_terms] = np.logical_or.reduceat(lit, np.cumsum(counts) - counts)
+        return seen
+
+    def nbytes(self):
+        return self.cells.nbytes + self.wants.nbytes + self.starts.nbytes + self.targets.nbytes
+
+def ragged_range(starts, counts):
+    # concatenation of range(start, start + count) for each pair, without a python loop
+    ends = np.cumsum(counts)
+    return np.arange(ends[-1] if len(ends) else 0) + np.repeat(starts - (ends - counts), counts)
+
+def get_ray_table(range_limit):
+    if range_limit not in RAY_TABLES:
+        RAY_TABLES[range_limit] = Ray_Table(range_limit)
+    return RAY_TABLES[range_limit]
+
+def calc_fov_rays(origin, range_limit, the_floor, window, octants=ALL_OCTANTS):
+    # fills a Fov_Window from a Ray_Table instead of walking the octants tile by tile, same result as
+    # calc_fov_shadowcast. needs an integer range limit, anything else falls back to shadowcasting
+    if not isinstance(range_limit, (int, np.integer)) or range_limit < 1:
+        calc_fov_shadowcast(origin, range_limit, the_floor, window, octants)
+        return
+    table = get_ray_table(int(range_limit))
+    trans_map = the_floor.get_map().get_trans_map()
+
+    # copy the window around origin, padding whatever falls off the map with opaque tiles
+    pad = table.pad
+    x, y = origin
+    x0 = max(x - pad, 0)
+    y0 = max(y - pad, 0)
+    x1 = min(x + pad + 1, trans_map.shape[0])
+    y1 = min(y + pad + 1, trans_map.shape[1])
+    opaque = np.ones((pad*2 + 1, pad*2 + 1), dtype=bool)
+    opaque[x0 - x + pad:x1 - x + pad, y0 - y + pad:y1 - y + pad] = trans_map[x0:x1, y0:y1] == 1
+
+    # the table's window is 2 tiles wider on each side than the Fov_Window, for the tiles compute peeks at
+    visible = table.get_visible(opaque, octants)[2:-2, 2:-2]
+    vis_map = window.get_vis()
+    vis_map[visible] = FOV_VISIBLE
+    vis_map[range_limit, range_limit] = FOV_VISIBLE
+
+def calc_fov_many(origins, radii, the_floor, target=None, windows=False, facings=None, arcs=360):
+    # fov from many origins at once, ie every monster on the floor, batched through the ray tables
+    # radii - one range limit for all origins, or one per origin
+    # target - (x, y), returns whether each origin sees it, ie the player
+    # windows - also return a Fov_Window per origin, costs far more than just checking the target
+    # facings, arcs - view cones in degrees, one for all origins or one per origin. facings None sees all around.
+    #   origins whose cone misses the target don't cost anything for the target check
+    # origins the floor's vis index has a row for are looked up in it instead of going through the ray tables
+    # returns (seen, windows), a bool array per origin or None without a target, and a list or None
+    origins = np.array(origins, dtype=int).reshape(-1, 2)
+    radii = np.broadcast_to(np.array(radii), (len(origins),))
+    if facings is not None:
+        facings = np.broadcast_to(np.array(facings, dtype=float), (len(origins),))
+    arcs = np.broadcast_to(np.array(arcs, dtype=float), (len(origins),))
+    seen = np.zeros(len(origins), dtype=bool) if target is not None else None
+    fov_windows = [None]*len(origins) if windows else None
+    trans_map = the_floor.get_map().get_trans_map()
+
+    for radius in np.unique(radii):
+        group = np.nonzero(radii == radius)[0]
+        if radius != int(radius) or radius < 1:
+            # no ray table for this range, shadowcast each origin
+            for i in group:
+                facing = None if facings is None else facings[i]
+                window = calc_fov_window(tuple(origins[i]), radius, the_floor, facing=facing, arc=arcs[i])
+                if target is not None:
+                    seen[i] = window.is_visible(target[0], target[1])
+                if windows:
+                    fov_windows[i] = window
+            continue
+
+        table = get_ray_table(int(radius))
+        pad = table.pad
+        side = pad*2 + 1
+        # opaque windows around origins, cut from the map padded with opaque tiles. only made if needed
+        padded = None
+        steps = np.arange(side)
+        index = get_vis_index(the_floor, radius)
+        rows = index.get_rows(origins[group, 0], origins[group, 1]) if index is not None else np.full(len(group), -1)
+        indexed = rows >= 0
+
+        def cut(indices):
+            nonlocal padded
+            if padded is None:
+                padded = np.pad(trans_map == 1, pad, constant_values=True)
+            xs = origins[indices, 0]
+            ys = origins[indices, 1]
+            return padded[xs[:, None, None] + steps[None, :, None], ys[:, None, None] + steps[None, None, :]]
+
+        if target is not None:
+            dx = target[0] - origins[group, 0]
+            dy = target[1] - origins[group, 1]
+            here = (dx == 0) & (dy == 0)
+            # only origins with the target in range and in their cone need their window checked
+            candidates = (abs(dx) <= pad) & (abs(dy) <= pad) & ~here
+            if facings is not None:
+                in_cone = get_angle_distance(np.degrees(np.arctan2(dy, dx)), facings[group]) < arcs[group]/2 - 1e-9
+                candidates &= in_cone | (arcs[group] >= 360)
+            seen[group] = here
+            lookups = candidates & indexed
+            if lookups.any():
+                seen[group[lookups]] = index.get_bits(rows[lookups], dx[lookups], dy[lookups])
+                candidates &= ~indexed
+            if candidates.any():
+                cells = (dx[candidates] + pad)*side + dy[candidates] + pad
+                seen[group[candidates]] = table.get_seen(cut(group[candidates]), cells)
+
+        if windows:
+            cones = [(None, 360)] if facings is None else sorted(set(zip(facings[group], arcs[group])))
+            for facing, arc in cones:
+                members = group if facing is None else group[(facings[group] == facing) & (arcs[group] == arc)]
+                octants = get_cone_octants(facing, arc)
+                for i in members[indexed[np.searchsorted(group, members)]]:
+                    window = Fov_Window((int(radius)*2 + 1, int(radius)*2 + 1))
+                    window.reset((int(origins[i, 0]) - int(radius), int(origins[i, 1]) - int(radius)))
+                    index.fill_window(tuple(origins[i]), window)
+                    if facing is not None and arc < 360:
+                        window.get_vis()[:] *= get_cone_mask(window.get_vis().shape, (int(radius), int(radius)), facing, arc)
+                    fov_windows[i] = window
+                members = members[~indexed[np.searchsorted(group, members)]]
+                if len(members) == 0:
+                    continue
+                visible = table.get_visible_many(cut(members), octants)[:, 2:-2, 2:-2]
+                if facing is not None and arc < 360:
+                    visible &= get_cone_mask(visible.shape[1:], (int(radius), int(radius)), facing, arc)
+                for i, window_visible in zip(members, visible):
+                    window = Fov_Window(window_visible.shape)
+                    window.reset((int(origins[i, 0]) - int(radius), int(origins[i, 1]) - int(radius)))
+                    window.get_vis()[window_visible] = FOV_VISIBLE
+                    window.get_vis()[int(radius), int(radius)] = FOV_VISIBLE
+                    window.clip(trans_map.shape)
+                    fov_windows[i] = window
+    return seen, fov_windows
+
+class Fov_Record:
+    # a Fov_Window along with the tiles each octant read from trans_map to compute it, so when some tiles change
+    # only the octants that looked at them are recomputed. an octant that read none of them would run exactly
+    # the same way again. only shadowcasting is tracked, other engines redo everything when a change is in reach
+    def __init__(self, shape):
+        self.window = Fov_Window(shape)
+        self.lit = np.zeros(shape, dtype=np.uint8) # bit n set where octant n lit the tile
+        self.scratch = np.zeros(shape, dtype=np.uint8)
+        self.reads = None # set of map tiles per octant, None for untracked engines
+        self.origin = (0, 0)
+        self.range_limit = 0
+        self.engine = "shadowcast"
+        self.version = 0
+
+    def get_window(self):
+        return self.window
+
+    def get_version(self):
+        # trans_version of the map the window is up to date with
+        return self.version
+
+    def compute(self, origin, range_limit, the_floor, engine="shadowcast"):
+        # computes the whole window from scratch. with the floor's vis index ready, the window comes from it
+        # and isn't tracked, a change in reach recomputes it
+        self.origin = (int(origin[0]), int(origin[1]))
+        self.range_limit = range_limit
+        self.engine = engine
+        self.version = the_floor.get_map().get_trans_version()
+        if engine != "shadowcast" or get_vis_index(the_floor, range_limit) is not None:
+            self.reads = None
+            self.window = calc_fov_window(origin, range_limit, the_floor, out=self.window, engine=engine)
+            self.window.get_vis().setflags(write=False)
+            return
+
+        shape, offset = get_window_shape(origin, range_limit, the_floor)
+        if self.lit.shape != shape or self.window.get_vis().shape != shape:
+            self.window = Fov_Window(shape)
+            self.lit = np.zeros(shape, dtype=np.uint8)
+            self.scratch = np.zeros(shape, dtype=np.uint8)
+        self.window.reset(offset)
+        self.reads = [None]*8
+        for octant in range(0,8):
+            self.compute_octant(octant, the_floor)
+        self.update_window(the_floor)
+
+    def compute_octant(self, octant, the_floor):
+        # recomputes one octant into lit and reads
+        self.scratch.fill(FOV_UNSEEN)
+        reads = []
+        compute(octant, self.origin, self.range_limit, 1, Slope(1,1), Slope(0,1), the_floor, self.scratch,
+                self.window.get_offset(), reads)
+        self.lit &= ~np.uint8(1 << octant)
+        self.lit |= (self.scratch == FOV_VISIBLE).astype(np.uint8) << octant
+        self.reads[octant] = set(reads)
+
+    def update_window(self, the_floor):
+        # rebuilds the window's vis from lit
+        vis_map = self.window.get_vis()
+        vis_map.setflags(write=True)
+        vis_map[:] = self.lit != 0
+        set_visible(0, 0, 0, self.origin, vis_map, self.window.get_offset())
+        self.window.clip(the_floor.get_map().get_map().shape)
+        vis_map.setflags(write=False)
+
+    def update(self, changes, the_floor):
+        # brings the window up to date after the tiles in changes, (x, y) tuples, changed transparency
+        # returns the number of octants recomputed
+        self.version = the_floor.get_map().get_trans_version()
+        if self.reads is None:
+            reach = self.range_limit + 2
+            if self.range_limit < 0 or any(abs(x - self.origin[0]) <= reach and abs(y - self.origin[1]) <= reach
+                                           for x, y in changes):
+                self.compute(self.origin, self.range_limit, the_floor, self.engine)
+                return 8
+            return 0
+
+        changes = set(changes)
+        octants = [octant for octant in range(0,8) if not changes.isdisjoint(self.reads[octant])]
+        for octant in octants:
+            self.compute_octant(octant, the_floor)
+        if octants:
+            self.update_window(the_floor)
+        return len(octants)
+
+class Fov_Cache:
+    # least recently used Fov_Records of one floor, keyed on (origin, range_limit, engine)
+    # hits hand back the stored window, so its vis is made read only. evicted records are kept as a spare for
+    # the next miss, a window stays valid until it falls out of the cache or the map changes under it
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.spare = None
+        self.hits = 0
+        self.misses = 0
+        self.updates = 0 # hits on records the map had changed under
+        self.octants = 0 # octants recomputed by those updates
+
+    def get(self, key):
+        # stored record for key, or None
+        record = self.entries.get(key)
+        if record is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return record
+
+    def put(self, key, record):
+        self.entries[key] = record
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.spare = self.entries.popitem(last=False)[1]
+
+    def take_spare(self):
+        # an evicted record to reuse, or None
+        spare = self.spare
+        self.spare = None
+        return spare
+
+    def add_update(self, octants):
+        self.updates += 1
+        self.octants += octants
+
+    def clear(self):
+        self.entries.clear()
+
+    def get_stats(self):
+        # hits, misses, hit_rate, updates, octants recomputed and entries currently held
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits/lookups if lookups else 0.0,
+                "updates": self.updates, "octants": self.octants, "entries": len(self.entries)}
+
+def calc_fov_cached(origin, range_limit, the_floor, engine=None):
+    # calc_fov_window through the floor's Fov_Cache. results are reused until the viewer moves or the range
+    # changes. when tiles change transparency, only the octants that depend on them are recomputed
+    # misses are looked up in the floor's vis index when it's ready, see Fov_Record.compute
+    # returns a Fov_Window with read only vis
+    engine = engine or default_engine
+    cache = the_floor.get_fov_cache()
+    the_map = the_floor.get_map()
+    key = (int(origin[0]), int(origin[1]), range_limit, engine)
+    record = cache.get(key)
+    if record is None:
+        record = cache.take_spare() or Fov_Record((1, 1))
+        record.compute(origin, range_limit, the_floor, engine)
+        cache.put(key, record)
+    elif record.get_version() != the_map.get_trans_version():
+        changes = the_map.get_trans_changes(record.get_version())
+        if changes is None:
+            record.compute(origin, range_limit, the_floor, engine)
+            cache.add_update(8)
+        else:
+            cache.add_update(record.update(changes, the_floor))
+    return record.get_window()
+
+LINE_TABLES = {} # line offsets by (dx, dy), see get_line_offsets
+
+def get_line_offsets(dx, dy):
+    # offsets (xs, ys) of the tiles on the line from (0, 0) to (dx, dy), both ends included, in order
+    # integer only, steps along the longer axis and rounds the other one half up. the line to (-dx, -dy) is
+    # built from the same one reversed, so the line from a to b and from b to a cover the same tiles
+    key = (dx, dy)
+    if key in LINE_TABLES:
+        return LINE_TABLES[key]
+    if dx < 0 or (dx == 0 and dy < 0):
+        xs, ys = get_line_offsets(-dx, -dy)
+        xs = xs[::-1] + dx
+        ys = ys[::-1] + dy
+    else:
+        steps = max(abs(dx), abs(dy))
+        i = np.arange(steps + 1)
+        if steps == 0:
+            minor = i
+        elif abs(dx) >= abs(dy):
+            minor = (2*i*abs(dy) + steps) // (2*steps) * np.sign(dy)
+        else:
+            minor = (2*i*abs(dx) + steps) // (2*steps) * np.sign(dx)
+        major = i*np.sign(dx) if abs(dx) >= abs(dy) else i*np.sign(dy)
+        xs, ys = (major, minor) if abs(dx) >= abs(dy) else (minor, major)
+    xs = np.ascontiguousarray(xs)
+    ys = np.ascontiguousarray(ys)
+    xs.setflags(write=False)
+    ys.setflags(write=False)
+    LINE_TABLES[key] = (xs, ys)
+    return xs, ys
+
+def trace_line(a, b):
+    # map tiles (xs, ys) on the line from a to b, both ends included, see get_line_offsets
+    xs, ys = get_line_offsets(int(b[0]) - int(a[0]), int(b[1]) - int(a[1]))
+    return xs + int(a[0]), ys + int(a[1])
+
+def get_line_blockers(a, b, the_floor, entities=True):
+    # bool per tile of trace_line(a, b), true where an opaque tile, or an entity if entities, is in the way
+    # the ends never block, tiles off the map always do
+    xs, ys = trace_line(a, b)
+    trans_map = the_floor.get_map().get_trans_map()
+    # lines are straight, so they're on the map if both ends are
+    if 0 <= min(a[0], b[0]) and max(a[0], b[0]) < trans_map.shape[0] and 0 <= min(a[1], b[1]) and max(a[1], b[1]) < trans_map.shape[1]:
+        blockers = trans_map[xs, ys] == 1
+        if entities:
+            blockers |= the_floor.get_entity_map()[xs, ys] == 1
+    else:
+        inside = (xs >= 0) & (xs < trans_map.shape[0]) & (ys >= 0) & (ys < trans_map.shape[1])
+        blockers = ~inside
+        xs = xs[inside]
+        ys = ys[inside]
+        in_the_way = trans_map[xs, ys] == 1
+        if entities:
+            in_the_way |= the_floor.get_entity_map()[xs, ys] == 1
+        blockers[inside] = in_the_way
+    blockers[0] = False
+    blockers[-1] = False
+    return blockers
+
+def get_tile_blockers(xs, ys, the_floor, skip=(), entities=True):
+    # bool per map tile (xs, ys), true where the tile is opaque, or has an entity on it if entities
+    # tiles off the map always block, tiles in skip, (x, y) tuples, never do
+    xs = np.asarray(xs, dtype=int)
+    ys = np.asarray(ys, dtype=int)
+    trans_map = the_floor.get_map().get_trans_map()
+    inside = (xs >= 0) & (xs < trans_map.shape[0]) & (ys >= 0) & (ys < trans_map.shape[1])
+    blockers = ~inside
+    in_the_way = trans_map[xs[inside], ys[inside]] == 1
+    if entities:
+        in_the_way |= the_floor.get_entity_map()[xs[inside], ys[inside]] == 1
+    blockers[inside] = in_the_way
+    for x, y in skip:
+        blockers[(xs == x) & (ys == y)] = False
+    return blockers
+
+def line_of_sight(a, b, the_floor, entities=False):
+    # whether nothing blocks the straight line from a to b, see get_line_blockers
+    return not get_line_blockers(a, b, the_floor, entities).any()
+
+def calc_fov_tcod(origin, range_limit, the_floor, window, octants=ALL_OCTANTS):
+    # fills a Fov_Window with tcod.map.compute_fov, tcod's symmetric shadowcasting in C. tcod doesn't bevel
+    # corners the way compute does, so it lights a slightly different set of tiles than the other engines.
+    # only the window's part of trans_map is turned into tcod's transparency array. tcod always does every
+    # octant, calc_fov_window masks cones afterwards
+    trans_map = the_floor.get_map().get_trans_map()
+    x0, y0, x1, y1 = window.get_bounds()
+    cx0 = max(x0, 0)
+    cy0 = max(y0, 0)
+    cx1 = min(x1, trans_map.shape[0])
+    cy1 = min(y1, trans_map.shape[1])
+    transparent = trans_map[cx0:cx1, cy0:cy1] == 0
+    visible = tcod.map.compute_fov(transparent, (int(origin[0]) - cx0, int(origin[1]) - cy0), max(int(range_limit), 0),
+                                   light_walls=True, algorithm=tcod.constants.FOV_SYMMETRIC_SHADOWCAST)
+    window.get_vis()[cx0 - x0:cx1 - x0, cy0 - y0:cy1 - y0][visible] = FOV_VISIBLE
+
+FOV_ENGINES = {
+    "shadowcast": calc_fov_shadowcast,
+    "rays": calc_fov_rays,
+}
+if tcod is not None:
+    FOV_ENGINES["tcod"] = calc_fov_tcod
+# engines that don't light exactly the same tiles as calc_fov_shadowcast, conformance checks leave them out
+FOV_APPROXIMATE = ("tcod",)
+
+default_engine = "shadowcast" # engine used when none is named
+
+def set_default_engine(engine):
+    # switches the engine calc_fov, calc_fov_window and calc_fov_cached use when none is named, ie to "tcod"
+    # returns the engine in use, which stays the same if engine isn't available
+    global default_engine
+    if engine in FOV_ENGINES:
+        default_engine = engine
+    return default_engine
@@ -0,0 +1,130 @@
+import numpy as np
+import fov
+import mapgen
+
+LIGHT_MAX = 255 # light_map saturates here
+LIGHT_BRIGHT = 64 # tiles at least this lit count as brightly lit, ie for rendering
+LIGHT_RADIUS = 6 # default reach of a light
+LIGHT_INTENSITY = 160 # default light level right next to a light
+
+class Light:
+    # a static light source, ie a torch. lights the tiles it can see, fading linearly to nothing past radius
+    def __init__(self, x, y, radius=LIGHT_RADIUS, intensity=LIGHT_INTENSITY):
+        self.x = x
+        self.y = y
+        self.radius = radius
+        self.intensity = intensity
+
+        # light level by offset from the light, for a (2*radius+1) square fov window
+        steps = np.arange(-radius, radius + 1)
+        distance = np.sqrt(steps[:, None]**2 + steps[None, :]**2)
+        self.falloff = np.rint(intensity*np.clip(1 - distance/(radius + 1), 0, 1)).astype(np.int32)
+
+    def get_pos(self):
+        return (self.x, self.y)
+
+    def get_radius(self):
+        return self.radius
+
+    def get_intensity(self):
+        return self.intensity
+
+    def get_falloff(self):
+        return self.falloff
+
+class Light_Field:
+    # every static light of a floor baked into the map's light_map layer, so sampling light is a lookup
+    # each light keeps a fov.Fov_Record of what it lights. wall changes only recompute the octants of the
+    # lights that looked at the changed tiles, and only their windows of light_map are rewritten
+    def __init__(self, the_floor):
+        self.floor = the_floor
+        the_map = the_floor.get_map()
+        self.light_map = the_map.get_layer("light_map")
+        self.total = np.zeros(self.light_map.shape, dtype=np.int32) # unsaturated sum of every light
+        self.lights = []
+        self.records = []
+        self.contributions = []
+        self.version = the_map.get_trans_version()
+
+    def add_light(self, light):
+        self.update()
+        record = fov.Fov_Record((1, 1))
+        record.compute(light.get_pos(), light.get_radius(), self.floor)
+        self.lights.append(light)
+        self.records.append(record)
+        self.contributions.append(None)
+        self.bake(len(self.lights) - 1)
+        return light
+
+    def remove_light(self, light):
+        self.update()
+        i = self.lights.index(light)
+        self.apply(self.records[i].get_window(), -self.contributions[i])
+        del self.lights[i], self.records[i], self.contributions[i]
+
+    def get_lights(self):
+        return self.lights
+
+    def bake(self, i):
+        # swaps light i's old contribution for one from its current fov record
+        window = self.records[i].get_window()
+        if self.contributions[i] is not None:
+            self.apply(window, -self.contributions[i])
+        self.contributions[i] = self.lights[i].get_falloff()*(window.get_vis() == fov.FOV_VISIBLE)
+        self.apply(window, self.contributions[i])
+
+    def apply(self, window, values):
+        # adds values, shaped like window, to the part of total on the map and refreshes light_map there
+        x0, y0, x1, y1 = window.get_bounds()
+        cx0 = max(x0, 0)
+        cy0 = max(y0, 0)
+        cx1 = min(x1, self.total.shape[0])
+        cy1 = min(y1, self.total.shape[1])
+        if cx0 >= cx1 or cy0 >= cy1:
+            return
+        area = (slice(cx0, cx1), slice(cy0, cy1))
+        self.total[area] += values[cx0 - x0:cx1 - x0, cy0 - y0:cy1 - y0]
+        self.light_map[area] = np.minimum(self.total[area], LIGHT_MAX)
+
+    def update(self):
+        # catches up with walls changed since the last update, returns the number of lights rebaked
+        the_map = self.floor.get_map()
+        if self.version == the_map.get_trans_version():
+            return 0
+        changes = the_map.get_trans_changes(self.version)
+        self.version = the_map.get_trans_version()
+        rebaked = 0
+        for i, (light, record) in enumerate(zip(self.lights, self.records)):
+            if changes is None:
+                record.compute(light.get_pos(), light.get_radius(), self.floor)
+            elif record.update(changes, self.floor) == 0:
+                continue
+            self.bake(i)
+            rebaked += 1
+        return rebaked
+
+    def get_light(self, x, y):
+        # light level of tile x, y
+        self.update()
+        return self.light_map[x, y]
+
+    def get_light_map(self):
+        # the whole light_map layer, up to date
+        self.update()
+        return self.light_map
+
+def place_lights(the_floor, rooms_list, radius=LIGHT_RADIUS, intensity=LIGHT_INTENSITY):
+    # a light in the middle of every room, room = (top left x, top left y, width, height)
+    # the light goes on the walkable tile of the room nearest its middle, which may be a wall on cave maps.
+    # rooms without walkable tiles get no light
+    lights = the_floor.get_light_field()
+    the_map = the_floor.get_map().get_map()
+    for x, y, width, height in rooms_list:
+        x0 = max(x, 0)
+        y0 = max(y, 0)
+        xs, ys = np.nonzero(the_map[x0:x + width, y0:y + height] != mapgen.MAP_WALL)
+        if len(xs) == 0:
+            continue
+        nearest = np.argmin((xs + x0 - (x + width//2))**2 + (ys + y0 - (y + height//2))**2)
+        lights.add_light(Light(int(xs[nearest]) + x0, int(ys[nearest]) + y0, radius, intensity))
+    return lights
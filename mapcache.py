@@ -0,0 +1,98 @@
+import numpy as np
+import hashlib
+import json
+import os
+
+# bump whenever generation output changes for the same inputs so stale floors are never reused
+CACHE_VERSION = 1
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "floors")
+DEFAULT_MAX_BYTES = 64*1024*1024
+
+class Map_Cache:
+    # on disk cache of generated map layers, one compressed .npz per map
+    # files are named by a hash of everything that went into generating them (content addressed)
+    # total size is bounded, least recently used files are evicted first
+    def __init__(self, path=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, **params):
+        # hash of generation inputs, params should be json serializable (ints, strings, etc)
+        params["cache_version"] = CACHE_VERSION
+        text = json.dumps(params, sort_keys=True)
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def get_file(self, key):
+        return os.path.join(self.path, key + ".npz")
+
+    def load(self, key):
+        # returns map layers in the same order as mapgen.make_map, or None if not cached
+        file_name = self.get_file(key)
+        try:
+            with np.load(file_name) as data:
+                node_list = (data["node_list"][0], data["node_list"][1])
+                rooms_list = [tuple(int(v) for v in room) for room in data["rooms_list"]]
+                entrance = tuple(int(v) for v in data["entrance"])
+                exit = tuple(int(v) for v in data["exit"])
+                layers = (data["map"], node_list, rooms_list, entrance, exit, data["trans_map"], data["masked_map"], np.zeros(data["map"].shape, dtype=int))
+        except (OSError, KeyError, ValueError):
+            # missing or unreadable (ie partially written by a crashed run), treat as a miss
+            self.misses += 1
+            return None
+
+        # mark as recently used for eviction
+        try:
+            os.utime(file_name)
+        except OSError:
+            pass
+        self.hits += 1
+        return layers
+
+    def store(self, key, layers):
+        # saves map layers (as returned by mapgen.make_map) under key, then evicts old files if over budget
+        map, node_list, rooms_list, entrance, exit, trans_map, masked_map, revealed_map = layers
+        os.makedirs(self.path, exist_ok=True)
+
+        # write to a temp file and rename so readers never see a partial file
+        file_name = self.get_file(key)
+        temp_name = "{}.{}.tmp".format(file_name, os.getpid())
+        with open(temp_name, "wb") as f:
+            np.savez_compressed(f, map=map, node_list=np.array(node_list), rooms_list=np.array(rooms_list, dtype=int).reshape(-1, 4),
+                                entrance=np.array(entrance), exit=np.array(exit), trans_map=trans_map, masked_map=masked_map)
+        os.replace(temp_name, file_name)
+
+        self.evict()
+
+    def evict(self, suffix=".npz"):
+        # removes least recently used files ending in suffix until they fit in max_bytes
+        try:
+            names = [name for name in os.listdir(self.path) if name.endswith(suffix)]
+        except OSError:
+            return
+
+        files = []
+        total = 0
+        for name in names:
+            file_name = os.path.join(self.path, name)
+            try:
+                stat = os.stat(file_name)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, file_name))
+            total += stat.st_size
+
+        files.sort()
+        for mtime, size, file_name in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(file_name)
+            except OSError:
+                continue
+            total -= size
+
+    def get_stats(self):
+        return {"hits": self.hits, "misses": self.misses}
@@ -1,204 +1,963 @@
-import numpy as np
-import random as rand
-import sys
-
-# Terrain constants
-MAP_WALL = 0
-MAP_FLOOR = 1
-MAP_DOOR = 2
-MAP_HALL = 3
-MAP_UP_STAIR = 4
-MAP_DOWN_STAIR = 5
-
-# values for terminal output
-DISPLAY_VALUES = {
-    MAP_WALL : " ",
-    MAP_FLOOR: ".",
-    MAP_DOOR: "+",
-    MAP_HALL: "#",
-    MAP_UP_STAIR: "<",
-    MAP_DOWN_STAIR: ">"
-}
-
-class Map:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.map, self.node_list, self.rooms_list, self.entrance, self.exit, self.trans_map, self.masked_map, self.revealed_map = make_map(x,y)
-
-    def get_map(self):
-        return self.map
-
-    def get_rooms(self):
-        return self.rooms_list
-
-    def get_trans_map(self):
-        return self.trans_map
-
-    def get_masked_map(self):
-        return self.masked_map
-
-    def get_revealed_map(self):
-        return self.revealed_map
-
-    def update_revealed_map(self, vis_map):
-        self.revealed_map = np.clip((self.revealed_map + vis_map), 0, 1)
-        return self.revealed_map
-
-    def shape(self):
-        return self.x, self.y
-
-    def nodes(self):
-        return self.nodes_list
-
-    def get_entrance(self):
-        return self.entrance
-
-    def get_exit(self):
-        return self.exit
-
-def make_map(mapx, mapy, num_nodes = 16, num_rooms = 16):
-    # Parameters:
-    #   mapx - int, x dimension
-    #   mapy - int, y dimension
-
-    # initialize map
-    map = np.zeros((mapx,mapy), dtype=int)
-
-    # make nodes
-    #   nodes are anchor points for hallway/room generation
-    node_list_x = np.random.randint(10,mapx-10,(1,num_nodes))
-    node_list_y = np.random.randint(10,mapy-10,(1,num_nodes))
-    node_list = (node_list_x.flatten(),node_list_y.flatten())
-
-    # connect nodes
-    i0 = 0
-    while i0 < num_nodes:
-        map = connect_nodes(map,node_list[0][i0], node_list[1][i0], node_list[0][(i0+1)%num_nodes], node_list[1][(i0+1)%num_nodes])
-        i0 += 1
-
-    # draw nodes
-    for i in range(0,num_nodes):
-        map[node_list[0][i]][node_list[1][i]] = MAP_HALL
-        i += 1
-
-    # add rooms
-    map, rooms_list = add_rooms(num_rooms, map, node_list)
-
-    # add stairs
-    # TODO: make more interesting
-    map_with_stairs = np.copy(map)
-    entrance = (node_list[0][0], node_list[1][0])
-    map_with_stairs[entrance] = MAP_UP_STAIR
-    exit = (node_list[0][1], node_list[1][1])
-    map_with_stairs[exit] = MAP_DOWN_STAIR
-
-    trans_map = make_transparency_map(map)
-    masked_map = make_wall_tile_map(map_with_stairs)
-    revealed_map = map = np.zeros((mapx,mapy), dtype=int)
-
-    return map_with_stairs, node_list, rooms_list, entrance, exit, trans_map, masked_map, revealed_map
-
-def make_transparency_map(map):
-    # implemented so that only walls currently block sight
-    # opaque = 1, open = 0
-    trans_map = np.zeros(map.shape)
-    x = 0
-    y = 0
-    for x in range(0,map.shape[0]):
-        for y in range(0,map.shape[1]):
-            if map[x][y] == MAP_WALL:
-                trans_map[x][y] = 1
-            else:
-                trans_map[x][y] = 0
-
-    return trans_map
-
-def make_wall_tile_map(map):
-    # determine what tiles to display for each wall
-    mult_mask = np.zeros((3,3))
-    mult_mask[0][1] = 2
-    mult_mask[1][0] = 1
-    mult_mask[1][2] = 8
-    mult_mask[2][1] = 4
-
-    # make wall map, 1 for walls and 0 for everything else
-    wall_map = np.copy(map)
-    for x in range(0,map.shape[0]):
-        for y in range(0,map.shape[1]):
-            if map[x][y] == 0:
-                wall_map[x][y] = 1
-            else:
-                wall_map[x][y] = 0
-
-    # unique value for each arrangement of walls on the 4 cardinals from given point, 0-15s
-    masked_map = 15*np.ones(map.shape)
-    for x in range(0,wall_map.shape[0]-2):
-        for y in range(0,wall_map.shape[1]-2):
-            array_slice = wall_map[x:x+3,y:y+3]
-            masked_map[x+1][y+1] = np.sum(np.multiply(array_slice,mult_mask), dtype=np.int32)
-
-    return masked_map.astype(np.int)
-
-
-def connect_nodes(map, node1x, node1y, node2x, node2y):
-    # straight horizontal lines from each node connected by a vertical line at random breakpoint
-    x_dif = node2x - node1x
-    y_dif = node2y - node1y
-    break_point = rand.randint(0,np.absolute(x_dif))
-    # horiztonal portions
-    for i1 in range(0,np.absolute(x_dif)):
-        if i1 < break_point:
-            temp_y = node1y
-        else:
-            temp_y = node2y
-        map[node1x + i1*np.sign(x_dif)][temp_y] = MAP_HALL
-    # vertical portion
-    for i1 in range(0,np.absolute(y_dif)):
-        map[node1x + break_point*np.sign(x_dif)][node1y + i1*np.sign(y_dif)] = MAP_HALL
-
-    return map
-
-def add_rooms(n, map, nodes_list):
-    # places n rooms at the first n nodes
-    # parameters:
-    #   n - number of rooms (int, less than length of nodes_list)
-    #   map - the map, 2d array
-    #   nodes_list = list of node coodinates used for room locations
-
-    rooms_list = []
-
-    for iter in range(n):
-        # size & location
-        width = rand.randint(3, 10)
-        height = rand.randint(3, 10)
-        loc_x = nodes_list[0][iter]
-        loc_y = nodes_list[1][iter]
-
-        # shift from the node point to make it more interesting
-        x_offset = rand.randint(0,width-1)
-        y_offset = rand.randint(0,height-1)
-
-        # carve out rooms
-        for x in range(0,width):
-            for y in range(0,height):
-                if (x+loc_x-x_offset) < map.shape[0] and (x+loc_x-x_offset) >= 0 and (y+loc_y-y_offset) < map.shape[1] and (y+loc_y-y_offset) >= 0:
-                    map[x+loc_x - x_offset][y+loc_y - y_offset] = MAP_FLOOR
-
-        # add to room_list
-        rooms_list.append((loc_x - x_offset, loc_y - y_offset, width, height))
-
-    return map, rooms_list
-
-def printmap(map):
-# prints out map to terminal for testing
-    for row in map:
-        for col in row:
-            print(DISPLAY_VALUES[col], end="")
-        print()
-
-def main():
-    printmap(make_map(50, 100))
-
-if __name__ == "__main__":
-    main()
+import numpy as np
+import random as rand
+import tiles
+import regions
+import hashlib
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+# Terrain constants
+MAP_WALL = 0
+MAP_FLOOR = 1
+MAP_DOOR = 2
+MAP_HALL = 3
+MAP_UP_STAIR = 4
+MAP_DOWN_STAIR = 5
+
+TRANS_CHANGE_LIMIT = 1024 # transparency changes each map remembers, see Map.get_trans_changes
+
+# values for terminal output
+DISPLAY_VALUES = {
+    MAP_WALL : " ",
+    MAP_FLOOR: ".",
+    MAP_DOOR: "+",
+    MAP_HALL: "#",
+    MAP_UP_STAIR: "<",
+    MAP_DOWN_STAIR: ">"
+}
+
+class Map:
+    def __init__(self, x, y, seed=None, cache=None, generator="classic", timings=None, **params):
+        # seed - int, makes generation reproducible. None uses the global random state.
+        # cache - mapcache.Map_Cache, seeded maps are loaded from/saved to it when given
+        # generator - name of the generator in GENERATORS
+        # timings - dict, if given seconds spent in each generator stage, loading/saving in "cache" and
+        #           labelling in "regions" are added to it
+        # params - passed on to the generator, ie num_nodes and num_rooms for "classic"
+        self.x = x
+        self.y = y
+        self.seed = seed
+        self.generator = generator
+
+        timer = Stage_Timer(timings)
+        layers = None
+        if cache is not None and seed is not None:
+            key = cache.make_key(mapx=x, mapy=y, seed=seed, generator=generator, **params)
+            layers = cache.load(key)
+            timer.lap("cache")
+        if layers is None:
+            layers = GENERATORS[generator](x, y, seed=seed, timings=timings, **params)
+            timer = Stage_Timer(timings)
+            if cache is not None and seed is not None:
+                cache.store(key, layers)
+                timer.lap("cache")
+        map, self.node_list, self.rooms_list, self.entrance, self.exit, trans_map, masked_map, revealed_map = layers
+
+        # all per tile layers live in one compact store, the attributes below are views into it
+        self.tiles = tiles.Tile_Store(x, y)
+        self.tiles.set_layer("map", map)
+        self.tiles.set_layer("trans_map", trans_map)
+        self.tiles.set_layer("masked_map", masked_map)
+        self.tiles.set_layer("revealed_map", revealed_map)
+        self.map = self.tiles.get_layer("map")
+        self.trans_map = self.tiles.get_layer("trans_map")
+        self.masked_map = self.tiles.get_layer("masked_map")
+        self.revealed_map = self.tiles.get_bool_layer("revealed_map")
+        # tiles revealed by the last update_revealed_map, as (xs, ys) arrays
+        self.newly_revealed = (np.zeros(0, dtype=int), np.zeros(0, dtype=int))
+        # bumped whenever trans_map changes, cached fov results are keyed on it
+        self.trans_version = 0
+        # tiles whose transparency changed, the last one took trans_version to its current value
+        self.trans_changes = []
+
+        # reachability and room/hall labels
+        self.regions = regions.Region_Index(self.map, self.rooms_list)
+        timer.lap("regions")
+        # 8 neighbor wall tiles, made on first use by get_blob_map
+        self.blob_map = None
+
+    def get_map(self):
+        return self.map
+
+    def get_rooms(self):
+        return self.rooms_list
+
+    def get_trans_map(self):
+        return self.trans_map
+
+    def get_trans_version(self):
+        return self.trans_version
+
+    def get_trans_changes(self, since):
+        # tiles whose transparency changed after version since, as a list of (x, y)
+        # returns None when changes that far back are no longer kept
+        first = self.trans_version - len(self.trans_changes)
+        if since < first:
+            return None
+        return self.trans_changes[since - first:]
+
+    def get_masked_map(self):
+        return self.masked_map
+
+    def get_revealed_map(self):
+        return self.revealed_map
+
+    def get_blob_map(self):
+        # 8 neighbor wall tile index of every tile, 0-46. see make_blob_tile_map
+        if self.blob_map is None:
+            self.blob_map = make_blob_tile_map(self.map)
+        return self.blob_map
+
+    def update_revealed_map(self, vis_map, bounds=None, offset=(0, 0)):
+        # marks visible tiles as revealed, in place
+        # bounds - (x0, y0, x1, y1), only this window of vis_map can have visible tiles. None checks the whole map
+        # offset - map tile at vis_map[0, 0], see update_revealed_window
+        # returns the tiles revealed for the first time as (xs, ys) arrays, also kept in get_newly_revealed
+        self.newly_revealed = update_revealed_window(self.revealed_map, vis_map, bounds, offset)
+        return self.newly_revealed
+
+    def get_newly_revealed(self):
+        return self.newly_revealed
+
+    def get_tiles(self):
+        return self.tiles
+
+    def get_regions(self):
+        return self.regions
+
+    def same_region(self, a, b):
+        # True if there is a walkable path between tiles a and b
+        return self.regions.same_region(a, b)
+
+    def region_of(self, x, y):
+        # room/hall region of the tile, 0 for walls. see regions.make_region_map
+        return self.regions.region_of(x, y)
+
+    def component_of(self, x, y):
+        # connected component of the tile, -1 for walls
+        return self.regions.component_of(x, y)
+
+    def set_tile(self, x, y, value):
+        # changes the terrain at x, y and updates the layers that depend on it
+        was_walkable = self.map[x, y] != MAP_WALL
+        self.map[x, y] = value
+        if self.trans_map[x, y] != (value == MAP_WALL):
+            self.trans_map[x, y] = value == MAP_WALL
+            self.trans_version += 1
+            self.trans_changes.append((x, y))
+            if len(self.trans_changes) > TRANS_CHANGE_LIMIT*2:
+                del self.trans_changes[:-TRANS_CHANGE_LIMIT]
+
+        # wall tiles of the tile and its neighbors. make_wall_tile_map needs one extra tile around the window
+        # and gives 15 on the edges of what it's given, which is right where those edges are the map border
+        x0 = max(x - 2, 0)
+        y0 = max(y - 2, 0)
+        x1 = min(x + 3, self.x)
+        y1 = min(y + 3, self.y)
+        window = make_wall_tile_map(self.map[x0:x1, y0:y1])
+        inner = (slice(max(x - 1, 0), min(x + 2, self.x)), slice(max(y - 1, 0), min(y + 2, self.y)))
+        window_inner = (slice(inner[0].start - x0, inner[0].stop - x0), slice(inner[1].start - y0, inner[1].stop - y0))
+        self.masked_map[inner] = window[window_inner]
+        if self.blob_map is not None:
+            # off the map is wall for blob tiles, so the window needs no special edges
+            self.blob_map[inner] = make_blob_tile_map(self.map[x0:x1, y0:y1])[window_inner]
+
+        if was_walkable != (value != MAP_WALL):
+            self.regions.set_walkable(x, y, value != MAP_WALL)
+
+    def get_layer(self, name):
+        # any layer of the tile store by name, see tiles.TILE_LAYERS
+        return self.tiles.get_layer(name)
+
+    def memory_usage(self):
+        # bytes used by each per tile layer
+        usage = self.tiles.memory_usage()
+        usage.update(self.regions.memory_usage())
+        if self.blob_map is not None:
+            usage["blob_map"] = self.blob_map.nbytes
+        return usage
+
+    def shape(self):
+        return self.x, self.y
+
+    def nodes(self):
+        return self.nodes_list
+
+    def get_entrance(self):
+        return self.entrance
+
+    def get_exit(self):
+        return self.exit
+
+def update_revealed_window(revealed_map, vis_map, bounds=None, offset=(0, 0)):
+    # ors the visible tiles of vis_map into the boolean revealed_map, only looking at the bounds window
+    # offset - map tile at vis_map[0, 0], so a fov.Fov_Window's vis can be passed without pasting it into a full map
+    # bounds None covers all of vis_map
+    # returns map coordinates of tiles that weren't revealed before as (xs, ys) arrays
+    ox, oy = offset
+    if bounds is None:
+        bounds = (ox, oy, ox + vis_map.shape[0], oy + vis_map.shape[1])
+    x0 = max(bounds[0], ox, 0)
+    y0 = max(bounds[1], oy, 0)
+    x1 = min(bounds[2], ox + vis_map.shape[0], revealed_map.shape[0])
+    y1 = min(bounds[3], oy + vis_map.shape[1], revealed_map.shape[1])
+    if x0 >= x1 or y0 >= y1:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+
+    window = revealed_map[x0:x1, y0:y1]
+    new_tiles = (vis_map[x0 - ox:x1 - ox, y0 - oy:y1 - oy] == 1) & ~window
+    window |= new_tiles
+    xs, ys = np.nonzero(new_tiles)
+    return xs + x0, ys + y0
+
+def derive_seed(seed, *salt):
+    # derives a new 32 bit seed from seed and any number of extra values, ie derive_seed(seed, depth)
+    # used to give each floor/stage its own independent but reproducible stream
+    text = ",".join(str(value) for value in (seed,) + salt)
+    return int.from_bytes(hashlib.sha256(text.encode()).digest()[:4], "little")
+
+def make_rngs(seed=None):
+    # returns (numpy random source, python random source) for generation
+    # seed None uses the global modules so unseeded generation behaves as before
+    if seed is None:
+        return np.random, rand
+    return np.random.RandomState(derive_seed(seed, "numpy")), rand.Random(derive_seed(seed, "python"))
+
+class Stage_Timer:
+    # adds up wall time per named stage into a dict, does nothing if the dict is None
+    def __init__(self, timings):
+        self.timings = timings
+        self.last = time.perf_counter()
+
+    def lap(self, stage):
+        # charges the time since the last lap to stage
+        if self.timings is None:
+            return
+        now = time.perf_counter()
+        self.timings[stage] = self.timings.get(stage, 0) + now - self.last
+        self.last = now
+
+# stages make_map reports timings for, in order
+GENERATION_STAGES = ("nodes", "corridors", "rooms", "stairs", "transparency", "wall_mask")
+
+def make_map(mapx, mapy, num_nodes = 16, num_rooms = 16, seed = None, batch = False, timings = None):
+    # Parameters:
+    #   mapx - int, x dimension
+    #   mapy - int, y dimension
+    #   num_nodes - int, number of anchor points
+    #   num_rooms - int, number of rooms, no more than num_nodes
+    #   seed - int, seeds generation. same seed and parameters => same map
+    #   batch - bool, carve all halls and rooms at once with carve_rects instead of one slice at a time.
+    #           both give the same map. batch costs O(map area), slices O(number of rooms/halls).
+    #   timings - dict, if given seconds spent in each stage are added to it, see GENERATION_STAGES
+
+    timer = Stage_Timer(timings)
+    np_rng, py_rng = make_rngs(seed)
+
+    # initialize map
+    map = np.zeros((mapx,mapy), dtype=int)
+
+    # make nodes
+    #   nodes are anchor points for hallway/room generation
+    node_list_x = np_rng.randint(10,mapx-10,(1,num_nodes))
+    node_list_y = np_rng.randint(10,mapy-10,(1,num_nodes))
+    node_list = (node_list_x.flatten(),node_list_y.flatten())
+    timer.lap("nodes")
+
+    if batch:
+        # connect nodes, breakpoints are drawn in the same order connect_nodes would draw them
+        hall_rects = []
+        for i0 in range(num_nodes):
+            i1 = (i0+1)%num_nodes
+            break_point = py_rng.randint(0,np.absolute(node_list[0][i1] - node_list[0][i0]))
+            hall_rects.extend(make_hall_rects(node_list[0][i0], node_list[1][i0], node_list[0][i1], node_list[1][i1], break_point))
+        carve_rects(map, hall_rects, MAP_HALL)
+
+        # draw nodes
+        map[node_list] = MAP_HALL
+        timer.lap("corridors")
+
+        # add rooms
+        rooms_list = make_rooms(num_rooms, node_list, py_rng)
+        carve_rects(map, rooms_list, MAP_FLOOR)
+        timer.lap("rooms")
+    else:
+        # connect nodes
+        i0 = 0
+        while i0 < num_nodes:
+            map = connect_nodes(map,node_list[0][i0], node_list[1][i0], node_list[0][(i0+1)%num_nodes], node_list[1][(i0+1)%num_nodes], py_rng)
+            i0 += 1
+
+        # draw nodes
+        for i in range(0,num_nodes):
+            map[node_list[0][i]][node_list[1][i]] = MAP_HALL
+            i += 1
+        timer.lap("corridors")
+
+        # add rooms
+        map, rooms_list = add_rooms(num_rooms, map, node_list, py_rng)
+        timer.lap("rooms")
+
+    # add stairs
+    # TODO: make more interesting
+    map_with_stairs = np.copy(map)
+    entrance = (node_list[0][0], node_list[1][0])
+    map_with_stairs[entrance] = MAP_UP_STAIR
+    exit = (node_list[0][1], node_list[1][1])
+    map_with_stairs[exit] = MAP_DOWN_STAIR
+    timer.lap("stairs")
+
+    trans_map = make_transparency_map(map)
+    timer.lap("transparency")
+    masked_map = make_wall_tile_map(map_with_stairs)
+    timer.lap("wall_mask")
+    revealed_map = map = np.zeros((mapx,mapy), dtype=int)
+
+    return map_with_stairs, node_list, rooms_list, entrance, exit, trans_map, masked_map, revealed_map
+
+CAVE_STAGES = ("fill", "smoothing", "connect", "rooms", "stairs", "transparency", "wall_mask")
+
+def make_cave_map(mapx, mapy, seed = None, fill = .45, passes = 4, cell_size = 12, timings = None):
+    # cellular automata caves
+    # Parameters:
+    #   mapx - int, x dimension
+    #   mapy - int, y dimension
+    #   seed - int, seeds generation. same seed and parameters => same map
+    #   fill - float, fraction of tiles that start out as walls
+    #   passes - int, number of smoothing passes
+    #   cell_size - int, caves have no rooms, so the map is split into cell_size squares
+    #               and the open part of each becomes a "room" for placement
+    #   timings - dict, if given seconds spent in each stage are added to it, see CAVE_STAGES
+    # returns the same layers as make_map
+
+    timer = Stage_Timer(timings)
+    np_rng, py_rng = make_rngs(seed)
+
+    # random fill, the border is always wall
+    walls = np_rng.rand(mapx, mapy) < fill
+    walls[0, :] = walls[-1, :] = walls[:, 0] = walls[:, -1] = True
+    timer.lap("fill")
+
+    walls = smooth_caves(walls, passes)
+    timer.lap("smoothing")
+
+    # keep only the biggest cave so everything is reachable
+    labels = regions.label_components(~walls)
+    if labels.max() < 0:
+        # nothing survived smoothing, fall back to one open cave in the middle
+        walls[mapx//4:mapx - mapx//4, mapy//4:mapy - mapy//4] = False
+        walls[0, :] = walls[-1, :] = walls[:, 0] = walls[:, -1] = True
+        labels = regions.label_components(~walls)
+    sizes = np.bincount(labels[labels >= 0])
+    map = np.where(labels == sizes.argmax(), MAP_FLOOR, MAP_WALL)
+    timer.lap("connect")
+
+    # rooms are the bounding box of the open part of each cell, nodes are their centers
+    # cells are laid out as their own axes so every cell's box comes out of a few reductions
+    num_cx = -(-mapx // cell_size)
+    num_cy = -(-mapy // cell_size)
+    open_tiles = np.zeros((num_cx*cell_size, num_cy*cell_size), dtype=bool)
+    open_tiles[:mapx, :mapy] = map == MAP_FLOOR
+    cells = open_tiles.reshape(num_cx, cell_size, num_cy, cell_size)
+    open_x = cells.any(axis=3).transpose(0, 2, 1) # (cx, cy, x in cell)
+    open_y = cells.any(axis=1) # (cx, cy, y in cell)
+    x0 = open_x.argmax(axis=2)
+    x1 = cell_size - open_x[:, :, ::-1].argmax(axis=2)
+    y0 = open_y.argmax(axis=2)
+    y1 = cell_size - open_y[:, :, ::-1].argmax(axis=2)
+    keep = open_x.any(axis=2) & (x1 - x0 >= 3) & (y1 - y0 >= 3)
+    cxs, cys = np.nonzero(keep)
+    rooms_list = [(int(cx*cell_size + x0[cx, cy]), int(cy*cell_size + y0[cx, cy]), int(x1[cx, cy] - x0[cx, cy]), int(y1[cx, cy] - y0[cx, cy]))
+                  for cx, cy in zip(cxs, cys)]
+    if len(rooms_list) == 0:
+        xs, ys = np.nonzero(map == MAP_FLOOR)
+        rooms_list.append((int(xs.min()), int(ys.min()), int(xs.max() - xs.min() + 1), int(ys.max() - ys.min() + 1)))
+    node_list = (np.array([room[0] + room[2]//2 for room in rooms_list]), np.array([room[1] + room[3]//2 for room in rooms_list]))
+    timer.lap("rooms")
+
+    # stairs, entrance at a random open tile and exit at the open tile farthest from it
+    xs, ys = np.nonzero(map == MAP_FLOOR)
+    pick = np_rng.randint(0, len(xs))
+    entrance = (xs[pick], ys[pick])
+    far = ((xs - xs[pick])**2 + (ys - ys[pick])**2).argmax()
+    exit = (xs[far], ys[far])
+    map_with_stairs = np.copy(map)
+    map_with_stairs[entrance] = MAP_UP_STAIR
+    map_with_stairs[exit] = MAP_DOWN_STAIR
+    timer.lap("stairs")
+
+    trans_map = make_transparency_map(map)
+    timer.lap("transparency")
+    masked_map = make_wall_tile_map(map_with_stairs)
+    timer.lap("wall_mask")
+    revealed_map = np.zeros((mapx,mapy), dtype=int)
+
+    return map_with_stairs, node_list, rooms_list, entrance, exit, trans_map, masked_map, revealed_map
+
+def smooth_caves(walls, passes):
+    # cellular automata smoothing of a bool wall array, the border is left as it is
+    # a tile becomes wall with 5+ wall neighbors and stays wall with 4+
+    # neighbors are counted for the whole map at once by adding up shifted copies
+    walls = walls.copy()
+    mapx, mapy = walls.shape
+    count = np.zeros((mapx - 2, mapy - 2), dtype=np.uint8)
+    for i in range(passes):
+        count[:] = 0
+        for dx, dy in regions.NEIGHBORS:
+            count += walls[1 + dx:mapx - 1 + dx, 1 + dy:mapy - 1 + dy]
+        inner = walls[1:-1, 1:-1]
+        walls[1:-1, 1:-1] = (count >= 5) | (inner & (count >= 4))
+    return walls
+
+ROOM_STAGES = ("rooms", "corridors", "stairs", "transparency", "wall_mask")
+
+def make_room_map(mapx, mapy, num_rooms = None, seed = None, min_size = 3, max_size = 10, margin = 1, timings = None):
+    # dense non overlapping rooms joined by halls, see place_rooms
+    # Parameters:
+    #   mapx - int, x dimension
+    #   mapy - int, y dimension
+    #   num_rooms - int, rooms to try to place. None picks one per 400 tiles
+    #   seed - int, seeds generation. same seed and parameters => same map
+    #   min_size, max_size, margin - passed on to place_rooms
+    #   timings - dict, if given seconds spent in each stage are added to it, see ROOM_STAGES
+    # returns the same layers as make_map
+
+    timer = Stage_Timer(timings)
+    np_rng, py_rng = make_rngs(seed)
+    if num_rooms is None:
+        num_rooms = max(1, mapx*mapy // 400)
+
+    map = np.zeros((mapx,mapy), dtype=int)
+    rooms_list = place_rooms(mapx, mapy, num_rooms, np_rng, min_size, max_size, margin)
+    if len(rooms_list) == 0:
+        raise ValueError("no room fits on a {}x{} map".format(mapx, mapy))
+    timer.lap("rooms")
+
+    # join room centers in a snake order through bands of the map so halls stay short
+    band = 2*max_size
+    centers = [(x + width//2, y + height//2) for x, y, width, height in rooms_list]
+    order = sorted(range(len(centers)), key=lambda i: (centers[i][0]//band, centers[i][1] if (centers[i][0]//band) % 2 == 0 else -centers[i][1]))
+    node_list = (np.array([centers[i][0] for i in order]), np.array([centers[i][1] for i in order]))
+    rooms_list = [rooms_list[i] for i in order]
+    hall_rects = []
+    for i0 in range(len(order) - 1):
+        break_point = py_rng.randint(0,np.absolute(node_list[0][i0 + 1] - node_list[0][i0]))
+        hall_rects.extend(make_hall_rects(node_list[0][i0], node_list[1][i0], node_list[0][i0 + 1], node_list[1][i0 + 1], break_point))
+    carve_rects(map, hall_rects, MAP_HALL)
+    carve_rects(map, rooms_list, MAP_FLOOR)
+    timer.lap("corridors")
+
+    # stairs at the two ends of the snake
+    map_with_stairs = np.copy(map)
+    entrance = (node_list[0][0], node_list[1][0])
+    exit = (node_list[0][-1], node_list[1][-1])
+    map_with_stairs[entrance] = MAP_UP_STAIR
+    map_with_stairs[exit] = MAP_DOWN_STAIR
+    timer.lap("stairs")
+
+    trans_map = make_transparency_map(map)
+    timer.lap("transparency")
+    masked_map = make_wall_tile_map(map_with_stairs)
+    timer.lap("wall_mask")
+    revealed_map = np.zeros((mapx,mapy), dtype=int)
+
+    return map_with_stairs, node_list, rooms_list, entrance, exit, trans_map, masked_map, revealed_map
+
+OCCUPANCY_BLOCK = 16 # smallest Occupancy_Table block side, place_rooms grows it to fit its biggest rooms
+
+class Occupancy_Table:
+    # counts occupied tiles in any rectangle with a handful of lookups, using summed-area tables
+    # the map is split into block x block squares (16x16 by default), each with its own table, so marking tiles
+    # only rebuilds the blocks they fall in. rectangles up to block tiles across touch at most 4 blocks
+    def __init__(self, mapx, mapy, block=OCCUPANCY_BLOCK):
+        self.block = block
+        self.num_bx = -(-mapx // block)
+        self.num_by = -(-mapy // block)
+        self.occupied = np.zeros((self.num_bx*block, self.num_by*block), dtype=np.int32)
+        # sats[bx, by, i, j] is the number of occupied tiles in the first i rows and j columns of block bx, by
+        self.sats = np.zeros((self.num_bx, self.num_by, block + 1, block + 1), dtype=np.int32)
+
+    def count(self, x0, y0, x1, y1):
+        # occupied tiles in [x0, x1) x [y0, y1), for arrays of rectangles no more than block tiles across
+        block = self.block
+        total = np.zeros(np.shape(x0), dtype=np.int32)
+        for ax in (0, 1):
+            bx = x0 // block + ax
+            lx0 = np.clip(x0 - bx*block, 0, block)
+            lx1 = np.clip(x1 - bx*block, 0, block)
+            bx = np.minimum(bx, self.num_bx - 1)
+            for ay in (0, 1):
+                by = y0 // block + ay
+                ly0 = np.clip(y0 - by*block, 0, block)
+                ly1 = np.clip(y1 - by*block, 0, block)
+                by = np.minimum(by, self.num_by - 1)
+                total += (self.sats[bx, by, lx1, ly1] - self.sats[bx, by, lx0, ly1]
+                          - self.sats[bx, by, lx1, ly0] + self.sats[bx, by, lx0, ly0])
+        return total
+
+    def fill(self, rects):
+        # marks every rectangle (x, y, width, height) occupied and rebuilds the tables of the blocks they touch
+        if len(rects) == 0:
+            return
+        block = self.block
+        for x, y, width, height in rects:
+            self.occupied[x:x + width, y:y + height] = 1
+
+        # a rectangle no more than block tiles across touches at most 2 blocks along each axis
+        rects = np.asarray(rects)
+        bx = np.concatenate([rects[:,0] // block, (rects[:,0] + rects[:,2] - 1) // block]*2)
+        by = np.repeat([rects[:,1] // block, (rects[:,1] + rects[:,3] - 1) // block], 2, axis=0).ravel()
+        dirty = np.unique(bx*self.num_by + by)
+        bx = dirty // self.num_by
+        by = dirty % self.num_by
+
+        # all dirty blocks at once, as a (blocks, block, block) stack
+        blocks = self.occupied.reshape(self.num_bx, block, self.num_by, block).transpose(0, 2, 1, 3)[bx, by]
+        np.cumsum(blocks, axis=1, out=blocks)
+        np.cumsum(blocks, axis=2, out=blocks)
+        self.sats[bx, by, 1:, 1:] = blocks
+
+    def nbytes(self):
+        return self.occupied.nbytes + self.sats.nbytes
+
+def place_rooms(mapx, mapy, num_rooms, rng = np.random, min_size = 3, max_size = 10, margin = 1, max_attempts = None, batch = 256, stats = None):
+    # places up to num_rooms rooms that don't overlap, at least margin tiles apart and clear of the map border
+    # Parameters:
+    #   rng - numpy random source for sizes and positions
+    #   min_size, max_size - int, room width and height are drawn from min_size..max_size
+    #   max_attempts - int, candidate rooms to try before giving up. None is 20 per room
+    #   batch - int, candidates drawn at a time
+    #   stats - dict, if given "attempts" and "placed" are added to it
+    # returns list of rooms as (top left x, top left y, width, height), in placement order
+    # candidates are tested against an Occupancy_Table in O(1) whatever the room size. the table is updated
+    # after each batch, rooms placed earlier in the same batch are checked directly
+    if max_attempts is None:
+        max_attempts = 20*num_rooms
+    max_size = min(max_size, mapx - 2, mapy - 2)
+    if max_size < min_size:
+        return []
+
+    table = Occupancy_Table(mapx, mapy, max(OCCUPANCY_BLOCK, max_size + 2*margin))
+    rooms_list = []
+    attempts = 0
+    while len(rooms_list) < num_rooms and attempts < max_attempts:
+        n = min(batch, max_attempts - attempts)
+        width = rng.randint(min_size, max_size + 1, n)
+        height = rng.randint(min_size, max_size + 1, n)
+        x = rng.randint(1, mapx - width)
+        y = rng.randint(1, mapy - height)
+
+        # occupied tiles in each candidate grown by margin
+        x0 = np.maximum(x - margin, 0)
+        y0 = np.maximum(y - margin, 0)
+        x1 = np.minimum(x + width + margin, mapx)
+        y1 = np.minimum(y + height + margin, mapy)
+        used = table.count(x0, y0, x1, y1)
+
+        # rooms placed so far in this batch, as arrays so each candidate is checked against them in one go
+        placed = np.zeros((4, n), dtype=int)
+        k = 0
+        tried = n
+        for i in np.nonzero(used == 0)[0]:
+            if k and ((placed[0, :k] < x1[i]) & (placed[0, :k] + placed[2, :k] > x0[i])
+                      & (placed[1, :k] < y1[i]) & (placed[1, :k] + placed[3, :k] > y0[i])).any():
+                continue
+            placed[:, k] = (x[i], y[i], width[i], height[i])
+            k += 1
+            if len(rooms_list) + k == num_rooms:
+                tried = i + 1
+                break
+        attempts += tried
+
+        placed = [tuple(int(v) for v in placed[:, i]) for i in range(k)]
+        table.fill(placed)
+        rooms_list.extend(placed)
+
+    if stats is not None:
+        stats["attempts"] = stats.get("attempts", 0) + int(attempts)
+        stats["placed"] = stats.get("placed", 0) + len(rooms_list)
+    return rooms_list
+
+# map generators by name
+# each is called as generator(mapx, mapy, seed=None, timings=None, **params) and returns
+# (map, node_list, rooms_list, entrance, exit, trans_map, masked_map, revealed_map) like make_map
+GENERATORS = {
+    "classic": make_map,
+    "caves": make_cave_map,
+    "rooms": make_room_map,
+}
+
+def register_generator(name, generator):
+    # adds a generator Map(..., generator=name) can use
+    GENERATORS[name] = generator
+
+def make_transparency_map(map):
+    # implemented so that only walls currently block sight
+    # opaque = 1, open = 0
+    return (map == MAP_WALL).astype(float)
+
+def make_wall_tile_map(map):
+    # determine what tiles to display for each wall
+    # unique value for each arrangement of walls on the 4 cardinals from given point, 0-15
+    #   1 = wall at y-1, 2 = wall at x-1, 4 = wall at x+1, 8 = wall at y+1
+    # tiles on the map border are always 15
+
+    # make wall map, 1 for walls and 0 for everything else
+    wall_map = (map == MAP_WALL).astype(int)
+
+    # compose the code for every interior tile at once from shifted slices of the wall map
+    masked_map = 15*np.ones(map.shape, dtype=int)
+    masked_map[1:-1,1:-1] = (wall_map[1:-1,:-2]
+                             | wall_map[:-2,1:-1] << 1
+                             | wall_map[2:,1:-1] << 2
+                             | wall_map[1:-1,2:] << 3)
+
+    return masked_map
+
+
+# 8 neighbor wall codes, N is y-1 like the 4 cardinal codes
+BLOB_N = 1
+BLOB_NE = 2
+BLOB_E = 4
+BLOB_SE = 8
+BLOB_S = 16
+BLOB_SW = 32
+BLOB_W = 64
+BLOB_NW = 128
+# (bit, dx, dy) for each neighbor
+BLOB_NEIGHBORS = ((BLOB_N, 0, -1), (BLOB_NE, 1, -1), (BLOB_E, 1, 0), (BLOB_SE, 1, 1),
+                  (BLOB_S, 0, 1), (BLOB_SW, -1, 1), (BLOB_W, -1, 0), (BLOB_NW, -1, -1))
+
+def make_blob_lut():
+    # returns (lut, masks): lut maps every 8 bit neighbor code to a blob tile index 0-46,
+    # masks[i] is the code tile i stands for
+    # a corner only matters when both cardinals next to it are walls, dropping the rest leaves 47 codes
+    codes = np.arange(256)
+    for corner, side1, side2 in ((BLOB_NE, BLOB_N, BLOB_E), (BLOB_SE, BLOB_S, BLOB_E),
+                                 (BLOB_SW, BLOB_S, BLOB_W), (BLOB_NW, BLOB_N, BLOB_W)):
+        keep = (codes & side1 > 0) & (codes & side2 > 0)
+        codes = np.where(keep, codes, codes & ~corner)
+    masks, lut = np.unique(codes, return_inverse=True)
+    return lut.astype(np.uint8), masks
+
+BLOB_LUT, BLOB_MASKS = make_blob_lut()
+
+def make_blob_tile_map(map):
+    # 8 neighbor version of make_wall_tile_map, blob tile index 0-46 for every tile
+    # codes for the whole map are built from shifted slices and translated through BLOB_LUT in one go
+    # tiles off the map count as walls
+    wall_map = np.pad(map == MAP_WALL, 1, constant_values=True)
+    mapx, mapy = map.shape
+    codes = np.zeros(map.shape, dtype=np.uint8)
+    for bit, dx, dy in BLOB_NEIGHBORS:
+        codes |= wall_map[1 + dx:1 + dx + mapx, 1 + dy:1 + dy + mapy].astype(np.uint8)*np.uint8(bit)
+    return BLOB_LUT[codes]
+
+def connect_nodes(map, node1x, node1y, node2x, node2y, rng=rand):
+    # straight horizontal lines from each node connected by a vertical line at random breakpoint
+    # rng - python random source used for the breakpoint
+    break_point = rng.randint(0,np.absolute(node2x - node1x))
+    for rect in make_hall_rects(node1x, node1y, node2x, node2y, break_point):
+        carve_rect(map, rect, MAP_HALL)
+
+    return map
+
+def make_hall_rects(node1x, node1y, node2x, node2y, break_point):
+    # returns the rectangles (x, y, width, height) covered by a hall between two nodes
+    # the hall runs along x from node 1 at node1y, steps to node2y at break_point, and continues along x.
+    # the tile at node 2 itself isn't part of the hall.
+    x_dif = node2x - node1x
+    y_dif = node2y - node1y
+    x_sign = np.sign(x_dif)
+    y_sign = np.sign(y_dif)
+    x_len = np.absolute(x_dif)
+    y_len = np.absolute(y_dif)
+
+    def run(start, sign, length):
+        # lowest coordinate of a run of length tiles stepping by sign from start
+        return start if sign >= 0 else start - length + 1
+
+    break_x = node1x + break_point*x_sign
+    return [
+        # horizontal portions
+        (run(node1x, x_sign, break_point), node1y, break_point, 1),
+        (run(break_x, x_sign, x_len - break_point), node2y, x_len - break_point, 1),
+        # vertical portion
+        (break_x, run(node1y, y_sign, y_len), 1, y_len),
+    ]
+
+def carve_rect(map, rect, value):
+    # sets the rectangle (x, y, width, height) to value, clipped to the map
+    x0 = max(rect[0], 0)
+    y0 = max(rect[1], 0)
+    x1 = min(rect[0] + rect[2], map.shape[0])
+    y1 = min(rect[1] + rect[3], map.shape[1])
+    if x0 < x1 and y0 < y1:
+        map[x0:x1, y0:y1] = value
+    return map
+
+def carve_rects(map, rects, value):
+    # sets every rectangle (x, y, width, height) in rects to value, clipped to the map
+    # done in a few whole array operations: +1/-1 at the corners of each rectangle in a difference
+    # array, then cumulative sums give the number of rectangles covering each tile
+    rects = np.asarray(rects, dtype=int).reshape(-1, 4)
+    x0 = np.clip(rects[:,0], 0, map.shape[0])
+    y0 = np.clip(rects[:,1], 0, map.shape[1])
+    x1 = np.clip(rects[:,0] + rects[:,2], 0, map.shape[0])
+    y1 = np.clip(rects[:,1] + rects[:,3], 0, map.shape[1])
+    keep = (x0 < x1) & (y0 < y1)
+    x0, y0, x1, y1 = x0[keep], y0[keep], x1[keep], y1[keep]
+
+    diff_shape = (map.shape[0] + 1, map.shape[1] + 1)
+    size = diff_shape[0]*diff_shape[1]
+    plus = np.bincount(np.concatenate((x0*diff_shape[1] + y0, x1*diff_shape[1] + y1)), minlength=size)
+    minus = np.bincount(np.concatenate((x1*diff_shape[1] + y0, x0*diff_shape[1] + y1)), minlength=size)
+    plus -= minus
+    diff = plus.reshape(diff_shape)
+    np.add.accumulate(diff, axis=0, out=diff)
+    np.add.accumulate(diff, axis=1, out=diff)
+    np.copyto(map, value, where=diff[:-1,:-1] > 0)
+    return map
+
+def make_rooms(n, nodes_list, rng=rand):
+    # picks size and position for n rooms at the first n nodes
+    # returns list of rooms as (top left x, top left y, width, height). rooms may hang off the map.
+    rooms_list = []
+
+    for iter in range(n):
+        # size & location
+        width = rng.randint(3, 10)
+        height = rng.randint(3, 10)
+        loc_x = nodes_list[0][iter]
+        loc_y = nodes_list[1][iter]
+
+        # shift from the node point to make it more interesting
+        x_offset = rng.randint(0,width-1)
+        y_offset = rng.randint(0,height-1)
+
+        # add to room_list
+        rooms_list.append((loc_x - x_offset, loc_y - y_offset, width, height))
+
+    return rooms_list
+
+def add_rooms(n, map, nodes_list, rng=rand):
+    # places n rooms at the first n nodes
+    # parameters:
+    #   n - number of rooms (int, less than length of nodes_list)
+    #   map - the map, 2d array
+    #   nodes_list = list of node coodinates used for room locations
+    #   rng - python random source for room sizes and offsets
+
+    rooms_list = make_rooms(n, nodes_list, rng)
+
+    # carve out rooms
+    for room in rooms_list:
+        carve_rect(map, room, MAP_FLOOR)
+
+    return map, rooms_list
+
+def make_spawns(map, rooms_list, depth=0, seed=None, num_monsters=20, num_items=20):
+    # picks item and monster spots inside rooms, skipping occupied and non floor tiles
+    # parameters:
+    #   map - the map, 2d array
+    #   rooms_list - list of rooms as (top left x, top left y, width, height)
+    #   depth - int, floor depth. deeper floors get monsters with more stat points
+    #   seed - int, seeds placement. None uses the global random state
+    # returns list of item (x, y) and list of monster (x, y, stat points)
+    # num_items should be no more than num_monsters, both share the same room picks
+
+    rng = np.random if seed is None else np.random.RandomState(derive_seed(seed, "placement"))
+    placement_rooms = rng.randint(0, len(rooms_list), size=num_monsters)
+    occupied = np.zeros(map.shape, dtype=bool)
+
+    items = []
+    for i in range(0,num_items):
+        temp_room = rooms_list[placement_rooms[i]]
+        item_x = rng.randint(0,temp_room[2]-1) + temp_room[0]
+        item_y = rng.randint(0,temp_room[3]-1) + temp_room[1]
+        if not occupied[item_x][item_y] and map[item_x][item_y] == MAP_FLOOR:
+            occupied[item_x][item_y] = True
+            items.append((item_x, item_y))
+
+    # monsters and items can share a tile
+    occupied[:] = False
+    monsters = []
+    for i in range(0,num_monsters):
+        temp_room = rooms_list[placement_rooms[i]]
+        entity_x = rng.randint(0,temp_room[2]-1) + temp_room[0]
+        entity_y = rng.randint(0,temp_room[3]-1) + temp_room[1]
+        if not occupied[entity_x][entity_y] and map[entity_x][entity_y] == MAP_FLOOR:
+            occupied[entity_x][entity_y] = True
+            monsters.append((entity_x, entity_y, rng.randint(0,4) + depth*2))
+
+    return items, monsters
+
+# layers generate_many hands back as stacked arrays
+BATCH_LAYERS = ("map", "trans_map", "masked_map")
+
+def generate_many(seeds, size, workers=None, depth=0, generator="classic", **params):
+    # generates a map plus item/monster placement for every seed, spread over a pool of processes
+    # parameters:
+    #   seeds - list of int seeds, one floor each
+    #   size - int or (x, y), map dimensions
+    #   workers - int, number of processes. None uses one per core, 1 runs everything in this process
+    #   depth - int, passed on to make_spawns
+    #   generator - name of the generator in GENERATORS, params are passed on to it
+    # returns dict with
+    #   "map", "trans_map", "masked_map" - uint8 arrays stacked along the first axis, one per seed
+    #   "node_list", "rooms_list", "entrance", "exit", "items", "monsters" - lists, one entry per seed
+    # each floor depends only on its seed, so results don't change with the number of workers.
+    # workers write the big layers straight into shared memory, only the small per floor lists are pickled.
+
+    if np.isscalar(size):
+        size = (size, size)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    seeds = [int(seed) for seed in seeds]
+    shape = (len(seeds), size[0], size[1])
+    params = {"depth": depth, "generator": generator, "params": params}
+
+    if workers == 1 or len(seeds) <= 1:
+        layers = {name: np.zeros(shape, dtype=np.uint8) for name in BATCH_LAYERS}
+        info = generate_chunk(layers, 0, seeds, size, params)
+    else:
+        blocks = {}
+        try:
+            for name in BATCH_LAYERS:
+                blocks[name] = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape))))
+            names = {name: block.name for name, block in blocks.items()}
+
+            # a few chunks per worker keeps the pool busy without pickling per floor
+            num_chunks = min(len(seeds), 4*workers)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                bounds = np.linspace(0, len(seeds), num_chunks + 1).astype(int)
+                futures = [pool.submit(generate_chunk, names, start, seeds[start:end], size, params, shape)
+                           for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+                info = []
+                for future in futures:
+                    info.extend(future.result())
+
+            layers = {name: np.ndarray(shape, dtype=np.uint8, buffer=block.buf).copy() for name, block in blocks.items()}
+        finally:
+            for block in blocks.values():
+                block.close()
+                block.unlink()
+
+    results = dict(layers)
+    for i, key in enumerate(("node_list", "rooms_list", "entrance", "exit", "items", "monsters")):
+        results[key] = [floor_info[i] for floor_info in info]
+    return results
+
+def generate_chunk(layers, start, seeds, size, params, shape=None):
+    # worker for generate_many, generates floors for seeds into layers[name][start:start+len(seeds)]
+    # layers is either a dict of arrays, or a dict of shared memory block names with the full batch shape
+    blocks = []
+    if shape is not None:
+        blocks = [shared_memory.SharedMemory(name=layers[name]) for name in BATCH_LAYERS]
+        layers = {name: np.ndarray(shape, dtype=np.uint8, buffer=block.buf) for name, block in zip(BATCH_LAYERS, blocks)}
+
+    info = []
+    try:
+        for i, seed in enumerate(seeds):
+            map, node_list, rooms_list, entrance, exit, trans_map, masked_map, revealed_map = GENERATORS[params["generator"]](size[0], size[1], seed=seed, **params["params"])
+            items, monsters = make_spawns(map, rooms_list, params["depth"], seed=seed)
+            layers["map"][start + i] = map
+            layers["trans_map"][start + i] = trans_map
+            layers["masked_map"][start + i] = masked_map
+            # plain ints pickle smaller than numpy scalars
+            info.append((([int(v) for v in node_list[0]], [int(v) for v in node_list[1]]),
+                         [tuple(int(v) for v in room) for room in rooms_list],
+                         (int(entrance[0]), int(entrance[1])),
+                         (int(exit[0]), int(exit[1])),
+                         [tuple(int(v) for v in spot) for spot in items],
+                         [tuple(int(v) for v in spot) for spot in monsters]))
+    finally:
+        del layers
+        for block in blocks:
+            block.close()
+    return info
+
+def make_display_lut():
+    # byte lookup table from terrain value to its DISPLAY_VALUES character, "?" for unknown values
+    lut = np.full(256, ord("?"), dtype=np.uint8)
+    for value, char in DISPLAY_VALUES.items():
+        lut[value] = ord(char)
+    return lut
+
+def render_ascii(map):
+    # returns the map as text using DISPLAY_VALUES, one line per row of the map (first index)
+    # every tile is translated at once through a byte lookup table
+    text = np.empty((map.shape[0], map.shape[1] + 1), dtype=np.uint8)
+    text[:, :-1] = make_display_lut()[map]
+    text[:, -1] = ord("\n")
+    return text.tobytes().decode("ascii")
+
+def printmap(map):
+# prints out map to terminal for testing
+    print(render_ascii(map), end="")
+
+def main(argv=None):
+    # headless generation benchmark, reports per stage timings as json
+    parser = argparse.ArgumentParser(description="generate floors and report how long each generation stage takes")
+    parser.add_argument("-n", "--floors", type=int, default=10, help="number of floors to generate")
+    parser.add_argument("-s", "--size", type=int, nargs="+", default=[80], help="map size, x [y]")
+    parser.add_argument("--seed", type=int, default=0, help="base seed, floor i uses derive_seed(seed, i)")
+    parser.add_argument("-g", "--generator", default="classic", choices=sorted(GENERATORS), help="map generator")
+    parser.add_argument("--nodes", type=int, default=16, help="number of nodes, classic only")
+    parser.add_argument("--rooms", type=int, default=16, help="number of rooms, classic only")
+    parser.add_argument("--batch", action="store_true", help="use batched carving, classic only")
+    parser.add_argument("--dump", metavar="FILE", help="write every floor as ascii to FILE, - for stdout")
+    args = parser.parse_args(argv)
+    mapx = args.size[0]
+    mapy = args.size[-1]
+
+    if args.generator == "classic":
+        params = {"num_nodes": args.nodes, "num_rooms": args.rooms, "batch": args.batch}
+    else:
+        params = {}
+
+    stages = {}
+    totals = []
+    maps = []
+    for i in range(args.floors):
+        timings = {}
+        start = time.perf_counter()
+        layers = GENERATORS[args.generator](mapx, mapy, seed=derive_seed(args.seed, i), timings=timings, **params)
+        totals.append(time.perf_counter() - start)
+        for stage, seconds in timings.items():
+            stages.setdefault(stage, []).append(seconds)
+        if args.dump:
+            maps.append(layers[0])
+
+    def summary(values):
+        values = np.array(values)*1000
+        return {"mean_ms": float(values.mean()), "min_ms": float(values.min()), "max_ms": float(values.max()), "total_ms": float(values.sum())}
+
+    report = {
+        "size": [mapx, mapy],
+        "floors": args.floors,
+        "seed": args.seed,
+        "generator": args.generator,
+        "params": params,
+        "stages": {stage: summary(values) for stage, values in stages.items()},
+        "total": summary(totals),
+    }
+
+    if args.dump:
+        text = "\n".join(render_ascii(map) for map in maps)
+        if args.dump == "-":
+            sys.stdout.write(text + "\n")
+        else:
+            with open(args.dump, "w") as f:
+                f.write(text)
+
+    print(json.dumps(report, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
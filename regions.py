@@ -0,0 +1,325 @@
+import numpy as np
+from collections import deque
+import mapgen
+
+# movement allows diagonal steps, so tiles touching at a corner are connected
+NEIGHBORS = ((-1,-1), (-1,0), (-1,1), (0,-1), (0,1), (1,-1), (1,0), (1,1))
+
+def shifted_slices(dx, dy):
+    # slices (destination, source) so that destination[i, j] lines up with source[i+dx, j+dy]
+    def axis(d):
+        if d > 0:
+            return slice(0, -d), slice(d, None)
+        if d < 0:
+            return slice(-d, None), slice(0, d)
+        return slice(None), slice(None)
+    dst_x, src_x = axis(dx)
+    dst_y, src_y = axis(dy)
+    return (dst_x, dst_y), (src_x, src_y)
+
+def label_components(walkable):
+    # labels groups of 8-connected walkable tiles, no flood fill
+    # returns int32 array, -1 for tiles that aren't walkable, components numbered 0..n-1
+    # every tile starts labelled with its own flat index. each pass takes the lowest label among neighbors,
+    # hands it to the tile the old label pointed at (hooking) and then follows label chains (pointer jumping),
+    # so labels converge on the lowest index in each component in a handful of passes.
+    shape = walkable.shape
+    size = walkable.size
+    if size == 0:
+        return np.full(shape, -1, dtype=np.int32)
+
+    # label size is the "not walkable" sentinel, it sits at the end so labels[labels] always works
+    labels = np.append(np.where(walkable.ravel(), np.arange(size), size), size)
+    while True:
+        old_labels = labels.copy()
+        grid = labels[:-1].reshape(shape)
+        lowest = grid.copy()
+        for dx, dy in NEIGHBORS:
+            dst, src = shifted_slices(dx, dy)
+            np.minimum(lowest[dst], grid[src], out=lowest[dst])
+        lowest = np.where(walkable, lowest, size).ravel()
+
+        # hooking, the tile a label points at takes the lowest label seen by any tile pointing at it
+        np.minimum.at(labels, labels[:-1], lowest)
+        labels[:-1] = np.minimum(labels[:-1], lowest)
+
+        # pointer jumping
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+
+        if np.array_equal(labels, old_labels):
+            break
+
+    # renumber 0..n-1
+    labels = labels[:-1]
+    roots, compact = np.unique(labels, return_inverse=True)
+    compact = compact.astype(np.int32)
+    if len(roots) and roots[-1] == size:
+        compact[labels == size] = -1
+    return compact.reshape(shape)
+
+def make_region_map(map, rooms_list):
+    # numbers rooms and the halls between them
+    # returns int32 array: 0 for walls, i+1 for tiles of room i (later rooms win where they overlap),
+    # len(rooms_list)+1 and up for each connected stretch of walkable tiles outside rooms
+    walkable = map != mapgen.MAP_WALL
+    region_map = np.zeros(map.shape, dtype=np.int32)
+    for i, room in enumerate(rooms_list):
+        x0 = max(room[0], 0)
+        y0 = max(room[1], 0)
+        x1 = min(room[0] + room[2], map.shape[0])
+        y1 = min(room[1] + room[3], map.shape[1])
+        if x0 < x1 and y0 < y1:
+            region_map[x0:x1, y0:y1] = np.where(walkable[x0:x1, y0:y1], i + 1, region_map[x0:x1, y0:y1])
+
+    halls = walkable & (region_map == 0)
+    hall_labels = label_components(halls)
+    region_map[halls] = hall_labels[halls] + len(rooms_list) + 1
+    return region_map
+
+REGION_SEARCH_LIMIT = 4096 # most tiles a local search visits before relabelling the bounding box instead
+
+class Label_Map:
+    # an int32 array of labels with the bounding box and tile count of every label, so merging labels only
+    # scans the boxes of the ones that change, and a removed tile only searches around itself for a split
+    def __init__(self, labels, background):
+        self.labels = labels
+        self.background = background
+        self.boxes = {} # label -> [x0, y0, x1, y1], ends exclusive. may be bigger than the label after a split
+        self.counts = {} # label -> number of tiles
+        xs, ys = np.nonzero(labels != background)
+        values, inverse = np.unique(labels[xs, ys], return_inverse=True)
+        x0 = np.full(len(values), labels.shape[0])
+        y0 = np.full(len(values), labels.shape[1])
+        x1 = np.zeros(len(values), dtype=int)
+        y1 = np.zeros(len(values), dtype=int)
+        np.minimum.at(x0, inverse, xs)
+        np.minimum.at(y0, inverse, ys)
+        np.maximum.at(x1, inverse, xs + 1)
+        np.maximum.at(y1, inverse, ys + 1)
+        counts = np.bincount(inverse, minlength=len(values))
+        for i, value in enumerate(values):
+            self.boxes[int(value)] = [int(x0[i]), int(y0[i]), int(x1[i]), int(y1[i])]
+            self.counts[int(value)] = int(counts[i])
+        self.next_label = int(values.max()) + 1 if len(values) else background + 1
+
+    def get_labels(self):
+        return self.labels
+
+    def new_label(self):
+        label = self.next_label
+        self.next_label += 1
+        return label
+
+    def add_tiles(self, xs, ys, label):
+        # labels tiles (xs, ys), which must be background, as label
+        self.labels[xs, ys] = label
+        box = self.boxes.setdefault(label, [min(xs), min(ys), max(xs) + 1, max(ys) + 1])
+        box[:] = [min(box[0], min(xs)), min(box[1], min(ys)), max(box[2], max(xs) + 1), max(box[3], max(ys) + 1)]
+        self.counts[label] = self.counts.get(label, 0) + len(xs)
+
+    def clear_tiles(self, xs, ys, label):
+        # sets tiles (xs, ys) of label to background, without checking whether that splits the label
+        self.counts[label] -= len(xs)
+        if self.counts[label] == 0:
+            del self.counts[label], self.boxes[label]
+        self.labels[xs, ys] = self.background
+
+    def move_tiles(self, xs, ys, old, new):
+        # relabels tiles (xs, ys) of label old as new
+        self.clear_tiles(xs, ys, old)
+        self.add_tiles(xs, ys, new)
+
+    def merge(self, labels):
+        # folds every label in labels into the one with the most tiles, returns it
+        keep = max(labels, key=lambda label: self.counts[label])
+        for label in labels:
+            if label != keep:
+                x0, y0, x1, y1 = self.boxes[label]
+                xs, ys = np.nonzero(self.labels[x0:x1, y0:y1] == label)
+                self.move_tiles(xs + x0, ys + y0, label, keep)
+        return keep
+
+    def remove_tile(self, x, y):
+        # sets tile x, y to background. if that cut its label in two, the pieces without the most tiles get new
+        # labels. the pieces are told apart by searching out from the tile's neighbors at the same time, each
+        # search stops when it runs into another one. a piece is cut off once its search runs out of tiles, so
+        # the cost depends on the size of the smaller pieces. searches that run long fall back to relabelling
+        # the label's bounding box
+        label = int(self.labels[x, y])
+        self.clear_tiles([x], [y], label)
+        if label not in self.counts:
+            return
+
+        # neighbors of the tile with its label, grouped where they touch each other without going through it
+        ring = [(x + dx, y + dy) for dx, dy in NEIGHBORS if 0 <= x + dx < self.labels.shape[0]
+                and 0 <= y + dy < self.labels.shape[1] and self.labels[x + dx, y + dy] == label]
+        groups = []
+        for tile in ring:
+            touching = [group for group in groups if any(max(abs(tile[0] - other[0]), abs(tile[1] - other[1])) == 1
+                                                        for other in group)]
+            for group in touching:
+                groups.remove(group)
+            groups.append(sum(touching, [tile]))
+        if len(groups) <= 1:
+            return
+
+        owner = {}
+        queues = []
+        pieces = []
+        for i, group in enumerate(groups):
+            for tile in group:
+                owner[tile] = i
+            queues.append(deque(group))
+            pieces.append(list(group))
+        merged = list(range(len(groups)))
+
+        def find(i):
+            while merged[i] != i:
+                i = merged[i]
+            return i
+
+        active = set(range(len(groups)))
+        finished = []
+        visited = len(ring)
+        while len(active) > 1:
+            if visited > REGION_SEARCH_LIMIT:
+                self.relabel_box(label)
+                return
+            for i in sorted(active):
+                if i not in active:
+                    continue
+                if not queues[i]:
+                    active.remove(i)
+                    finished.append(i)
+                    continue
+                tx, ty = queues[i].popleft()
+                for dx, dy in NEIGHBORS:
+                    tile = (tx + dx, ty + dy)
+                    if not (0 <= tile[0] < self.labels.shape[0] and 0 <= tile[1] < self.labels.shape[1]) \
+                            or self.labels[tile] != label:
+                        continue
+                    other = owner.get(tile)
+                    if other is None:
+                        owner[tile] = i
+                        queues[i].append(tile)
+                        pieces[i].append(tile)
+                        visited += 1
+                    else:
+                        other = find(other)
+                        if other != i:
+                            # the searches met, so they're in the same piece
+                            merged[other] = i
+                            queues[i].extend(queues[other])
+                            pieces[i].extend(pieces[other])
+                            active.discard(other)
+
+        if not active:
+            # the last searches ran out together, the biggest piece keeps the label
+            finished.sort(key=lambda i: len(pieces[i]))
+            finished.pop()
+        for i in finished:
+            xs, ys = zip(*pieces[i])
+            self.move_tiles(np.array(xs), np.array(ys), label, self.new_label())
+
+    def relabel_box(self, label):
+        # splits label into its connected pieces by labelling its bounding box, the biggest piece keeps the label
+        x0, y0, x1, y1 = self.boxes[label]
+        in_label = self.labels[x0:x1, y0:y1] == label
+        pieces = label_components(in_label)
+        counts = np.bincount(pieces[in_label])
+        keep = counts.argmax()
+        for piece in range(len(counts)):
+            xs, ys = np.nonzero(pieces == piece)
+            if piece == keep:
+                # shrink the box to what's left
+                self.boxes[label] = [int(xs.min()) + x0, int(ys.min()) + y0, int(xs.max()) + x0 + 1, int(ys.max()) + y0 + 1]
+            else:
+                self.move_tiles(xs + x0, ys + y0, label, self.new_label())
+
+class Region_Index:
+    # which tiles of a map are reachable from each other, and which room/hall each tile belongs to
+    # queries are single array lookups. set_walkable keeps both up to date when a tile opens or closes,
+    # touching only the labels next to the tile
+    def __init__(self, map, rooms_list):
+        self.rooms_list = rooms_list
+        self.components = Label_Map(label_components(map != mapgen.MAP_WALL), -1)
+        self.regions = Label_Map(make_region_map(map, rooms_list), 0)
+        # region ids from here up are halls
+        self.regions.next_label = max(self.regions.next_label, len(rooms_list) + 1)
+
+    def component_of(self, x, y):
+        # connected component of the tile, -1 if it isn't walkable
+        return self.components.get_labels()[x, y]
+
+    def region_of(self, x, y):
+        # room/hall region of the tile, 0 if it isn't walkable
+        return self.regions.get_labels()[x, y]
+
+    def same_region(self, a, b):
+        # True if there is a walkable path between tiles a and b
+        components = self.components.get_labels()
+        label = components[a[0], a[1]]
+        return label >= 0 and label == components[b[0], b[1]]
+
+    def same_room(self, a, b):
+        # True if a and b are in the same room or the same stretch of hall
+        regions = self.regions.get_labels()
+        region = regions[a[0], a[1]]
+        return region > 0 and region == regions[b[0], b[1]]
+
+    def get_components(self):
+        return self.components.get_labels()
+
+    def get_regions(self):
+        return self.regions.get_labels()
+
+    def room_at(self, x, y):
+        # region id of the room covering x, y (the last one where rooms overlap), 0 outside rooms
+        for i in range(len(self.rooms_list) - 1, -1, -1):
+            room = self.rooms_list[i]
+            if room[0] <= x < room[0] + room[2] and room[1] <= y < room[1] + room[3]:
+                return i + 1
+        return 0
+
+    def neighbor_values(self, values, x, y):
+        # values of the in-bounds neighbors of x, y
+        x0 = max(x - 1, 0)
+        y0 = max(y - 1, 0)
+        window = values[x0:x + 2, y0:y + 2].ravel()
+        center = (x - x0)*values[x0:x + 2, y0:y + 2].shape[1] + (y - y0)
+        return np.delete(window, center)
+
+    def set_walkable(self, x, y, walkable):
+        # updates the index after the tile at x, y opened up (walkable True) or was blocked
+        # only the components and regions next to the tile are touched
+        if walkable == (self.components.get_labels()[x, y] >= 0):
+            return
+
+        if walkable:
+            # joins every component around it into one
+            neighbors = self.neighbor_values(self.components.get_labels(), x, y)
+            neighbors = [int(label) for label in np.unique(neighbors[neighbors >= 0])]
+            label = self.components.merge(neighbors) if neighbors else self.components.new_label()
+            self.components.add_tiles([x], [y], label)
+
+            # a room tile belongs to its room. a hall tile joins up the halls around it, rooms are left alone
+            region = self.room_at(x, y)
+            if region == 0:
+                neighbors = self.neighbor_values(self.regions.get_labels(), x, y)
+                neighbors = [int(label) for label in np.unique(neighbors[neighbors > len(self.rooms_list)])]
+                region = self.regions.merge(neighbors) if neighbors else self.regions.new_label()
+            self.regions.add_tiles([x], [y], region)
+        else:
+            # may split its component, and its hall. rooms are their rectangle, so they stay one region
+            self.components.remove_tile(x, y)
+            if self.regions.get_labels()[x, y] > len(self.rooms_list):
+                self.regions.remove_tile(x, y)
+            else:
+                self.regions.clear_tiles([x], [y], int(self.regions.get_labels()[x, y]))
+
+    def memory_usage(self):
+        return {"components": self.components.get_labels().nbytes, "regions": self.regions.get_labels().nbytes}
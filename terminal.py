@@ -0,0 +1,411 @@
+# terminal frontend, plays the game in a curses window without pygame
+# run with: python terminal.py [--seed N] [--bench TURNS] [--vis-index]
+import curses
+import getopt
+import sys
+import time
+import numpy as np
+import mapgen
+import mapcache
+import visindex
+import dungeon
+import floor
+import fov
+import entity
+import classes
+import ai
+import light
+
+# characters drawn over the map
+PLAYER_CHAR = "@"
+MONSTER_CHAR = "b"
+ITEM_CHAR = "*"
+UNSEEN_CHAR = " "
+
+# cell styles, turned into curses attributes by make_attrs
+STYLE_HIDDEN = 0
+STYLE_VISIBLE = 1
+STYLE_REVEALED = 2
+STYLE_PLAYER = 3
+STYLE_MONSTER = 4
+STYLE_ITEM = 5
+STYLE_LIT = 6 # visible and brightly lit, see light.LIGHT_BRIGHT
+
+# rows under the map for the status line and messages
+STATUS_ROWS = 1
+MESSAGE_ROWS = 3
+# smallest terminal that fits a row of map under the status line and messages
+MIN_ROWS = STATUS_ROWS + MESSAGE_ROWS + 1
+MIN_COLS = 2
+
+# key -> (dx, dy) for movement, vi keys and arrows
+MOVE_KEYS = {
+    ord("h"): (-1, 0), ord("j"): (0, 1), ord("k"): (0, -1), ord("l"): (1, 0),
+    ord("y"): (-1, -1), ord("u"): (1, -1), ord("b"): (-1, 1), ord("n"): (1, 1),
+    curses.KEY_LEFT: (-1, 0), curses.KEY_DOWN: (0, 1), curses.KEY_UP: (0, -1), curses.KEY_RIGHT: (1, 0),
+}
+
+def make_attrs():
+    # curses attribute for each style, needs curses to be initialized
+    colors = [curses.COLOR_WHITE, curses.COLOR_WHITE, curses.COLOR_BLUE, curses.COLOR_YELLOW, curses.COLOR_RED, curses.COLOR_CYAN,
+              curses.COLOR_YELLOW]
+    attrs = [curses.A_NORMAL, curses.A_NORMAL, curses.A_DIM, curses.A_BOLD, curses.A_BOLD, curses.A_NORMAL, curses.A_BOLD]
+    if curses.has_colors():
+        curses.start_color()
+        for style, color in enumerate(colors):
+            if style > 0:
+                curses.init_pair(style, color, curses.COLOR_BLACK)
+                attrs[style] |= curses.color_pair(style)
+    return attrs
+
+class Terminal_Renderer:
+    # draws a window of the map as characters
+    # compose() builds the whole view as arrays of characters and styles (rows are screen y, ie map y),
+    # terrain goes through a byte lookup table made from mapgen.DISPLAY_VALUES in one go.
+    # draw() only writes the cells that differ from what it drew last time
+    def __init__(self, width, height):
+        # views are at least one cell in each direction
+        self.width = max(width, 1)
+        self.height = max(height, 1)
+        self.lut = mapgen.make_display_lut()
+        self.chars = np.full((self.height, self.width), ord(UNSEEN_CHAR), dtype=np.uint8)
+        self.styles = np.zeros((self.height, self.width), dtype=np.uint8)
+        # what is on screen, None until the first draw
+        self.drawn_chars = None
+        self.drawn_styles = None
+
+    def get_origin(self, player):
+        # map tile at the top left of a view centered on the player
+        x, y = player.get_pos()
+        return x - self.width//2, y - self.height//2
+
+    def compose(self, the_floor, vis_window, player):
+        # fills chars and styles for the view around the player
+        # vis_window - fov.Fov_Window, tiles outside it aren't visible
+        map = the_floor.get_map()
+        mapx, mapy = map.shape()
+        x0, y0 = self.get_origin(player)
+        self.chars[:] = ord(UNSEEN_CHAR)
+        self.styles[:] = STYLE_HIDDEN
+
+        # part of the view that is on the map
+        cx0 = max(x0, 0)
+        cy0 = max(y0, 0)
+        cx1 = min(x0 + self.width, mapx)
+        cy1 = min(y0 + self.height, mapy)
+        if cx0 >= cx1 or cy0 >= cy1:
+            return
+        window = (slice(cx0, cx1), slice(cy0, cy1))
+        view = (slice(cy0 - y0, cy1 - y0), slice(cx0 - x0, cx1 - x0))
+
+        visible = vis_window.get_visible(cx0, cy0, cx1, cy1).T
+        revealed = map.get_revealed_map()[window].T
+        lit = the_floor.get_light_field().get_light_map()[window].T >= light.LIGHT_BRIGHT
+        self.chars[view] = np.where(visible | revealed, self.lut[map.get_map()[window].T], ord(UNSEEN_CHAR))
+        self.styles[view] = np.where(visible, np.where(lit, STYLE_LIT, STYLE_VISIBLE), np.where(revealed, STYLE_REVEALED, STYLE_HIDDEN))
+
+        # items and living monsters in sight, then the player
+        self.draw_things([thing.get_pos() for thing in the_floor.get_item_list()], ITEM_CHAR, STYLE_ITEM, vis_window, x0, y0)
+        self.draw_things([ent.get_pos() for ent in the_floor.get_entities() if ent.is_alive()], MONSTER_CHAR, STYLE_MONSTER, vis_window, x0, y0)
+        self.draw_things([player.get_pos()], PLAYER_CHAR, STYLE_PLAYER, None, x0, y0)
+
+    def draw_things(self, positions, char, style, vis_window, x0, y0):
+        # puts char at every position that is in the view, and visible unless vis_window is None
+        if len(positions) == 0:
+            return
+        xs, ys = np.array(positions, dtype=int).T
+        keep = (xs >= x0) & (xs < x0 + self.width) & (ys >= y0) & (ys < y0 + self.height)
+        if vis_window is not None:
+            keep &= vis_window.are_visible(xs, ys)
+        self.chars[ys[keep] - y0, xs[keep] - x0] = ord(char)
+        self.styles[ys[keep] - y0, xs[keep] - x0] = style
+
+    def draw(self, screen, attrs, top=0, left=0):
+        # writes the cells that changed since the last draw to screen (anything with curses' addstr)
+        # each changed row is written as runs of the same style between its first and last changed cell
+        # returns the number of cells written
+        if self.drawn_chars is None:
+            changed = np.ones(self.chars.shape, dtype=bool)
+        else:
+            changed = (self.chars != self.drawn_chars) | (self.styles != self.drawn_styles)
+
+        written = 0
+        for row in np.nonzero(changed.any(axis=1))[0]:
+            cols = np.nonzero(changed[row])[0]
+            first = cols[0]
+            last = cols[-1] + 1
+            styles = self.styles[row, first:last]
+            text = self.chars[row, first:last].tobytes().decode("ascii")
+            starts = np.concatenate(([0], np.nonzero(np.diff(styles))[0] + 1, [last - first]))
+            for start, end in zip(starts[:-1], starts[1:]):
+                screen.addstr(top + row, left + first + start, text[start:end], attrs[styles[start]])
+            written += last - first
+
+        if self.drawn_chars is None:
+            self.drawn_chars = self.chars.copy()
+            self.drawn_styles = self.styles.copy()
+        else:
+            np.copyto(self.drawn_chars, self.chars)
+            np.copyto(self.drawn_styles, self.styles)
+        return written
+
+    def invalidate(self):
+        # forget what's on screen, the next draw writes everything
+        self.drawn_chars = None
+        self.drawn_styles = None
+
+class Message_Log:
+    # keeps game messages, the newest are shown under the map
+    def __init__(self):
+        self.messages = []
+        self.changed = True
+
+    def add(self, message):
+        self.messages.append(message)
+        self.changed = True
+
+    def get_recent(self, n):
+        return self.messages[-n:]
+
+def move_player(player, the_floor, dx, dy, log):
+    # moves the player, or attacks whatever blocks the way. returns True if it took a turn
+    map = the_floor.get_map().get_map()
+    x = player.get_pos()[0] + dx
+    y = player.get_pos()[1] + dy
+    if map[x][y] == mapgen.MAP_WALL:
+        return False
+    if the_floor.get_entity_map()[x][y] == 1:
+        bumped_entity = the_floor.get_entity_at_position(x, y)
+        if bumped_entity and bumped_entity.does_block():
+            attack_entity(player, bumped_entity, player.class_type.get_active_melee(), log)
+            return True
+    player.move(dx, dy)
+    return True
+
+def attack_entity(player, target_entity, attack, log, hit_modifier=0):
+    # same rules as engine.attack_entity, messages go to log
+    if attack.get_cost() > 0:
+        player.class_type.spend_mana(attack.get_cost())
+
+    hit_roll = np.random.randint(0,100)
+    if hit_roll <= attack.get_accuracy()*100 - target_entity.class_type.get_evasion() + hit_modifier:
+        damage, target_hp = target_entity.class_type.change_hp(-1*attack.get_damage())
+        log.add("You {name} at the {monster} for {dam} damage".format(name=attack.get_name(), monster=target_entity.get_name(), dam=damage))
+        if not target_entity.is_alive():
+            log.add("The {monster} deconstitutes".format(monster=target_entity.get_name()))
+            if player.class_type.gain_xp(target_entity.class_type.get_xp()):
+                log.add("Your level increases to {level}!".format(level=player.class_type.get_level()+1))
+                log.add("Choose stat to increase: (a)rm, (l)eg, (b)ody, (m)ind")
+    else:
+        log.add("You miss")
+
+def change_floor(player, the_floor, the_dungeon, direction, log):
+    # takes the stairs under the player if there are any, returns the floor the player ends up on
+    tile = the_floor.get_map().get_map()[player.get_pos()]
+    depth = the_floor.get_depth()
+    if direction == "UP" and tile == mapgen.MAP_UP_STAIR and depth > 0:
+        new_floor = the_dungeon.get_floor(depth - 1)
+        new_location = new_floor.get_map().get_exit()
+    elif direction == "DOWN" and tile == mapgen.MAP_DOWN_STAIR and the_dungeon.has_floor(depth + 1):
+        new_floor = the_dungeon.get_floor(depth + 1)
+        new_location = new_floor.get_map().get_entrance()
+        the_dungeon.prefetch(depth + 2)
+    else:
+        log.add("Can't go {direction} here".format(direction=direction.lower()))
+        return the_floor
+
+    new_floor.set_entity_pos(player, new_location[0], new_location[1])
+    player.set_floor(new_floor)
+    log.add("You enter floor {floornum}".format(floornum=new_floor.get_depth()))
+    return new_floor
+
+def update_fov(player, the_floor, log, range_limit=8):
+    # same as engine.update_fov, and marks monsters in sight as visible so their ai reacts
+    current_map = the_floor.get_map()
+    the_floor.update_vis_index()
+    vis_window = fov.calc_fov_cached(player.get_pos(), range_limit, the_floor)
+    current_map.update_revealed_map(vis_window.get_vis(), vis_window.get_bounds(), vis_window.get_offset())
+    for ent in the_floor.get_entities():
+        ex, ey = ent.get_pos()
+        if vis_window.is_visible(ex, ey):
+            if not ent.is_visible() and ent.is_alive():
+                log.add("{name} comes into view".format(name=ent.get_name()))
+            ent.set_visible(True)
+        else:
+            ent.set_visible(False)
+    return vis_window
+
+def monster_turn(player, the_floor, log):
+    player.class_type.update_passive()
+    ai.perceive(player, the_floor)
+    for ent in the_floor.get_entities():
+        if ent.is_alive():
+            result = ent.ai.take_turn(player)
+            if result:
+                log.add(result[0])
+
+def draw_status(screen, row, width, player, the_floor, log):
+    # status line and the latest messages, only rewritten when something changed
+    status = "HP: {hp}/{max_hp}  Mana: {mana}/{max_mana}  XP: {xp}  Level {level}  Floor {depth}".format(
+        hp=player.class_type.get_hp(), max_hp=player.class_type.get_max_hp(), mana=player.class_type.get_mana(),
+        max_mana=player.class_type.get_max_mana(), xp=player.class_type.get_xp(), level=player.class_type.get_level(),
+        depth=the_floor.get_depth())
+    screen.addstr(row, 0, status[:width].ljust(width))
+    if log.changed:
+        for i, message in enumerate(log.get_recent(MESSAGE_ROWS)):
+            screen.addstr(row + STATUS_ROWS + i, 0, message[:width].ljust(width))
+        log.changed = False
+
+def main(screen, seed=None, bench_turns=None, timings=None, vis_index=False):
+    # screen - curses window, see curses.wrapper
+    # seed - int, dungeon seed. picked at random if None
+    # bench_turns - int, if given the player takes that many random steps without waiting for keys
+    # timings - dict, if given gets lists of seconds spent per frame in "compose" and "draw", cells written
+    #           and the fov cache stats of the last floor
+    # vis_index - bool, give every floor a visindex.Vis_Index, built in the background and stored on disk
+    # returns an error message if the terminal is too small to play in, None otherwise
+    rows, cols = screen.getmaxyx()
+    if rows < MIN_ROWS or cols < MIN_COLS:
+        return "terminal is {cols}x{rows}, needs at least {min_cols}x{min_rows}".format(cols=cols, rows=rows, min_cols=MIN_COLS, min_rows=MIN_ROWS)
+    if seed is None:
+        seed = np.random.randint(0, 2**31)
+    curses.curs_set(0)
+    attrs = make_attrs()
+
+    mapx = 80
+    mapy = 80
+    num_floors = 10
+    floor_cache = mapcache.Map_Cache()
+    vis_cache = mapcache.Map_Cache(visindex.DEFAULT_VIS_DIR, visindex.DEFAULT_MAX_BYTES) if vis_index else None
+
+    def make_floor(depth, timings):
+        return floor.create_floor(mapx,mapy,depth,seed=mapgen.derive_seed(seed, depth),cache=floor_cache,vis_cache=vis_cache,timings=timings)
+
+    the_dungeon = dungeon.Dungeon(num_floors, make_floor)
+    log = Message_Log()
+    log.add("Dungeon seed: {seed}".format(seed=seed))
+
+    player = entity.Entity(0, 0, entity.PLAYER_SPRITE_INDEX, "You", class_type=classes.Player_Class())
+    current_floor = the_dungeon.get_floor(0)
+    the_dungeon.prefetch(1)
+    entrance = current_floor.get_map().get_entrance()
+    current_floor.set_entity_pos(player, entrance[0], entrance[1])
+    player.set_floor(current_floor)
+    log.add("You enter floor 0")
+
+    renderer = Terminal_Renderer(cols - 1, rows - STATUS_ROWS - MESSAGE_ROWS)
+    rng = np.random.RandomState(seed)
+    turn = 0
+
+    try:
+        while True:
+            vis_window = update_fov(player, current_floor, log)
+
+            start = time.perf_counter()
+            renderer.compose(current_floor, vis_window, player)
+            composed = time.perf_counter()
+            written = renderer.draw(screen, attrs)
+            draw_status(screen, renderer.height, cols - 1, player, current_floor, log)
+            screen.refresh()
+            if timings is not None:
+                timings.setdefault("compose", []).append(composed - start)
+                timings.setdefault("draw", []).append(time.perf_counter() - composed)
+                timings.setdefault("cells", []).append(written)
+
+            if not player.class_type.is_alive():
+                log.add("You deconstitute... press any key to exit")
+                draw_status(screen, renderer.height, cols - 1, player, current_floor, log)
+                if bench_turns is None:
+                    screen.getch()
+                return
+
+            # input, or a random step when benchmarking
+            if bench_turns is not None:
+                if turn >= bench_turns:
+                    return
+                key = list(MOVE_KEYS)[rng.randint(0, 8)]
+            else:
+                key = screen.getch()
+            turn += 1
+
+            took_turn = False
+            if key in MOVE_KEYS:
+                took_turn = move_player(player, current_floor, MOVE_KEYS[key][0], MOVE_KEYS[key][1], log)
+            elif key == ord("."):
+                took_turn = True
+            elif key == ord(","):
+                temp_item = current_floor.get_item_at_position(player.get_pos()[0], player.get_pos()[1])
+                if temp_item:
+                    player.class_type.add_item(temp_item)
+                    current_floor.remove_item(temp_item)
+                    log.add("You pick up the {name}".format(name=temp_item.get_name()))
+                    took_turn = True
+                else:
+                    log.add("Nothing here to pick up")
+            elif key in (ord("<"), ord(">")):
+                current_floor = change_floor(player, current_floor, the_dungeon, "UP" if key == ord("<") else "DOWN", log)
+            elif key == ord("q"):
+                return
+            elif key == curses.KEY_RESIZE:
+                rows, cols = screen.getmaxyx()
+                screen.clear()
+                renderer = Terminal_Renderer(cols - 1, rows - STATUS_ROWS - MESSAGE_ROWS)
+                log.changed = True
+
+            # level up takes the next key, a/l/b/m
+            while player.class_type.did_level():
+                draw_status(screen, renderer.height, cols - 1, player, current_floor, log)
+                stat = {ord("a"): "arm", ord("l"): "leg", ord("b"): "body", ord("m"): "mind"}.get(ord("a") if bench_turns is not None else screen.getch())
+                if stat:
+                    player.class_type.level_up(stat)
+
+            # monsters hold still when benchmarking so the walk isn't cut short
+            if took_turn and bench_turns is None:
+                monster_turn(player, current_floor, log)
+    finally:
+        if timings is not None:
+            timings["fov_cache"] = current_floor.get_fov_cache().get_stats()
+            timings["dungeon"] = the_dungeon.get_stats()
+        the_dungeon.close()
+
+def run(argv=[]):
+    # command line options
+    #   --seed N - dungeon seed for reproducible floors
+    #   --bench TURNS - take TURNS random steps and report frame times instead of playing
+    #   --vis-index - precompute every floor's visibility, see visindex.Vis_Index
+    seed = None
+    bench_turns = None
+    vis_index = False
+    opts, args = getopt.getopt(argv, "", ["seed=", "bench=", "vis-index"])
+    for opt, value in opts:
+        if opt == "--seed":
+            seed = int(value)
+        if opt == "--bench":
+            bench_turns = int(value)
+        if opt == "--vis-index":
+            vis_index = True
+
+    timings = {} if bench_turns is not None else None
+    error = curses.wrapper(main, seed, bench_turns, timings, vis_index)
+    if error:
+        print(error, file=sys.stderr)
+        return 1
+    if timings:
+        for name in ("compose", "draw"):
+            values = np.array(timings[name])*1000
+            print("{name}: mean {mean:.3f} ms, max {max:.3f} ms over {n} frames".format(name=name, mean=values.mean(), max=values.max(), n=len(values)))
+        print("cells written: mean {mean:.1f} per frame".format(mean=np.mean(timings["cells"])))
+        stats = timings["fov_cache"]
+        print("fov cache: {hits} hits, {misses} misses ({rate:.0%})".format(hits=stats["hits"], misses=stats["misses"], rate=stats["hit_rate"]))
+        stats = timings["dungeon"]
+        print("floor changes: {loaded} loaded, {prefetched} prefetched, {waited} waited, {blocked} blocked, {wait:.1f} ms waiting".format(
+            loaded=stats[dungeon.FLOOR_LOADED], prefetched=stats[dungeon.FLOOR_PREFETCHED], waited=stats[dungeon.FLOOR_WAITED],
+            blocked=stats[dungeon.FLOOR_BLOCKED], wait=stats["wait_time"]*1000))
+        stages = dict(stats["stages"])
+        total = stages.pop("total", 0)
+        print("floor generation: {n} floors, {total:.1f} ms ({stages})".format(n=stats["generated"], total=total*1000,
+              stages=", ".join("{} {:.1f} ms".format(stage, seconds*1000) for stage, seconds in stages.items())))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(run(sys.argv[1:]))
@@ -0,0 +1,40 @@
+import numpy as np
+
+# per tile layers of a floor, each holds small enums/flags that fit in a byte
+#   map - terrain, see mapgen MAP_ constants
+#   masked_map - wall tile index, 0-15
+#   trans_map - 1 if tile blocks sight
+#   revealed_map - 1 if tile has been seen
+#   entity_map - 1 if a living entity is on the tile
+#   item_map - 1 if an item is on the tile
+#   light_map - light level from the floor's static lights, 0-255, see light.Light_Field
+TILE_LAYERS = ("map", "masked_map", "trans_map", "revealed_map", "entity_map", "item_map", "light_map")
+
+class Tile_Store:
+    # every per tile layer of a floor packed into one uint8 array of shape (num layers, x, y)
+    # each layer is a contiguous plane, so get_layer views can be used anywhere the old per layer arrays were
+    def __init__(self, x, y, layers=TILE_LAYERS):
+        self.layers = layers
+        self.layer_index = {name: i for i, name in enumerate(layers)}
+        self.tiles = np.zeros((len(layers), x, y), dtype=np.uint8)
+
+    def get_layer(self, name):
+        # returns a view of the layer, writes go straight to the store
+        return self.tiles[self.layer_index[name]]
+
+    def get_bool_layer(self, name):
+        # view of a 0/1 layer as booleans, no copy. writes go straight to the store
+        return self.tiles[self.layer_index[name]].view(np.bool_)
+
+    def set_layer(self, name, values):
+        self.tiles[self.layer_index[name]] = values
+
+    def get_layers(self):
+        return self.layers
+
+    def nbytes(self):
+        return self.tiles.nbytes
+
+    def memory_usage(self):
+        # bytes used by each layer
+        return {name: self.tiles[i].nbytes for i, name in enumerate(self.layers)}
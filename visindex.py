@@ -0,0 +1,175 @@
+import numpy as np
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+import fov
+import mapgen
+import mapcache
+
+VIS_RADIUS = 8 # range limit the index is built for, the player's and monsters' sight range
+VIS_INDEX_VERSION = 1 # bump whenever the index layout or fov output changes
+VIS_BATCH = 256 # origins per ray table pass while building
+
+DEFAULT_VIS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache", "vis")
+DEFAULT_MAX_BYTES = 16*1024*1024
+
+# one worker builds every floor's index, one at a time, so a build never competes with another
+VIS_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vis-index")
+
+class Vis_Index:
+    # every walkable tile's fov out to radius, precomputed for a floor whose walls don't change.
+    # each walkable tile has a row of bits, one per tile of the (2*radius+1) square fov window around it,
+    # packed 8 to a byte. rows are memory mapped from a .npy file in the cache directory, named by a hash of
+    # the map, so a floor that was indexed before is only read back. builds run in a background worker and are
+    # picked up by update(), which the floor calls once a turn. the index only answers while the last build it
+    # picked up matches the floor's current walls, until then callers fall back to computing fov
+    def __init__(self, the_floor, radius=VIS_RADIUS, cache=None):
+        # cache - mapcache.Map_Cache for the directory the index files go in and its size budget
+        self.floor = the_floor
+        self.radius = radius
+        self.side = radius*2 + 1
+        self.cache = cache if cache is not None else mapcache.Map_Cache(DEFAULT_VIS_DIR, DEFAULT_MAX_BYTES)
+        self.rows = None # row of each map tile, -1 for walls
+        self.bits = None # (rows, bytes per row) uint8, memory mapped
+        self.version = None # trans_version the rows and bits were built for
+        self.future = None
+        self.builds = 0
+
+    def build(self):
+        # starts building the index for the floor's current walls in the background, unless a build is running
+        if self.future is not None and not self.future.done():
+            return self.future
+        the_map = self.floor.get_map()
+        # the worker gets copies, the game can change the map while it runs
+        self.future = VIS_EXECUTOR.submit(build_vis_index, the_map.get_map().copy(), the_map.get_trans_map().copy(),
+                                          self.radius, self.cache, the_map.get_trans_version())
+        self.builds += 1
+        return self.future
+
+    def wait(self):
+        # update()s, blocks until the build that leaves running finishes, then picks it up. returns is_ready()
+        self.update()
+        if self.future is not None:
+            self.future.result()
+        return self.update()
+
+    def update(self):
+        # picks up a finished build, and starts a new one if the walls changed since the index was built
+        # walls changed several times between updates only cost one rebuild. returns is_ready()
+        if self.future is not None and self.future.done():
+            self.rows, self.bits, self.version = self.future.result()
+            self.future = None
+        if self.future is None and self.version is not None and not self.is_ready():
+            self.build()
+        return self.is_ready()
+
+    def is_ready(self, range_limit=None):
+        # whether the index matches the floor's current walls, and covers range_limit if given
+        if range_limit is not None and range_limit != self.radius:
+            return False
+        return self.version is not None and self.version == self.floor.get_map().get_trans_version()
+
+    def get_radius(self):
+        return self.radius
+
+    def get_row(self, x, y):
+        # row of map tile x, y, -1 for tiles without one
+        if not (0 <= x < self.rows.shape[0] and 0 <= y < self.rows.shape[1]):
+            return -1
+        return self.rows[x, y]
+
+    def get_rows(self, xs, ys):
+        # row of each map tile (xs, ys), -1 for tiles without one
+        return self.rows[xs, ys]
+
+    def get_bits(self, rows, dx, dy):
+        # bit test: whether the tile (dx, dy) from the origin of each row is visible. every dx, dy must be in radius
+        cells = (np.asarray(dx) + self.radius)*self.side + np.asarray(dy) + self.radius
+        return (self.bits[rows, cells >> 3] >> (7 - (cells & 7))) & 1 == 1
+
+    def can_see(self, a, b):
+        # whether tile b is in tile a's fov, None if a has no row or the index isn't ready
+        if not self.is_ready():
+            return None
+        row = self.get_row(a[0], a[1])
+        if row < 0:
+            return None
+        dx = b[0] - a[0]
+        dy = b[1] - a[1]
+        if abs(dx) > self.radius or abs(dy) > self.radius:
+            return False
+        return bool(self.get_bits(row, dx, dy))
+
+    def get_visible(self, row):
+        # bool (2*radius+1) square fov window of row
+        return np.unpackbits(self.bits[row], count=self.side*self.side).reshape(self.side, self.side) == 1
+
+    def fill_window(self, origin, window):
+        # fills a reset Fov_Window for origin from the index, returns False if origin has no row
+        row = self.get_row(origin[0], origin[1])
+        if row < 0:
+            return False
+        window.get_vis()[self.get_visible(row)] = fov.FOV_VISIBLE
+        return True
+
+    def nbytes(self):
+        return 0 if self.bits is None else self.bits.nbytes + self.rows.nbytes
+
+    def get_stats(self):
+        return {"ready": self.is_ready(), "rows": 0 if self.bits is None else len(self.bits), "bytes": self.nbytes(),
+                "builds": self.builds}
+
+def make_vis_rows(map):
+    # row of each walkable tile in index order, -1 for walls
+    walkable = map != mapgen.MAP_WALL
+    rows = np.full(map.shape, -1, dtype=np.int32)
+    rows[walkable] = np.arange(np.count_nonzero(walkable), dtype=np.int32)
+    return rows
+
+def calc_vis_bits(map, trans_map, radius, out):
+    # fills out, a (walkable tiles, bytes per row) uint8 array, with the packed fov window of every walkable tile
+    # windows are computed through the ray table, VIS_BATCH origins at a time
+    table = fov.get_ray_table(radius)
+    pad = table.pad
+    steps = np.arange(pad*2 + 1)
+    padded = np.pad(trans_map == 1, pad, constant_values=True)
+    # fov windows don't see off the map
+    on_map = np.pad(np.ones(trans_map.shape, dtype=bool), radius, constant_values=False)
+    window_steps = np.arange(radius*2 + 1)
+    xs, ys = np.nonzero(map != mapgen.MAP_WALL)
+    for first in range(0, len(xs), VIS_BATCH):
+        bx = xs[first:first + VIS_BATCH]
+        by = ys[first:first + VIS_BATCH]
+        opaque = padded[bx[:, None, None] + steps[None, :, None], by[:, None, None] + steps[None, None, :]]
+        visible = table.get_visible_many(opaque)[:, 2:-2, 2:-2]
+        visible[:, radius, radius] = True
+        visible &= on_map[bx[:, None, None] + window_steps[None, :, None], by[:, None, None] + window_steps[None, None, :]]
+        out[first:first + VIS_BATCH] = np.packbits(visible.reshape(len(bx), -1), axis=1)
+    return out
+
+def build_vis_index(map, trans_map, radius, cache, version):
+    # loads the index for map and trans_map from cache's directory, building and storing it first if needed
+    # returns (rows, bits, version), bits memory mapped read only
+    rows = make_vis_rows(map)
+    digest = hashlib.sha256(map.tobytes() + trans_map.tobytes()).hexdigest()
+    key = cache.make_key(map=digest, shape=list(map.shape), radius=radius, vis_index_version=VIS_INDEX_VERSION)
+    file_name = os.path.join(cache.path, key + ".npy")
+    shape = (int(np.count_nonzero(rows >= 0)), -(-(radius*2 + 1)**2 // 8))
+    try:
+        bits = np.load(file_name, mmap_mode="r")
+        if bits.shape == shape and bits.dtype == np.uint8:
+            os.utime(file_name)
+            return rows, bits, version
+    except (OSError, ValueError):
+        pass
+
+    # build into a temp file and rename so readers never see a partial index
+    os.makedirs(cache.path, exist_ok=True)
+    temp_name = "{}.{}.tmp".format(file_name, os.getpid())
+    out = np.lib.format.open_memmap(temp_name, mode="w+", dtype=np.uint8, shape=shape)
+    calc_vis_bits(map, trans_map, radius, out)
+    out.flush()
+    del out
+    os.replace(temp_name, file_name)
+    cache.evict(".npy")
+    return rows, np.load(file_name, mmap_mode="r"), version